@@ -0,0 +1,68 @@
+"""Save benchmark results and compare them against a saved baseline."""
+
+import json
+import os
+import subprocess
+import time
+from typing import Any, Dict, List, Optional, Tuple
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def git_revision() -> str:
+    """Short commit hash of the working tree (with '+dirty' if modified), or 'unknown'."""
+    try:
+        revision = subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=REPO_ROOT,
+                                  capture_output=True, text=True, check=True).stdout.strip()
+        dirty = subprocess.run(['git', 'status', '--porcelain', '--untracked-files=no'], cwd=REPO_ROOT,
+                               capture_output=True, text=True, check=True).stdout.strip()
+        return revision + ('+dirty' if dirty else '')
+    except (OSError, subprocess.CalledProcessError):
+        return 'unknown'
+
+
+def save_results(path: str, results: Dict[str, Any]):
+    """Write results as JSON, stamped with the time and git revision."""
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    stamped = {'revision': git_revision(), 'created': time.strftime('%Y-%m-%dT%H:%M:%S'), **results}
+    with open(path, 'w') as f:
+        json.dump(stamped, f, indent=2, sort_keys=True)
+
+
+def load_results(path: str) -> Dict[str, Any]:
+    with open(path) as f:
+        return json.load(f)
+
+
+def compare(current: Dict[str, float], baseline: Dict[str, float], directions: Dict[str, int],
+            tolerance: float, tolerances: Optional[Dict[str, float]] = None) -> Tuple[List[str], bool]:
+    """
+    Report lines comparing metrics, and whether any regressed beyond `tolerance`.
+
+    `directions` maps each metric to +1 (higher is better, e.g. domains/s)
+    or -1 (lower is better, e.g. latency). `tolerances` overrides the
+    tolerance for single metrics (0 flags any change for the worse). A
+    metric moving away from a zero baseline in the wrong direction always
+    counts as a regression. Metrics missing from either side are skipped.
+    """
+    lines = []
+    regressed = False
+    for metric, direction in directions.items():
+        if metric not in current or metric not in baseline:
+            continue
+        new, old = current[metric], baseline[metric]
+        allowed = (tolerances or {}).get(metric, tolerance)
+        if old:
+            change = (new - old) / old
+            worse = change * direction < -allowed
+            relative = f"{change:+.1%}"
+        else:
+            # No relative change from zero: any move in the wrong direction counts
+            worse = (new - old) * direction < 0
+            relative = 'from zero' if new else '+0.0%'
+        regressed |= worse
+        marker = '⚠️ ' if worse else '  '
+        lines.append(f"{marker}{metric:<28} {old:>12.4g} -> {new:<12.4g} ({relative})")
+    return lines, regressed
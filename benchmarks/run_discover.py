@@ -0,0 +1,246 @@
+#!/usr/bin/env python3
+"""
+Benchmark `main_async.py discover` against the synthetic storefront server.
+
+Starts benchmarks/storefront_server.py with the given store mix, latency
+and failure options, runs one discovery over all of its stores (fresh
+SQLite database, no DNS cache file) and reports:
+
+    domains/s        finished domains over the discover process's wall time
+    p50/p95/p99      per-domain latency, from first pipeline stage to result
+                     (the `elapsed` recorded in the run journal; --stream
+                     only, left out of the results otherwise)
+    CPU              user + system seconds of discover and its child processes
+    peak memory      max RSS of the largest discover process
+
+Any option this script doesn't know is passed on to `discover`
+(default: --stream --concurrent 100). Every synthetic store shares one
+host, so --pool-limit-per-host 0 (no per-host cap) is added unless given:
+real stores each have their own host, and the cap would otherwise throttle
+the whole run instead of each store. With --repeat, each metric is the
+median over the runs. --output saves the results as JSON; --baseline compares
+them with saved results and exits 1 if a metric got worse by more than
+--tolerance.
+
+Usage:
+    python benchmarks/run_discover.py --stores 2000
+    python benchmarks/run_discover.py --stores 5000 --latency-ms 100 -- --stream --concurrent 200 --workers 2
+    python benchmarks/run_discover.py --output benchmarks/results/discover.json --baseline benchmarks/results/discover-base.json
+"""
+
+import argparse
+import collections
+import json
+import os
+import shutil
+import socket
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import urllib.request
+
+from results import REPO_ROOT, compare, load_results, save_results
+from storefront_server import add_server_arguments
+
+SERVER = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'storefront_server.py')
+DISCOVER = os.path.join(REPO_ROOT, 'src', 'main_async.py')
+
+DEFAULT_DISCOVER_ARGS = ['--stream', '--concurrent', '100']
+
+# Metric -> +1 if higher is better, -1 if lower is better
+METRICS = {
+    'domains_per_s': 1,
+    'latency_p50_s': -1,
+    'latency_p95_s': -1,
+    'latency_p99_s': -1,
+    'cpu_s': -1,
+    'peak_rss_mb': -1,
+}
+
+SERVER_OPTIONS = ['stores', 'seed', 'shopify_share', 'plus_share', 'page_kb', 'latency_ms', 'latency_sigma',
+                  'error_rate', 'hang_rate', 'hang_seconds']
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+def start_server(args, port: int, log_path: str) -> subprocess.Popen:
+    command = [sys.executable, SERVER, '--port', str(port)]
+    for option in SERVER_OPTIONS:
+        command += [f"--{option.replace('_', '-')}", str(getattr(args, option))]
+    server = subprocess.Popen(command, stdout=open(log_path, 'w'), stderr=subprocess.STDOUT)
+
+    deadline = time.monotonic() + 15
+    while time.monotonic() < deadline:
+        if server.poll() is not None:
+            raise RuntimeError(f'Storefront server exited (see {log_path})')
+        try:
+            server_stats(port)
+            return server
+        except OSError:
+            time.sleep(0.1)
+    server.terminate()
+    raise RuntimeError('Storefront server did not start within 15s')
+
+
+def server_stats(port: int) -> dict:
+    with urllib.request.urlopen(f'http://127.0.0.1:{port}/_stats', timeout=5) as response:
+        return json.load(response)
+
+
+def percentile(values, q: float) -> float:
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[min(int(len(ordered) * q), len(ordered) - 1)]
+
+
+def run_once(args, discover_args, port: int, workdir: str) -> dict:
+    """One discover run over every store; returns its metrics."""
+    domains_path = os.path.join(workdir, 'domains.txt')
+    with open(domains_path, 'w') as f:
+        for number in range(args.stores):
+            f.write(f'http://127.0.0.1:{port}/s{number}\n')
+
+    journal_path = os.path.join(workdir, 'journal.jsonl')
+    database_path = os.path.join(workdir, 'bench.db')
+    for path in (journal_path, database_path):
+        if os.path.exists(path):
+            os.remove(path)
+
+    command = [sys.executable, DISCOVER, 'discover', '--txtfile', domains_path, '--limit', str(args.stores),
+               '--journal', journal_path, '--dns-cache-file', '', *discover_args]
+    env = {**os.environ, 'DATABASE_URL': f'sqlite:///{database_path}'}
+    log_path = os.path.join(workdir, 'discover.log')
+
+    requests_before = server_stats(port)['requests']
+    started = time.perf_counter()
+    with open(log_path, 'w') as log:
+        process = subprocess.Popen(command, cwd=REPO_ROOT, env=env, stdout=log, stderr=subprocess.STDOUT)
+        # wait4 gives this child's resource usage, including the children it reaped (parse/shard pools)
+        _, status, usage = os.wait4(process.pid, 0)
+    wall = time.perf_counter() - started
+    process.returncode = os.waitstatus_to_exitcode(status)
+    if process.returncode != 0:
+        with open(log_path) as f:
+            tail = f.read()[-2000:]
+        raise RuntimeError(f'discover exited with {process.returncode}:\n{tail}')
+
+    latencies = []
+    states = collections.Counter()
+    with open(journal_path) as f:
+        for line in f:
+            entry = json.loads(line)
+            states[entry['state']] += 1
+            if 'elapsed' in entry:
+                latencies.append(entry['elapsed'])
+
+    finished = sum(states.values())
+    cpu = usage.ru_utime + usage.ru_stime
+    result = {
+        'domains': finished,
+        'shopify': states.get('shopify', 0),
+        'states': dict(states),
+        'wall_s': round(wall, 3),
+        'domains_per_s': round(finished / wall, 2),
+        'cpu_s': round(cpu, 2),
+        'cpu_percent': round(cpu / wall * 100, 1),
+        # ru_maxrss is in KB on Linux
+        'peak_rss_mb': round(usage.ru_maxrss / 1024, 1),
+        'requests': server_stats(port)['requests'] - requests_before,
+    }
+    # Only the streaming pipeline records `elapsed`; without it there is no latency to report
+    if latencies:
+        result['latency_p50_s'] = percentile(latencies, 0.50)
+        result['latency_p95_s'] = percentile(latencies, 0.95)
+        result['latency_p99_s'] = percentile(latencies, 0.99)
+    return result
+
+
+def median_run(runs) -> dict:
+    """Per-metric median over runs (counts from the first run)."""
+    result = dict(runs[0])
+    for metric in ['wall_s', 'cpu_percent', 'requests', *METRICS]:
+        if all(metric in run for run in runs):
+            result[metric] = statistics.median(run[metric] for run in runs)
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark main_async discover against synthetic storefronts',
+                                     allow_abbrev=False)
+    add_server_arguments(parser)
+    parser.add_argument('--repeat', type=int, default=1, help='Runs to take the median of (default: 1)')
+    parser.add_argument('--output', type=str, default=None, help='Save results to this JSON file')
+    parser.add_argument('--baseline', type=str, default=None, help='Compare with results saved by an earlier --output')
+    parser.add_argument('--tolerance', type=float, default=0.10, help='Allowed relative regression per metric (default: 0.10)')
+    parser.add_argument('--keep', action='store_true', help='Keep the working directory (logs, journal, database)')
+    args, discover_args = parser.parse_known_args()
+    discover_args = [arg for arg in discover_args if arg != '--'] or DEFAULT_DISCOVER_ARGS
+    if not any(arg.startswith('--pool-limit-per-host') for arg in discover_args):
+        discover_args += ['--pool-limit-per-host', '0']
+
+    workdir = tempfile.mkdtemp(prefix='discover-bench-')
+    port = free_port()
+    print(f"🏪 {args.stores} synthetic stores ({args.shopify_share:.0%} Shopify, {args.latency_ms:.0f}ms median "
+          f"latency, {args.error_rate:.0%} errors), port {port}")
+    print(f"🚀 discover {' '.join(discover_args)}")
+
+    server = start_server(args, port, os.path.join(workdir, 'server.log'))
+    runs = []
+    try:
+        for run in range(args.repeat):
+            result = run_once(args, discover_args, port, workdir)
+            runs.append(result)
+            print(f"  ⏱️  Run {run + 1}/{args.repeat}: {result['domains']} domains in {result['wall_s']:.1f}s "
+                  f"({result['domains_per_s']:.1f}/s)")
+    finally:
+        server.terminate()
+        server.wait()
+        if not args.keep:
+            shutil.rmtree(workdir, ignore_errors=True)
+
+    result = median_run(runs)
+    print(f"\n📊 {result['domains']} domains ({result['shopify']} Shopify), {result['requests']} requests")
+    print(f"  Throughput   {result['domains_per_s']:.1f} domains/s ({result['wall_s']:.1f}s wall)")
+    if 'latency_p50_s' in result:
+        print(f"  Latency      p50 {result['latency_p50_s']:.3f}s, p95 {result['latency_p95_s']:.3f}s, "
+              f"p99 {result['latency_p99_s']:.3f}s")
+    else:
+        print("  Latency      n/a (no per-domain `elapsed` in the journal; only --stream records it)")
+    print(f"  CPU          {result['cpu_s']:.1f}s ({result['cpu_percent']:.0f}% of one core)")
+    print(f"  Peak memory  {result['peak_rss_mb']:.0f}MB")
+    if args.keep:
+        print(f"  Logs         {workdir}")
+
+    results = {
+        'benchmark': 'discover',
+        'options': {**{option: getattr(args, option) for option in SERVER_OPTIONS},
+                    'discover_args': discover_args, 'repeat': args.repeat},
+        'metrics': result,
+    }
+    if args.output:
+        save_results(args.output, results)
+        print(f"💾 Saved {args.output}")
+
+    if args.baseline:
+        baseline = load_results(args.baseline)
+        if baseline.get('options') != results['options']:
+            print("⚠️  Baseline was run with different options; the comparison may not mean much")
+        lines, regressed = compare(result, baseline['metrics'], METRICS, args.tolerance)
+        print(f"\n📐 Against {args.baseline} ({baseline.get('revision', 'unknown')}):")
+        for line in lines:
+            print(f"  {line}")
+        if regressed:
+            print(f"❌ Regression beyond {args.tolerance:.0%}")
+            sys.exit(1)
+        print(f"✅ Within {args.tolerance:.0%} of the baseline")
+
+
+if __name__ == '__main__':
+    main()
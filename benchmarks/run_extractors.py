@@ -0,0 +1,261 @@
+#!/usr/bin/env python3
+"""
+Micro-benchmark the HTML extractors over a fixture corpus of store pages.
+
+Each page in benchmarks/fixtures/extractors/ is a homepage, contact page or
+about page; expected.json lists, per page, the values a person reading the
+page would extract. Every extractor runs on the input the scrapers give it:
+
+    parse          make_soup(html), the parse every other extractor reuses
+    email, phone   extract_email / extract_phone on the homepage footer or
+                   the whole contact page
+    address        extract_address on the homepage footer, contact or
+                   about page
+    schema_org     extract_schema_org (JSON-LD) on the homepage
+    plus_signals   SignalEngine.evaluate (Shopify / Plus verdict) on the
+                   homepage HTML
+
+and reports, per extractor:
+
+    time           microseconds per page (median over --iterations passes)
+    allocations    peak KB allocated per page (tracemalloc, separate pass)
+    accuracy       share of expected fields extracted correctly; phone
+                   numbers are compared by digits, text ignoring case and
+                   whitespace, and an expected null means "nothing found"
+
+--output saves the results as JSON; --baseline compares them with saved
+results and exits 1 if time or allocations got worse by more than
+--tolerance, or if any accuracy dropped at all.
+
+Usage:
+    python benchmarks/run_extractors.py
+    python benchmarks/run_extractors.py --output benchmarks/results/extractors-base.json
+    python benchmarks/run_extractors.py --baseline benchmarks/results/extractors-base.json --parser html.parser
+"""
+
+import argparse
+import gc
+import json
+import os
+import re
+import statistics
+import sys
+import time
+import tracemalloc
+
+from results import REPO_ROOT, compare, load_results, save_results
+
+sys.path.insert(0, os.path.join(REPO_ROOT, 'src'))
+from detectors.signals import default_engine
+from scrapers.extractors import extract_address, extract_email, extract_phone, extract_schema_org
+from utils.html_parser import make_soup, set_parser
+
+FIXTURES = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'fixtures', 'extractors')
+
+
+def _scope(page):
+    """The homepage footer (None without one), or the whole contact/about page."""
+    return page['soup'].find('footer') if page['kind'] == 'homepage' else page['soup']
+
+
+def _scoped(extract):
+    """Run `extract` on the footer of a homepage (None without one), else on the whole page."""
+    def run(page):
+        scope = page['scope']
+        return extract(scope) if scope is not None else None
+    return run
+
+
+# Extractor -> (page kinds it runs on, function of the prepared page)
+EXTRACTORS = {
+    'parse': (('homepage', 'contact', 'about'), lambda page: make_soup(page['html'])),
+    'email': (('homepage', 'contact'), _scoped(extract_email)),
+    'phone': (('homepage', 'contact'), _scoped(extract_phone)),
+    'address': (('homepage', 'contact', 'about'), _scoped(extract_address)),
+    'schema_org': (('homepage',), lambda page: extract_schema_org(page['soup'])),
+    'plus_signals': (('homepage',), lambda page: default_engine().evaluate(page['html'])),
+}
+
+# Lower is better for time and allocations, higher for accuracy
+METRIC_DIRECTIONS = {'us_per_page': -1, 'peak_kb': -1, 'accuracy': 1}
+
+
+def load_corpus(directory: str):
+    """Pages with their HTML, parsed tree, extraction scope and expected values."""
+    with open(os.path.join(directory, 'expected.json')) as f:
+        expected = json.load(f)
+
+    pages = []
+    for name, values in sorted(expected.items()):
+        with open(os.path.join(directory, name), encoding='utf-8') as f:
+            html = f.read()
+        page = {'name': name, 'kind': values['kind'], 'html': html, 'soup': make_soup(html),
+                'expected': values}
+        page['scope'] = _scope(page)
+        pages.append(page)
+    return pages
+
+
+def time_extractor(extract, pages, iterations: int) -> float:
+    """Median seconds for one pass of `extract` over `pages`."""
+    passes = []
+    gc_was_enabled = gc.isenabled()
+    gc.disable()
+    try:
+        for _ in range(iterations):
+            started = time.perf_counter()
+            for page in pages:
+                extract(page)
+            passes.append(time.perf_counter() - started)
+    finally:
+        if gc_was_enabled:
+            gc.enable()
+    return statistics.median(passes)
+
+
+def peak_allocations(extract, pages) -> float:
+    """Mean peak bytes allocated while extracting one page."""
+    peaks = []
+    tracemalloc.start()
+    try:
+        for page in pages:
+            tracemalloc.reset_peak()
+            before, _ = tracemalloc.get_traced_memory()
+            result = extract(page)
+            _, peak = tracemalloc.get_traced_memory()
+            peaks.append(peak - before)
+            del result
+    finally:
+        tracemalloc.stop()
+    return statistics.mean(peaks) if peaks else 0.0
+
+
+def normalize(field: str, value):
+    if value is None or isinstance(value, bool):
+        return value
+    if not isinstance(value, str):
+        # e.g. a JSON-LD object where a plain value was expected
+        return repr(value)
+    if field == 'phone':
+        digits = re.sub(r'\D', '', value)
+        return digits[1:] if len(digits) == 11 and digits.startswith('1') else digits
+    return ' '.join(value.split()).casefold() or None
+
+
+def score(name: str, result, expected):
+    """(correct, total, misses) for one extractor's result on one page."""
+    if isinstance(expected, dict):
+        result = result or {}
+        fields = [(f'{name}.{field}', field, result.get(field), value) for field, value in expected.items()]
+    else:
+        fields = [(name, name, result, expected)]
+
+    correct = 0
+    misses = []
+    for label, field, got, want in fields:
+        if normalize(field, got) == normalize(field, want):
+            correct += 1
+        else:
+            misses.append((label, want, got))
+    return correct, len(fields), misses
+
+
+def run_benchmark(pages, iterations: int):
+    """Metrics per extractor, plus the fields each one got wrong."""
+    metrics = {}
+    misses = {}
+    for name, (kinds, extract) in EXTRACTORS.items():
+        selected = [page for page in pages if page['kind'] in kinds]
+        if not selected:
+            continue
+        extract(selected[0])  # warm up (compiled signals, regex caches)
+
+        seconds = time_extractor(extract, selected, iterations)
+        metrics[f'{name}_us_per_page'] = round(seconds / len(selected) * 1e6, 1)
+        metrics[f'{name}_peak_kb'] = round(peak_allocations(extract, selected) / 1024, 1)
+
+        if name == 'parse':
+            continue
+        correct = total = 0
+        for page in selected:
+            if name not in page['expected']:
+                continue
+            page_correct, page_total, page_misses = score(name, extract(page), page['expected'][name])
+            correct += page_correct
+            total += page_total
+            misses.update({(page['name'], label): (want, got) for label, want, got in page_misses})
+        if total:
+            metrics[f'{name}_accuracy'] = round(correct / total, 4)
+            metrics[f'{name}_fields'] = total
+    return metrics, misses
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark the HTML extractors on a fixture corpus')
+    parser.add_argument('--fixtures', type=str, default=FIXTURES,
+                        help='Directory with the pages and expected.json (default: benchmarks/fixtures/extractors)')
+    parser.add_argument('--iterations', type=int, default=50, help='Timed passes over the corpus (default: 50)')
+    parser.add_argument('--parser', type=str, default='auto',
+                        help='HTML parser backend: lxml, html.parser or auto (default: auto)')
+    parser.add_argument('--output', type=str, default=None, help='Save results to this JSON file')
+    parser.add_argument('--baseline', type=str, default=None, help='Compare with results saved by an earlier --output')
+    parser.add_argument('--tolerance', type=float, default=0.10,
+                        help='Allowed relative regression in time and allocations (default: 0.10)')
+    args = parser.parse_args()
+
+    try:
+        backend = set_parser(args.parser)
+    except ValueError as e:
+        parser.error(str(e))
+
+    pages = load_corpus(args.fixtures)
+    kinds = {kind: sum(page['kind'] == kind for page in pages) for kind in ('homepage', 'contact', 'about')}
+    print(f"📄 {len(pages)} fixture pages ({kinds['homepage']} homepages, {kinds['contact']} contact, "
+          f"{kinds['about']} about), parser {backend}, {args.iterations} iterations")
+
+    metrics, misses = run_benchmark(pages, args.iterations)
+
+    print(f"\n📊 {'Extractor':<14} {'µs/page':>10} {'peak KB':>9} {'accuracy':>10}")
+    for name in EXTRACTORS:
+        if f'{name}_us_per_page' not in metrics:
+            continue
+        accuracy = metrics.get(f'{name}_accuracy')
+        accuracy = f"{accuracy:.0%} of {metrics[f'{name}_fields']}" if accuracy is not None else '-'
+        print(f"   {name:<14} {metrics[f'{name}_us_per_page']:>10.1f} {metrics[f'{name}_peak_kb']:>9.1f} "
+              f"{accuracy:>10}")
+
+    if misses:
+        print(f"\n🔍 {len(misses)} fields extracted wrong:")
+        for (page, label), (want, got) in sorted(misses.items()):
+            print(f"   {page}: {label} expected {want!r}, got {got!r}")
+
+    results = {
+        'benchmark': 'extractors',
+        'options': {'parser': backend, 'iterations': args.iterations,
+                    'fixtures': sorted(page['name'] for page in pages)},
+        'metrics': metrics,
+    }
+    if args.output:
+        save_results(args.output, results)
+        print(f"💾 Saved {args.output}")
+
+    if args.baseline:
+        baseline = load_results(args.baseline)
+        if baseline.get('options') != results['options']:
+            print("⚠️  Baseline was run with different options; the comparison may not mean much")
+        directions = {f'{name}_{metric}': direction for name in EXTRACTORS
+                      for metric, direction in METRIC_DIRECTIONS.items()}
+        # Any accuracy loss is a regression, however small
+        exact = {metric: 0.0 for metric in directions if metric.endswith('_accuracy')}
+        lines, regressed = compare(metrics, baseline['metrics'], directions, args.tolerance, exact)
+        print(f"\n📐 Against {args.baseline} ({baseline.get('revision', 'unknown')}):")
+        for line in lines:
+            print(f"  {line}")
+        if regressed:
+            print(f"❌ Regression: time or allocations beyond {args.tolerance:.0%}, or lower accuracy")
+            sys.exit(1)
+        print(f"✅ Within {args.tolerance:.0%} of the baseline, no accuracy lost")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,241 @@
+#!/usr/bin/env python3
+"""
+Serve N synthetic storefronts locally, for throughput benchmarks.
+
+Store n lives under http://127.0.0.1:<port>/s<n>, so its homepage is /s<n>
+and its contact page /s<n>/pages/contact (the pipeline keeps a URL-like
+domain as its base URL). Each store is a standard Shopify store, a Shopify
+Plus store, or another platform (WordPress, Wix, plain HTML):
+
+    Shopify / Plus   homepage with Shopify (and Plus) markers, a contact or
+                     about page with an address, a shipping policy,
+                     /meta.json, /products.json and /cart.js
+    other            homepage only; every other path is a 404
+
+Everything is derived from --seed and the request path: which kind a store
+is, which of its pages exist, each response's latency and whether it fails.
+Reruns with the same options serve exactly the same responses, so benchmark
+results are comparable across commits.
+
+Latency is log-normal around --latency-ms. --error-rate of responses are a
+500 or 503, and --hang-rate never answer within the client's timeout.
+GET /_stats reports request counts by status.
+
+Usage:
+    python benchmarks/storefront_server.py --stores 1000 --port 8799
+    python benchmarks/storefront_server.py --latency-ms 120 --latency-sigma 1.0 --error-rate 0.05
+"""
+
+import argparse
+import asyncio
+import collections
+import json
+import math
+import random
+
+from aiohttp import web
+
+PLATFORMS = ('wordpress', 'wix', 'plain')
+
+# Where the scraper looks for each page (see scrapers.async_store_scraper)
+CONTACT_PATHS = ('pages/contact', 'pages/contact-us', 'contact')
+ABOUT_PATHS = ('pages/about', 'pages/about-us', 'pages/locations', 'about')
+SHIPPING_PATHS = ('pages/shipping', 'policies/shipping-policy')
+
+CITIES = [
+    ('Austin', 'TX', '78701'), ('Denver', 'CO', '80202'), ('Portland', 'OR', '97201'),
+    ('Brooklyn', 'NY', '11201'), ('Chicago', 'IL', '60601'), ('Seattle', 'WA', '98101'),
+]
+STREETS = ['Main St', 'Market Street', 'Harbor Road', 'Pine Ave', 'Elm Street', 'Broadway']
+
+PRODUCT = ('<div class="product-card"><a href="/products/item-{i}"><img src="//cdn.shopify.com/s/files/1/p{i}.jpg" '
+           'alt="Item {i}" loading="lazy"></a><h3 class="product-card__title">Item {i}</h3>'
+           '<span class="price" data-price="{price}">${price}</span></div>\n')
+BLOG_POST = ('<article class="post"><h2><a href="/?p={i}">Post {i}</a></h2><p>Lorem ipsum dolor sit amet, '
+             'consectetur adipiscing elit, sed do eiusmod tempor incididunt ut labore.</p></article>\n')
+
+SHOPIFY_HEAD = ('<script src="https://cdn.shopify.com/s/files/1/theme.js"></script>'
+                '<script>window.Shopify = {}; Shopify.theme = {"name": "Dawn"};</script>'
+                '<script src="https://monorail-edge.shopifysvc.com/v1/produce" defer></script>')
+PLATFORM_HEAD = {
+    'wordpress': '<link rel="stylesheet" href="/wp-content/themes/storefront/style.css">',
+    'wix': '<script src="https://static.parastorage.com/services/wix-thunderbolt/main.js"></script>',
+    'plain': '',
+}
+
+
+class Store:
+    """One synthetic store, derived from the seed and its number."""
+
+    def __init__(self, seed: int, number: int, shopify_share: float, plus_share: float, page_kb: int):
+        rng = random.Random(f'{seed}:store:{number}')
+        self.number = number
+        self.name = f'Store {number}'
+        roll = rng.random()
+        if roll < shopify_share * plus_share:
+            self.kind = 'plus'
+        elif roll < shopify_share:
+            self.kind = 'shopify'
+        else:
+            self.kind = rng.choice(PLATFORMS)
+        self.shopify = self.kind in ('shopify', 'plus')
+
+        city, state, zip_code = rng.choice(CITIES)
+        self.address = f'{rng.randint(1, 999)} {rng.choice(STREETS)}, {city}, {state} {zip_code}'
+        self.email = f'hello@store{number}.example'
+        self.phone = f'(555) {rng.randint(200, 999)}-{rng.randint(1000, 9999)}'
+        # Which of the candidate pages exist (the address is on the contact or the about page)
+        self.contact_path = rng.choice(CONTACT_PATHS)
+        self.about_path = rng.choice(ABOUT_PATHS) if rng.random() < 0.5 else None
+        self.shipping_path = rng.choice(SHIPPING_PATHS)
+        self.local_delivery = rng.random() < 0.3
+        # Homepage size varies around --page-kb
+        self.page_bytes = int(page_kb * 1024 * rng.uniform(0.5, 1.5))
+
+    def homepage(self) -> str:
+        if not self.shopify:
+            head = PLATFORM_HEAD[self.kind]
+            body = _fill(BLOG_POST, self.page_bytes)
+            return f'<!doctype html><html><head><title>{self.name}</title>{head}</head><body>{body}</body></html>'
+
+        head = SHOPIFY_HEAD
+        checkout = '<form action="https://checkout.shopify.com/1/checkouts" method="post"></form>'
+        extras = ''
+        if self.kind == 'plus':
+            # Custom checkout (no checkout.shopify.com), a Plus app and multi-currency
+            checkout = ''
+            head += '<script src="/assets/custom-checkout.js"></script>'
+            extras = '<div data-currency="USD"></div><div data-currency="CAD"></div><p>Wholesale accounts available.</p>'
+
+        footer = (f'<footer><p>&copy; {self.name}</p><a href="mailto:{self.email}">Email us</a>'
+                  f'<a href="/pages/faq">FAQ</a></footer>')
+        body = _fill(PRODUCT, self.page_bytes)
+        return (f'<!doctype html><html><head><title>{self.name}</title>{head}</head><body>'
+                f'<header><a href="/cart">Cart</a><a href="/checkout">Checkout</a></header>{extras}'
+                f'<main class="collection">{body}</main>{checkout}{footer}</body></html>')
+
+    def page(self, path: str):
+        """(status, content type, body) for a path below the store, or None for a 404."""
+        if path == '':
+            return 200, 'text/html', self.homepage()
+        if not self.shopify:
+            return None
+
+        if path == self.contact_path:
+            address = f'<p class="address">{self.address}</p>' if self.about_path is None else ''
+            return 200, 'text/html', (
+                f'<html><body><h1>Contact {self.name}</h1><a href="mailto:{self.email}">{self.email}</a>'
+                f'<a href="tel:{self.phone}">{self.phone}</a>{address}</body></html>')
+        if path == self.about_path:
+            return 200, 'text/html', (
+                f'<html><body><h1>About us</h1><div class="store-location"><p>{self.address}</p></div></body></html>')
+        if path == self.shipping_path:
+            delivery = 'We offer local delivery within 10 miles.' if self.local_delivery else 'We ship nationwide.'
+            return 200, 'text/html', f'<html><body><h1>Shipping policy</h1><p>{delivery}</p></body></html>'
+        if path == 'meta.json':
+            return 200, 'application/json', json.dumps({
+                'id': self.number, 'name': self.name, 'currency': 'USD',
+                'myshopify_domain': f'store-{self.number}.myshopify.com'})
+        if path == 'products.json':
+            return 200, 'application/json', json.dumps({'products': [{'handle': 'item-1', 'variants': []}]})
+        if path == 'cart.js':
+            return 200, 'application/json', json.dumps({'token': 'x', 'items': [], 'currency': 'USD'})
+        return None
+
+
+def _fill(template: str, size: int) -> str:
+    parts, total, i = [], 0, 0
+    while total < size:
+        part = template.format(i=i, price=10 + i % 90)
+        parts.append(part)
+        total += len(part)
+        i += 1
+    return ''.join(parts)
+
+
+class StorefrontServer:
+    """aiohttp app serving the synthetic stores."""
+
+    def __init__(self, args):
+        self.args = args
+        self.stores = {}
+        self.counts = collections.Counter()
+
+    def store(self, number: int) -> Store:
+        store = self.stores.get(number)
+        if store is None:
+            store = Store(self.args.seed, number, self.args.shopify_share, self.args.plus_share,
+                          self.args.page_kb)
+            self.stores[number] = store
+        return store
+
+    async def handle(self, request: web.Request) -> web.StreamResponse:
+        store_part, _, path = request.path.strip('/').partition('/')
+        if not (store_part.startswith('s') and store_part[1:].isdigit()) or int(store_part[1:]) >= self.args.stores:
+            return self._respond(web.Response(status=404, text='Unknown store'))
+        store = self.store(int(store_part[1:]))
+
+        # Latency and failures are fixed per path, so reruns see the same responses
+        rng = random.Random(f'{self.args.seed}:request:{request.path_qs}')
+        roll = rng.random()
+        if roll < self.args.hang_rate:
+            await asyncio.sleep(self.args.hang_seconds)
+        delay = self.args.latency_ms / 1000 * math.exp(self.args.latency_sigma * rng.gauss(0, 1))
+        await asyncio.sleep(delay)
+        if roll < self.args.hang_rate + self.args.error_rate:
+            return self._respond(web.Response(status=rng.choice((500, 503)), text='Server error'))
+
+        page = store.page(path)
+        if page is None:
+            return self._respond(web.Response(status=404, text='<html><body>Page not found</body></html>',
+                                              content_type='text/html'))
+        status, content_type, body = page
+        headers = {'X-ShopId': str(store.number), 'Powered-By': 'Shopify'} if store.shopify else {}
+        return self._respond(web.Response(status=status, text=body, content_type=content_type, headers=headers))
+
+    def _respond(self, response: web.Response) -> web.Response:
+        self.counts[response.status] += 1
+        return response
+
+    async def stats(self, request: web.Request) -> web.Response:
+        kinds = collections.Counter(store.kind for store in self.stores.values())
+        return web.json_response({'requests': sum(self.counts.values()),
+                                  'by_status': {str(status): n for status, n in sorted(self.counts.items())},
+                                  'stores_seen': dict(kinds)})
+
+    def app(self) -> web.Application:
+        app = web.Application()
+        app.router.add_get('/_stats', self.stats)
+        app.router.add_get('/{tail:.*}', self.handle)
+        return app
+
+
+def add_server_arguments(parser):
+    """Store mix, latency and failure options (shared with run_discover.py)."""
+    parser.add_argument('--stores', type=int, default=1000, help='Number of stores (default: 1000)')
+    parser.add_argument('--seed', type=int, default=1, help='Seed for store kinds, latencies and failures (default: 1)')
+    parser.add_argument('--shopify-share', type=float, default=0.5, help='Share of Shopify stores (default: 0.5)')
+    parser.add_argument('--plus-share', type=float, default=0.2, help='Share of Shopify stores that are Plus (default: 0.2)')
+    parser.add_argument('--page-kb', type=int, default=100, help='Average homepage size in KB (default: 100)')
+    parser.add_argument('--latency-ms', type=float, default=50.0, help='Median response latency (default: 50)')
+    parser.add_argument('--latency-sigma', type=float, default=0.5, help='Log-normal spread of latency; 0 = constant (default: 0.5)')
+    parser.add_argument('--error-rate', type=float, default=0.01, help='Share of 500/503 responses (default: 0.01)')
+    parser.add_argument('--hang-rate', type=float, default=0.0, help='Share of responses delayed by --hang-seconds (default: 0)')
+    parser.add_argument('--hang-seconds', type=float, default=60.0, help='Delay of hanging responses (default: 60)')
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Synthetic Shopify storefront server for benchmarks')
+    parser.add_argument('--host', type=str, default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8799)
+    add_server_arguments(parser)
+    args = parser.parse_args()
+
+    print(f"🏪 Serving {args.stores} synthetic stores on http://{args.host}:{args.port}/s<n> "
+          f"(seed {args.seed}, {args.latency_ms:.0f}ms median latency)", flush=True)
+    web.run_app(StorefrontServer(args).app(), host=args.host, port=args.port, print=None,
+                access_log=None)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,60 @@
+#!/usr/bin/env python3
+"""
+Build the prebuilt Shopify CIDR index (data/shopify_ips/cidr_index.json).
+
+Reads the block lists in utils.cidr_index.SHOPIFY_SOURCES, flattens them
+into the lookup tables and saves them, then checks a few known addresses and
+times lookups. Rerun after editing the block lists.
+
+Usage:
+    python scripts/build_cidr_index.py
+    python scripts/build_cidr_index.py --output /tmp/cidr_index.json
+"""
+
+import argparse
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'src'))
+from utils.cidr_index import CidrIndex, DEFAULT_INDEX_FILE, SHOPIFY_SOURCES, sample_hosts
+
+LOOKUPS = 1_000_000
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Build the prebuilt Shopify CIDR index')
+    parser.add_argument('--output', default=DEFAULT_INDEX_FILE, help=f'Index file (default: {DEFAULT_INDEX_FILE})')
+    args = parser.parse_args()
+
+    started = time.perf_counter()
+    index = CidrIndex.from_files(SHOPIFY_SOURCES)
+    build_time = time.perf_counter() - started
+    index.save(args.output)
+
+    started = time.perf_counter()
+    loaded = CidrIndex.load(args.output)
+    load_time = time.perf_counter() - started
+
+    print(f"✅ {index.describe()} -> {args.output}")
+    print(f"   built in {build_time * 1000:.1f}ms, loads in {load_time * 1000:.1f}ms")
+
+    # Every sampled address must map back to a block that contains it
+    addresses = [ip for network in loaded.networks() for ip in sample_hosts(network, every=64, limit=4)]
+    for ip in addresses:
+        label = loaded.lookup(ip)
+        if label is None or label != index.lookup(ip):
+            print(f"❌ {ip}: {label}")
+            sys.exit(1)
+
+    probes = random.choices(addresses + ['8.8.8.8', '1.1.1.1'], k=LOOKUPS)
+    started = time.perf_counter()
+    for ip in probes:
+        loaded.lookup(ip)
+    elapsed = time.perf_counter() - started
+    print(f"   {LOOKUPS:,} lookups in {elapsed:.2f}s ({elapsed / LOOKUPS * 1e6:.2f}µs each)")
+
+
+if __name__ == '__main__':
+    main()
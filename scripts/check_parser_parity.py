@@ -0,0 +1,128 @@
+#!/usr/bin/env python3
+"""
+Check that every HTML parser backend extracts the same fields.
+
+Runs the page-level extractors (homepage analysis, contact page, about page)
+over a built-in set of storefront snippets, plus any saved HTML files or
+directories given on the command line, once per installed backend. Prints
+any field that differs from the pure-Python baseline and the parse time per
+backend. Exits 1 if anything differs.
+
+Usage:
+    python scripts/check_parser_parity.py
+    python scripts/check_parser_parity.py saved_pages/ homepage.html
+"""
+
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'src'))
+from scrapers.extractors import analyze_homepage, parse_contact_page, parse_about_page
+from utils.html_parser import available_parsers, set_parser
+
+BASELINE = 'html.parser'
+
+EXTRACTORS = {
+    'homepage': analyze_homepage,
+    'contact': parse_contact_page,
+    'about': parse_about_page,
+}
+
+# Storefront snippets covering every extraction path, including messy markup
+SAMPLES = {
+    'footer_address': """<html><head><script src="https://cdn.shopify.com/s/x.js"></script></head>
+        <body><main>Shop now</main><footer><a href="mailto:hello@store.com">Email us</a>
+        <a href="tel:+1-555-123-4567">Call</a><p class="address">123 Main St, Austin, TX 78701</p></footer></body></html>""",
+    'schema_org': """<html><head><script type="application/ld+json">
+        {"@type": "LocalBusiness", "telephone": "555-222-3333",
+         "address": {"streetAddress": "9 Elm Ave", "addressLocality": "Denver", "addressRegion": "CO",
+                     "postalCode": "80202", "addressCountry": "US"}}</script>
+        <script type="application/ld+json">not json</script><script type="application/ld+json"></script></head>
+        <body><footer>Questions? support@store.com</footer></body></html>""",
+    'schema_list': """<html><head><script type="application/ld+json">
+        [{"@type": "WebSite"}, {"@type": "Organization", "telephone": "(555) 444-5555"}]</script></head><body></body></html>""",
+    'plus_signals': """<html><head><script src="/assets/custom-theme.js"></script></head><body>
+        <a href="/cart">Cart</a><div data-currency="USD"></div><div data-currency="CAD"></div>
+        <p>Powered by Hydrogen. Wholesale accounts via Launchpad.</p><footer>Call 555.777.8888</footer></body></html>""",
+    'standard_checkout': """<html><body><form action="https://checkout.shopify.com/123"></form>
+        <footer><div class="footer-contact">Visit us<br>500 Market Street
+        San Francisco, CA 94105</div></footer></body></html>""",
+    'multiline_address': """<html><body><div class="store-location"><p>42 Harbor Road
+        Portland, ME 04101</p></div><address>PO Box 7, Bangor, ME 04401</address></body></html>""",
+    'city_only': """<html><body><p class="contact">Based in Brooklyn, NY 11201</p></body></html>""",
+    'unclosed_tags': """<html><body><div class="address"><p>77 Pine St, Seattle, WA 98101<p>
+        <a href="mailto:orders@pine.com">orders<footer><a href=tel:2065550100>tel</footer>""",
+    'entities_and_nbsp': """<html><body><footer>Caf&eacute; &amp; Co &middot; 8&nbsp;Rue St, Boston, MA 02108
+        &middot; info&#64;cafe.com</footer></body></html>""",
+    'no_contact': """<html><body><h1>Coming soon</h1></body></html>""",
+    'empty': "",
+}
+
+
+def load_corpus(paths):
+    corpus = dict(SAMPLES)
+    for path in paths:
+        files = [path]
+        if os.path.isdir(path):
+            files = [os.path.join(path, name) for name in sorted(os.listdir(path))
+                     if name.endswith(('.html', '.htm'))]
+        for file_path in files:
+            with open(file_path, encoding='utf-8', errors='replace') as f:
+                corpus[file_path] = f.read()
+    return corpus
+
+
+def run_backend(backend, corpus):
+    """Extract every page with one backend. Returns (results, seconds)."""
+    set_parser(backend)
+    results = {}
+    started = time.perf_counter()
+    for name, html in corpus.items():
+        for kind, extractor in EXTRACTORS.items():
+            results[(name, kind)] = extractor(html)
+    return results, time.perf_counter() - started
+
+
+def diff_fields(expected, actual, prefix=''):
+    """Yield (field, expected, actual) for every differing leaf value."""
+    if isinstance(expected, dict) and isinstance(actual, dict):
+        for key in sorted(set(expected) | set(actual)):
+            yield from diff_fields(expected.get(key), actual.get(key), f'{prefix}{key}.')
+    elif expected != actual:
+        yield prefix.rstrip('.'), expected, actual
+
+
+def main():
+    corpus = load_corpus(sys.argv[1:])
+    backends = available_parsers()
+    print(f"Parsers: {', '.join(backends)}; {len(corpus)} pages x {len(EXTRACTORS)} extractors\n")
+
+    baseline, baseline_time = run_backend(BASELINE, corpus)
+    print(f"  {BASELINE:12s} {baseline_time * 1000:8.1f}ms (baseline)")
+
+    mismatches = 0
+    for backend in backends:
+        if backend == BASELINE:
+            continue
+
+        results, elapsed = run_backend(backend, corpus)
+        differences = [
+            (page, kind, field, expected, actual)
+            for (page, kind), expected in baseline.items()
+            for field, expected, actual in diff_fields(expected, results[(page, kind)])
+        ]
+        mismatches += len(differences)
+
+        speedup = baseline_time / elapsed if elapsed else 0
+        status = '✅' if not differences else f'❌ {len(differences)} differences'
+        print(f"  {backend:12s} {elapsed * 1000:8.1f}ms ({speedup:.1f}x) {status}")
+
+        for page, kind, field, expected, actual in differences:
+            print(f"      {page} [{kind}] {field}: {BASELINE}={expected!r} {backend}={actual!r}")
+
+    sys.exit(1 if mismatches else 0)
+
+
+if __name__ == '__main__':
+    main()
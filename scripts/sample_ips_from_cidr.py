@@ -2,11 +2,16 @@
 """
 Sample IP addresses from CIDR blocks for Shopify discovery.
 Takes every Nth IP from each CIDR block to create a manageable sample.
+Blocks listed twice, or nested inside another listed block, are sampled once.
 """
 
 import ipaddress
+import os
 import sys
 
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'src'))
+from utils.cidr_index import CidrIndex, sample_hosts
+
 def sample_ips_from_cidr(cidr_block, sample_every=10, max_per_block=50):
     """
     Sample IPs from a CIDR block.
@@ -21,7 +26,6 @@ def sample_ips_from_cidr(cidr_block, sample_every=10, max_per_block=50):
     """
     try:
         network = ipaddress.IPv4Network(cidr_block, strict=False)
-        ips = []
 
         # For small blocks, sample more frequently
         total_ips = network.num_addresses
@@ -32,15 +36,7 @@ def sample_ips_from_cidr(cidr_block, sample_every=10, max_per_block=50):
         else:  # larger blocks
             sample_every = 20
 
-        count = 0
-        for i, ip in enumerate(network.hosts()):
-            if i % sample_every == 0:
-                ips.append(str(ip))
-                count += 1
-                if count >= max_per_block:
-                    break
-
-        return ips
+        return sample_hosts(network, every=sample_every, limit=max_per_block)
     except Exception as e:
         print(f"Error processing {cidr_block}: {e}", file=sys.stderr)
         return []
@@ -58,9 +54,13 @@ def main():
     cidr_count = 0
 
     with open(cidr_file, 'r') as f:
-        cidr_blocks = [line.strip() for line in f if line.strip()]
+        listed_blocks = [line.strip() for line in f if line.strip()]
+
+    # Index the blocks to drop duplicates and blocks nested in a larger listed one
+    index = CidrIndex((cidr, {}) for cidr in listed_blocks)
+    cidr_blocks = [str(network) for network in index.outermost_networks()]
 
-    print(f"Processing {len(cidr_blocks)} CIDR blocks...")
+    print(f"Processing {len(cidr_blocks)} CIDR blocks ({len(listed_blocks) - len(cidr_blocks)} duplicate or nested skipped)...")
 
     # Calculate how many IPs per block to reach target
     ips_per_block = max(1, target_count // len(cidr_blocks))
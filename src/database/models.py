@@ -64,6 +64,34 @@ class ShopifyStore(Base):
         return f"<ShopifyStore(domain='{self.domain}', company='{self.company_name}', plus={self.is_shopify_plus})>"
 
 
+class QuarantinedDomain(Base):
+    """Domain that blew its time budget and is scheduled in the slow lane."""
+
+    __tablename__ = 'quarantined_domains'
+
+    id = Column(Integer, primary_key=True)
+    domain = Column(String(255), unique=True, nullable=False, index=True)
+    reason = Column(String(50))  # e.g., 'detect_budget', 'scrape_budget'
+    quarantined_at = Column(DateTime, default=datetime.utcnow)
+
+    def __repr__(self):
+        return f"<QuarantinedDomain(domain='{self.domain}', reason='{self.reason}')>"
+
+
+class NegativeResult(Base):
+    """Domain that is not a (reachable) Shopify store, cached until `expires_at`."""
+
+    __tablename__ = 'negative_results'
+
+    domain = Column(String(255), primary_key=True)
+    reason = Column(String(20), nullable=False)  # 'not_shopify', 'dns', 'connection', 'timeout', ...
+    checked_at = Column(DateTime, default=datetime.utcnow)
+    expires_at = Column(DateTime, nullable=False, index=True)
+
+    def __repr__(self):
+        return f"<NegativeResult(domain='{self.domain}', reason='{self.reason}', expires={self.expires_at})>"
+
+
 def get_engine():
     """Get database engine."""
     database_url = os.getenv('DATABASE_URL', 'sqlite:///shopify_leads.db')
@@ -0,0 +1,37 @@
+"""Negative detection results: remember non-Shopify and unreachable domains for a while."""
+
+from datetime import datetime, timedelta
+from typing import Any, Dict, List, Set
+
+from database.models import NegativeResult
+
+
+# How long each kind of negative result stays valid
+NEGATIVE_TTLS = {
+    'not_shopify': timedelta(days=30),
+    'dns': timedelta(days=7),
+    'parked': timedelta(days=30),
+    'connection': timedelta(days=3),
+    'http_error': timedelta(days=3),
+    'error': timedelta(days=3),
+    'timeout': timedelta(days=1),
+}
+
+
+def classify_negative(metadata: Dict[str, Any]) -> str:
+    """Reason code for a negative detection, from the detector's metadata."""
+    if metadata.get('error_kind'):
+        return metadata['error_kind']
+    if metadata.get('error'):
+        return 'timeout' if metadata['error'] == 'timeout' else 'error'
+    return 'not_shopify'
+
+
+def find_negative_domains(session, domains: List[str], now: datetime = None) -> Set[str]:
+    """Which of `domains` have an unexpired negative result (one indexed lookup)."""
+    now = now or datetime.utcnow()
+    query = session.query(NegativeResult.domain).filter(
+        NegativeResult.domain.in_(domains),
+        NegativeResult.expires_at > now,
+    )
+    return set(domain for (domain,) in query)
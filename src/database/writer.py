@@ -0,0 +1,237 @@
+"""Background bulk writer for discovery results."""
+
+import asyncio
+import json
+import queue
+import threading
+import time
+from datetime import datetime
+from typing import Any, Dict, List
+
+from sqlalchemy import event, insert
+
+from database.models import get_engine, ShopifyStore, NegativeResult, QuarantinedDomain
+from database.negative_cache import NEGATIVE_TTLS, classify_negative
+
+
+# Queue sentinel telling the writer thread to flush and exit
+_STOP = object()
+
+# Columns refreshed when a store row already exists
+STORE_UPDATE_COLUMNS = [
+    'company_name', 'email', 'phone', 'street_address', 'city', 'state', 'zip_code',
+    'country', 'vertical', 'revenue_estimate', 'employees_estimate',
+    'is_shopify', 'is_shopify_plus', 'scraped_at', 'last_updated', 'raw_data',
+]
+
+
+def store_row(domain: str, is_plus: bool, scraped_data: Dict[str, Any],
+              store_data: Dict[str, Any]) -> Dict[str, Any]:
+    """Column values for a shopify_stores row (seed data takes precedence over scraped)."""
+    merged_data = {**scraped_data, **store_data}
+
+    return {
+        'domain': domain,
+        'company_name': merged_data.get('company_name'),
+        'email': merged_data.get('email'),
+        'phone': merged_data.get('phone'),
+        'street_address': merged_data.get('street_address'),
+        'city': merged_data.get('city'),
+        'state': merged_data.get('state'),
+        'zip_code': merged_data.get('zip_code'),
+        'country': merged_data.get('country'),
+        'vertical': merged_data.get('vertical'),
+        'revenue_estimate': merged_data.get('revenue_estimate'),
+        'employees_estimate': merged_data.get('employees_estimate'),
+        'is_shopify': True,
+        'is_shopify_plus': is_plus,
+        'scraped_at': datetime.utcnow(),
+        'raw_data': json.dumps(scraped_data, default=str),
+    }
+
+
+class StoreWriter:
+    """
+    Write discovery results from a dedicated thread in large transactions.
+
+    Producers hand over result dicts (the StreamingPipeline format):
+    Shopify stores (`is_shopify=True`), negatives (`is_shopify=False` plus
+    detector metadata) and quarantines (`quarantine=<reason>`). The thread
+    groups them into batches and writes each batch with bulk
+    insert-or-update statements in one transaction, so commits never run on
+    the network event loop.
+
+    The hand-over queue is bounded: when the writer falls behind, `put`
+    blocks and `put_async` waits, which slows the producers down instead of
+    buffering without limit.
+
+    With a `journal` (RunJournal), each committed store and negative is
+    also appended to it, so an interrupted run can be resumed.
+    """
+
+    def __init__(self, engine=None, batch_size: int = 500, flush_interval: float = 1.0,
+                 max_pending: int = 5000, negative_ttl_scale: float = 1.0, journal=None):
+        self.engine = engine or get_engine()
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.negative_ttl_scale = negative_ttl_scale
+        self.journal = journal
+        self._queue = queue.Queue(maxsize=max_pending)
+        self._thread = None
+
+        self.stats = {
+            'stores': 0,
+            'negatives': 0,
+            'quarantined': 0,
+            'transactions': 0,
+            'failed': 0,
+        }
+
+        if self.engine.dialect.name == 'sqlite':
+            event.listen(self.engine, 'connect', _sqlite_pragmas)
+
+    def start(self) -> 'StoreWriter':
+        self._thread = threading.Thread(target=self._run, name='store-writer', daemon=True)
+        self._thread.start()
+        return self
+
+    def put(self, result: Dict[str, Any]):
+        """Queue one result (blocks while the writer is behind)."""
+        self._queue.put(result)
+
+    async def put_async(self, result: Dict[str, Any]):
+        """Queue one result from async code without blocking the event loop."""
+        try:
+            self._queue.put_nowait(result)
+        except queue.Full:
+            # Backpressure: wait in a worker thread until the writer catches up
+            await asyncio.get_running_loop().run_in_executor(None, self._queue.put, result)
+
+    async def put_many_async(self, results: List[Dict[str, Any]]):
+        for result in results:
+            await self.put_async(result)
+
+    def close(self):
+        """Flush everything queued and stop the writer thread."""
+        if self._thread is None:
+            return
+        self._queue.put(_STOP)
+        self._thread.join()
+        self._thread = None
+
+    async def close_async(self):
+        await asyncio.get_running_loop().run_in_executor(None, self.close)
+
+    def summary(self) -> str:
+        return (f"{self.stats['stores']} stores, {self.stats['negatives']} negatives, "
+                f"{self.stats['quarantined']} quarantined in {self.stats['transactions']} transactions"
+                + (f" ({self.stats['failed']} failed)" if self.stats['failed'] else ""))
+
+    def _run(self):
+        pending = []
+        deadline = time.monotonic() + self.flush_interval
+
+        while True:
+            try:
+                item = self._queue.get(timeout=max(deadline - time.monotonic(), 0.01))
+            except queue.Empty:
+                item = None
+
+            if item is not None and item is not _STOP:
+                pending.append(item)
+
+            if pending and (item is _STOP or len(pending) >= self.batch_size
+                            or time.monotonic() >= deadline):
+                self._flush(pending)
+                pending = []
+
+            if time.monotonic() >= deadline:
+                deadline = time.monotonic() + self.flush_interval
+
+            if item is _STOP:
+                break
+
+    def _flush(self, results: List[Dict[str, Any]]):
+        """Write one batch in a single transaction."""
+        stores = {}
+        negatives = {}
+        quarantines = {}
+        now = datetime.utcnow()
+
+        for result in results:
+            domain = result['domain']
+            if result.get('quarantine'):
+                quarantines[domain] = {'domain': domain, 'reason': result['quarantine'], 'quarantined_at': now}
+            elif result['is_shopify']:
+                stores[domain] = store_row(domain, result['is_plus'],
+                                           result['scraped_data'], result['store_data'])
+            else:
+                reason = classify_negative(result['metadata'])
+                ttl = NEGATIVE_TTLS.get(reason, NEGATIVE_TTLS['error']) * self.negative_ttl_scale
+                negatives[domain] = {'domain': domain, 'reason': reason,
+                                     'checked_at': now, 'expires_at': now + ttl}
+
+        try:
+            with self.engine.begin() as conn:
+                if stores:
+                    conn.execute(self._upsert(ShopifyStore.__table__, ['domain'], STORE_UPDATE_COLUMNS),
+                                 list(stores.values()))
+                if negatives:
+                    conn.execute(self._upsert(NegativeResult.__table__, ['domain'],
+                                              ['reason', 'checked_at', 'expires_at']),
+                                 list(negatives.values()))
+                if quarantines:
+                    conn.execute(self._upsert(QuarantinedDomain.__table__, ['domain'], ['reason']),
+                                 list(quarantines.values()))
+
+            self.stats['stores'] += len(stores)
+            self.stats['negatives'] += len(negatives)
+            self.stats['quarantined'] += len(quarantines)
+            self.stats['transactions'] += 1
+
+        except Exception as e:
+            print(f"  ⚠️  Writer error ({len(results)} results dropped): {e}")
+            self.stats['failed'] += len(results)
+            return
+
+        if self.journal:
+            # Per-domain latency from the pipeline, kept in the journal for benchmarks
+            elapsed = {result['domain']: result['elapsed'] for result in results
+                       if result.get('elapsed') is not None}
+            entries = ([{'domain': domain, 'state': 'shopify'} for domain in stores]
+                       + [{'domain': domain, 'state': row['reason']} for domain, row in negatives.items()])
+            for entry in entries:
+                if entry['domain'] in elapsed:
+                    entry['elapsed'] = elapsed[entry['domain']]
+            try:
+                self.journal.record(entries)
+            except OSError as e:
+                print(f"  ⚠️  Journal error: {e}")
+
+    def _upsert(self, table, key_columns: List[str], update_columns: List[str]):
+        """Dialect-appropriate bulk insert-or-update statement."""
+        dialect = self.engine.dialect.name
+
+        if dialect in ('sqlite', 'postgresql'):
+            if dialect == 'sqlite':
+                from sqlalchemy.dialects.sqlite import insert as dialect_insert
+            else:
+                from sqlalchemy.dialects.postgresql import insert as dialect_insert
+
+            stmt = dialect_insert(table)
+            return stmt.on_conflict_do_update(
+                index_elements=key_columns,
+                set_={column: stmt.excluded[column] for column in update_columns},
+            )
+
+        # Other databases: plain bulk insert
+        return insert(table)
+
+
+def _sqlite_pragmas(dbapi_connection, connection_record):
+    # WAL lets the pipeline keep reading (dedup) while the writer commits
+    cursor = dbapi_connection.cursor()
+    cursor.execute('PRAGMA journal_mode=WAL')
+    cursor.execute('PRAGMA synchronous=NORMAL')
+    cursor.execute('PRAGMA busy_timeout=30000')
+    cursor.close()
@@ -2,121 +2,181 @@
 
 import aiohttp
 import asyncio
-from typing import Tuple, Dict, Any
-import re
-from bs4 import BeautifulSoup
+from typing import Tuple, Dict, Any, Optional
+import socket
+import sys
+import os
+
+# Add parent directory to path for imports
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from pipeline.page_context import PageContext
+from detectors.signals import default_engine
+from detectors.json_endpoints import (DEFINITIVE_STATUSES, JSON_ENDPOINTS, JsonScan, read_endpoint,
+                                      shopify_header)
+
+# 'html': signals in the homepage; 'json': storefront JSON endpoints first (see detectors.json_endpoints)
+DETECTION_MODES = ['html', 'json']
 
 
 class AsyncShopifyDetector:
     """Async detector for Shopify and Shopify Plus stores."""
 
-    def __init__(self, timeout: int = 10, max_concurrent: int = 20):
+    def __init__(self, timeout: int = 10, max_concurrent: int = 20, limiter=None,
+                 max_bytes: int = 0, stop_on_shopify: bool = False, mode: str = 'html',
+                 cache=None, archive=None):
+        if mode not in DETECTION_MODES:
+            raise ValueError(f"Unknown detection mode {mode!r} (choose from {', '.join(DETECTION_MODES)})")
         self.timeout = aiohttp.ClientTimeout(total=timeout)
         self.max_concurrent = max_concurrent
-        self.semaphore = asyncio.Semaphore(max_concurrent)
+        # Any async context manager works here, e.g. pipeline.concurrency.AdaptiveLimiter
+        self.limiter = limiter or asyncio.Semaphore(max_concurrent)
+        # Streaming detection: stop reading an undecided homepage after max_bytes
+        # (0 = read it whole). stop_on_shopify also stops at the first Shopify
+        # signal, for callers that won't scrape the page afterwards.
+        self.max_bytes = max_bytes
+        self.stop_on_shopify = stop_on_shopify
+        self.mode = mode
+        # Read-through response cache (pipeline.response_cache.ResponseCache) for the contexts it creates
+        self.cache = cache
+        # WARC archive (pipeline.warc.WarcWriter) for pages downloaded by the contexts it creates
+        self.archive = archive
         self.headers = {
             'User-Agent': 'Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36'
         }
 
-    async def detect(self, session: aiohttp.ClientSession, domain: str) -> Tuple[bool, bool, Dict[str, Any]]:
+    async def detect(self, session: aiohttp.ClientSession, domain: str,
+                     context: Optional[PageContext] = None,
+                     known_shopify: Optional[str] = None) -> Tuple[bool, bool, Dict[str, Any]]:
         """
         Detect if site is Shopify and if it's Plus.
 
+        Pass the store's PageContext to share the fetched homepage with the
+        scraper; without one the homepage is only cached for this call.
+
+        `known_shopify` is evidence that the domain is a Shopify store from
+        outside the page (e.g. 'cname:shops.myshopify.com' from the DNS
+        pre-screen). The store then counts as Shopify without HTML signals
+        and the homepage is only checked for Plus.
+
+        In 'json' mode Shopify is confirmed from /meta.json and friends, which
+        also report the shop name, currency and myshopify.com domain. The
+        homepage is only fetched for the Plus check (the scraper reuses it)
+        or when the endpoints are inconclusive (blocked, erroring).
+
         Returns:
             (is_shopify, is_plus, metadata)
         """
-        async with self.semaphore:
-            if not domain.startswith('http'):
-                domain = f'https://{domain}'
+        async with self.limiter:
+            if context is None:
+                context = PageContext(session, domain, cache=self.cache, archive=self.archive)
 
             metadata = {}
             is_shopify = False
             is_plus = False
 
             try:
-                # Fetch homepage
-                async with session.get(domain, timeout=self.timeout, allow_redirects=True) as response:
-                    html = await response.text()
-
-                    # Check for Shopify indicators
-                    shopify_indicators = [
-                        'Shopify.theme',
-                        'shopify-analytics',
-                        'cdn.shopify.com',
-                        'monorail-edge.shopifysvc.com',
-                        '/apps/shopify'
-                    ]
-
-                    for indicator in shopify_indicators:
-                        if indicator in html:
-                            is_shopify = True
-                            metadata['detection_method'] = indicator
-                            break
-
-                    # If Shopify, check for Plus indicators
-                    if is_shopify:
-                        plus_indicators = self._check_plus_indicators(domain, html)
-                        is_plus = plus_indicators['is_plus']
-                        metadata.update(plus_indicators)
+                if self.mode == 'json':
+                    is_shopify, is_plus = await self._detect_json(context, known_shopify, metadata)
+                else:
+                    is_shopify, is_plus = await self._detect_html(context, known_shopify, metadata)
 
             except asyncio.TimeoutError:
                 metadata['error'] = 'timeout'
+                metadata['error_kind'] = 'timeout'
+            except aiohttp.ClientConnectorError as e:
+                metadata['error'] = str(e)
+                metadata['error_kind'] = 'dns' if isinstance(e.os_error, socket.gaierror) else 'connection'
             except aiohttp.ClientError as e:
                 metadata['error'] = str(e)
+                metadata['error_kind'] = 'http_error'
             except Exception as e:
                 metadata['error'] = str(e)
+                metadata['error_kind'] = 'error'
 
             return is_shopify, is_plus, metadata
 
-    def _check_plus_indicators(self, domain: str, html: str) -> Dict[str, Any]:
-        """Check for Shopify Plus specific indicators."""
-        indicators = {
-            'is_plus': False,
-            'plus_signals': []
-        }
-
-        # 1. Custom checkout domain (Plus feature)
-        if 'checkout.shopify.com' in html:
-            indicators['plus_signals'].append('standard_checkout')
+    async def _detect_html(self, context: PageContext, known_shopify: Optional[str],
+                           metadata: Dict[str, Any]) -> Tuple[bool, bool]:
+        """Shopify and Plus from the homepage's signals."""
+        # Fetch homepage, streamed if only a prefix may be needed
+        if self.max_bytes and not known_shopify:
+            scan = default_engine().stream(self.max_bytes, self.stop_on_shopify)
+            page = await context.peek(context.url(), scan.feed, timeout=self.timeout)
         else:
-            # Check if checkout is on custom domain
-            soup = BeautifulSoup(html, 'html.parser')
-            cart_links = soup.find_all('a', href=re.compile(r'/cart|/checkout'))
-            if cart_links:
-                checkout_url = cart_links[0].get('href', '')
-                if checkout_url and 'checkout.shopify.com' not in checkout_url:
-                    indicators['plus_signals'].append('custom_checkout_domain')
-                    indicators['is_plus'] = True
-
-        # 2. Headless/custom storefront (Plus feature)
-        if 'storefront-renderer' in html or 'hydrogen' in html.lower():
-            indicators['plus_signals'].append('headless_storefront')
-            indicators['is_plus'] = True
-
-        # 3. Advanced customization indicators
-        if re.search(r'<script[^>]*src=["\'][^"\']*custom[^"\']*\.js', html):
-            indicators['plus_signals'].append('custom_javascript')
-
-        # 4. Plus-only apps
-        plus_apps = [
-            'launchpad',
-            'flow.shopify.com',
-            'wholesale',
-        ]
-        for app in plus_apps:
-            if app in html.lower():
-                indicators['plus_signals'].append(f'plus_app_{app}')
-                indicators['is_plus'] = True
-
-        # 5. Multi-currency (enterprise feature)
-        if re.search(r'data-currency.*data-currency', html, re.DOTALL):
-            indicators['plus_signals'].append('multi_currency')
-
-        # If we have 2+ Plus signals, mark as Plus
-        if len(indicators['plus_signals']) >= 2:
-            indicators['is_plus'] = True
-
-        return indicators
+            scan = None
+            page = await context.homepage(timeout=self.timeout)
+
+        # Shopify and Plus signals in one compiled scan (see detectors/signals.json)
+        signals = default_engine().evaluate(page.text, assume_shopify=bool(known_shopify))
+        is_shopify = signals.pop('is_shopify')
+        is_plus = False
+        if known_shopify:
+            signals.setdefault('detection_method', 'dns')
+            signals['dns'] = known_shopify
+        if is_shopify:
+            is_plus = signals['is_plus']
+            metadata.update(signals)
+        elif page.status != 200:
+            # An error or block page says nothing about the platform: keep it a short-lived negative
+            metadata['error'] = f'HTTP {page.status}'
+            metadata['error_kind'] = 'http_error'
+        elif scan is not None and scan.other:
+            metadata['platform'] = scan.other
+
+        if page.truncated:
+            metadata['bytes_read'] = len(page.body)
+
+        return is_shopify, is_plus
+
+    async def _detect_json(self, context: PageContext, known_shopify: Optional[str],
+                           metadata: Dict[str, Any]) -> Tuple[bool, bool]:
+        """Shopify from the JSON endpoints, then Plus from the homepage."""
+        shop = None
+        method = None
+        settled = False
+        bytes_read = 0
+
+        for path in JSON_ENDPOINTS:
+            page = await context.peek(context.url(path), JsonScan(), timeout=self.timeout)
+            bytes_read += len(page.body)
+            fields = read_endpoint(path, page)
+            header = shopify_header(page.headers)
+
+            if fields is not None or header:
+                shop = {**(fields or {}), **(shop or {})}
+                method = method or (f"json:{path.split('?')[0]}" if fields is not None else f'header:{header}')
+                # The currency comes with /meta.json or /cart.js; nothing more to learn
+                if 'currency' in shop:
+                    break
+            elif shop is None and page.status in DEFINITIVE_STATUSES:
+                # Answered, and not by Shopify
+                settled = True
+                break
+
+        metadata['json_bytes'] = bytes_read
+
+        if shop is None and not known_shopify:
+            if settled:
+                return False, False
+            # Blocked or erroring endpoints: the homepage decides
+            return await self._detect_html(context, known_shopify, metadata)
+
+        metadata.update(shop or {})
+        metadata['detection_method'] = method or 'dns'
+        if known_shopify:
+            metadata['dns'] = known_shopify
+
+        # Plus is only visible in the HTML; the scraper reuses this homepage
+        try:
+            page = await context.homepage(timeout=self.timeout)
+        except (asyncio.TimeoutError, aiohttp.ClientError) as e:
+            metadata['plus_error'] = str(e) or type(e).__name__
+            return True, False
+
+        signals = default_engine().evaluate(page.text, assume_shopify=True)
+        metadata['is_plus'] = signals['is_plus']
+        metadata['plus_signals'] = signals['plus_signals']
+        return True, signals['is_plus']
 
 
 async def detect_batch(domains: list, max_concurrent: int = 20) -> Dict[str, Tuple[bool, bool, Dict]]:
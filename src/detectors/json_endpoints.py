@@ -0,0 +1,100 @@
+"""
+Shopify detection from storefront JSON endpoints.
+
+Every Shopify storefront serves small JSON documents next to its HTML:
+
+    /meta.json               shop name, currency, myshopify.com domain (~1KB)
+    /products.json?limit=1   {"products": [...]} with one product
+    /cart.js                 the visitor's (empty) cart, with the currency
+
+Responses from Shopify also carry Shopify headers (X-ShopId, ...), whatever
+the status. Reading these instead of a 100KB+ homepage settles most domains
+for a few KB: a storefront answers with its shop details, anything else
+answers with a 404 or an HTML page, whose body is abandoned after the
+first chunk.
+"""
+
+import json
+from typing import Any, Dict, Mapping, Optional
+
+# Probed in order until one of them answers with the currency
+JSON_ENDPOINTS = ['/meta.json', '/products.json?limit=1', '/cart.js']
+
+# Stop reading an endpoint body after this many bytes
+JSON_MAX_BYTES = 64 * 1024
+
+# Response headers only Shopify's edge sets
+SHOPIFY_HEADERS = ('x-shopid', 'x-shopify-stage', 'x-sorting-hat-shopid', 'x-shardid')
+
+# Statuses that settle a domain as not Shopify when no Shopify marker came with them
+# (anything else, e.g. 403 from a bot wall or 5xx, is inconclusive)
+DEFINITIVE_STATUSES = {200, 404, 410}
+
+
+class JsonScan:
+    """PageContext.peek scan: stop at the first sign a body is not JSON, or at `max_bytes`."""
+
+    def __init__(self, max_bytes: int = JSON_MAX_BYTES):
+        self.max_bytes = max_bytes
+        self._started = False
+
+    def __call__(self, text: str, size: int) -> bool:
+        if not self._started:
+            stripped = text.lstrip()
+            if stripped:
+                self._started = True
+                if stripped[0] not in '{[':
+                    return True
+        return size >= self.max_bytes
+
+
+def shopify_header(headers: Mapping[str, str]) -> Optional[str]:
+    """Name of the first Shopify marker header present, or None."""
+    lowered = {name.lower(): value for name, value in headers.items()}
+    for name in SHOPIFY_HEADERS:
+        if name in lowered:
+            return name
+    if 'shopify' in lowered.get('powered-by', '').lower():
+        return 'powered-by'
+    return None
+
+
+def read_endpoint(path: str, page) -> Optional[Dict[str, Any]]:
+    """
+    Shop fields from a JSON endpoint response, or None if it is not Shopify's.
+
+    Returns a dict with whichever of 'shop_name', 'currency' and
+    'myshopify_domain' the endpoint reports (empty for /products.json).
+    """
+    if not page.ok or page.truncated:
+        return None
+    try:
+        data = json.loads(page.text)
+    except ValueError:
+        return None
+    if not isinstance(data, dict):
+        return None
+
+    if path.startswith('/meta.json'):
+        if not str(data.get('myshopify_domain', '')).endswith('.myshopify.com'):
+            return None
+        fields = {
+            'shop_name': data.get('name'),
+            'currency': data.get('currency'),
+            'myshopify_domain': data.get('myshopify_domain'),
+        }
+    elif path.startswith('/products.json'):
+        products = data.get('products')
+        if not isinstance(products, list) or any(
+                not isinstance(product, dict) or 'handle' not in product or 'variants' not in product
+                for product in products):
+            return None
+        fields = {}
+    elif path.startswith('/cart.js'):
+        if not {'token', 'items', 'currency'} <= data.keys():
+            return None
+        fields = {'currency': data.get('currency')}
+    else:
+        return None
+
+    return {key: value for key, value in fields.items() if value}
@@ -2,8 +2,12 @@
 
 import requests
 from typing import Tuple, Dict, Any
-import re
-from bs4 import BeautifulSoup
+import os
+import sys
+
+# Add parent directory to path for imports
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from detectors.signals import default_engine
 
 
 class ShopifyDetector:
@@ -33,86 +37,19 @@ class ShopifyDetector:
         try:
             # Fetch homepage
             response = self.session.get(domain, timeout=self.timeout, allow_redirects=True)
-            html = response.text
-
-            # Check for Shopify indicators
-            shopify_indicators = [
-                'Shopify.theme',
-                'shopify-analytics',
-                'cdn.shopify.com',
-                'monorail-edge.shopifysvc.com',
-                '/apps/shopify'
-            ]
-
-            for indicator in shopify_indicators:
-                if indicator in html:
-                    is_shopify = True
-                    metadata['detection_method'] = indicator
-                    break
-
-            # If Shopify, check for Plus indicators
+
+            # Shopify and Plus signals in one compiled scan (see detectors/signals.json)
+            signals = default_engine().evaluate(response.text)
+            is_shopify = signals.pop('is_shopify')
             if is_shopify:
-                plus_indicators = self._check_plus_indicators(domain, html, response)
-                is_plus = plus_indicators['is_plus']
-                metadata.update(plus_indicators)
+                is_plus = signals['is_plus']
+                metadata.update(signals)
 
         except Exception as e:
             metadata['error'] = str(e)
 
         return is_shopify, is_plus, metadata
 
-    def _check_plus_indicators(self, domain: str, html: str, response) -> Dict[str, Any]:
-        """Check for Shopify Plus specific indicators."""
-        indicators = {
-            'is_plus': False,
-            'plus_signals': []
-        }
-
-        # 1. Custom checkout domain (Plus feature)
-        # Plus stores often use checkout.shopify.com or custom domains
-        if 'checkout.shopify.com' in html:
-            indicators['plus_signals'].append('standard_checkout')
-        else:
-            # Check if checkout is on custom domain
-            soup = BeautifulSoup(html, 'html.parser')
-            cart_links = soup.find_all('a', href=re.compile(r'/cart|/checkout'))
-            if cart_links:
-                checkout_url = cart_links[0].get('href', '')
-                if checkout_url and not 'checkout.shopify.com' in checkout_url:
-                    indicators['plus_signals'].append('custom_checkout_domain')
-                    indicators['is_plus'] = True
-
-        # 2. Headless/custom storefront (Plus feature)
-        if 'storefront-renderer' in html or 'hydrogen' in html.lower():
-            indicators['plus_signals'].append('headless_storefront')
-            indicators['is_plus'] = True
-
-        # 3. Advanced customization indicators
-        if re.search(r'<script[^>]*src=["\'][^"\']*custom[^"\']*\.js', html):
-            indicators['plus_signals'].append('custom_javascript')
-
-        # 4. Plus-only apps (check for common Plus apps)
-        plus_apps = [
-            'launchpad',  # Shopify Plus app
-            'flow.shopify.com',  # Shopify Flow (Plus only)
-            'wholesale',  # Wholesale features
-        ]
-        for app in plus_apps:
-            if app in html.lower():
-                indicators['plus_signals'].append(f'plus_app_{app}')
-                indicators['is_plus'] = True
-
-        # 5. High traffic/complexity indicators
-        # Check for multiple languages, currencies (enterprise features)
-        if re.search(r'data-currency.*data-currency', html, re.DOTALL):
-            indicators['plus_signals'].append('multi_currency')
-
-        # If we have 2+ Plus signals, mark as Plus
-        if len(indicators['plus_signals']) >= 2:
-            indicators['is_plus'] = True
-
-        return indicators
-
 
 if __name__ == '__main__':
     # Test
@@ -0,0 +1,239 @@
+"""
+Compiled Shopify and Shopify Plus signal matching.
+
+Signals are data (detectors/signals.json), not code. Each signal names
+either literals or a regex that mark it, its group and how a hit counts.
+Groups are 'shopify', 'plus', and 'other' (markers of another platform, which
+let a streamed read stop early on a negative; see StreamScan).
+
+    literals     case-sensitive substrings
+    ci_literals  case-insensitive substrings
+    regex        pattern searched only when one of its `requires` literals
+                 was found (`ignore_case` for a case-insensitive pattern)
+    min_count    occurrences needed (default 1)
+    decisive     one hit alone marks the store as Plus
+    unless       suppressed when the named signal also hit
+
+The engine compiles the table once. Each literal is one str.find over the
+page (a C substring search that stops at the first hit), with at most one
+lower-cased copy shared by every case-insensitive literal, regexes only run
+when one of their anchors is present, and Plus signals are only looked for
+once a Shopify signal has matched.
+"""
+
+import json
+import os
+import re
+from typing import Any, Dict, List, Optional, Tuple
+
+SIGNALS_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'signals.json')
+GROUPS = ('shopify', 'plus', 'other')
+
+# End of the document head: Shopify themes load their assets before it
+HEAD_END = re.compile(r'</head\s*>|<body[\s>]', re.I)
+
+
+class Signal:
+    """One compiled row of the signal table."""
+
+    def __init__(self, spec: Dict[str, Any]):
+        self.name = spec['name']
+        self.group = spec.get('group', 'plus')
+        if self.group not in GROUPS:
+            raise ValueError(f"Signal {self.name!r}: unknown group {self.group!r}")
+
+        self.literals = list(spec.get('literals', []))
+        self.ci_literals = [literal.lower() for literal in spec.get('ci_literals', [])]
+        self.requires = list(spec.get('requires', []))
+        self.min_count = int(spec.get('min_count', 1))
+        self.decisive = bool(spec.get('decisive', False))
+        self.unless = spec.get('unless')
+
+        self.regex = None
+        if spec.get('regex'):
+            self.regex = re.compile(spec['regex'], re.I if spec.get('ignore_case') else 0)
+
+        if self.regex is not None:
+            if self.literals or self.ci_literals:
+                raise ValueError(f"Signal {self.name!r}: use either literals or a regex, not both")
+            if not self.requires:
+                raise ValueError(f"Signal {self.name!r}: a regex needs `requires` anchor literals")
+        elif not (self.literals or self.ci_literals):
+            raise ValueError(f"Signal {self.name!r} has no literals or regex")
+
+        # (literal, case_sensitive) -> occurrences this signal needs
+        if self.regex is not None:
+            case_sensitive = not self.regex.flags & re.I
+            self.keys = {(anchor, case_sensitive): 1 for anchor in self.requires}
+        else:
+            self.keys = {(literal, True): self.min_count for literal in self.literals}
+            self.keys.update({(literal, False): self.min_count for literal in self.ci_literals})
+
+    def hit(self, text: str, counts: Dict[tuple, int]) -> bool:
+        """Whether this signal is present, given the page's literal counts."""
+        if self.regex is not None:
+            return any(counts[key] for key in self.keys) and bool(self.regex.search(text))
+        return any(counts[key] >= self.min_count for key in self.keys)
+
+
+class SignalEngine:
+    """
+    Evaluate a compiled signal table against a page.
+
+    `evaluate(html)` returns the same shape the detectors have always
+    reported: is_shopify, detection_method (the first Shopify signal in table
+    order), is_plus and plus_signals (in table order).
+    """
+
+    def __init__(self, table: Dict[str, Any]):
+        self.plus_threshold = int(table.get('plus_threshold', 2))
+        self.signals = [Signal(spec) for spec in table['signals']]
+
+        names = {signal.name for signal in self.signals}
+        for signal in self.signals:
+            if signal.unless and signal.unless not in names:
+                raise ValueError(f"Signal {signal.name!r}: unless refers to unknown signal {signal.unless!r}")
+
+        self.groups = {
+            group: [signal for signal in self.signals if signal.group == group]
+            for group in GROUPS
+        }
+        # Literals each group scans for, with the most occurrences any signal needs
+        self.needed = {group: self._needed(signals) for group, signals in self.groups.items()}
+
+    @staticmethod
+    def _needed(signals: List[Signal]) -> Dict[tuple, int]:
+        needed = {}
+        for signal in signals:
+            for key, count in signal.keys.items():
+                needed[key] = max(needed.get(key, 0), count)
+        return needed
+
+    @classmethod
+    def load(cls, path: Optional[str] = None) -> 'SignalEngine':
+        with open(path or SIGNALS_FILE, encoding='utf-8') as f:
+            return cls(json.load(f))
+
+    def describe(self) -> str:
+        literals = sum(len(needed) for needed in self.needed.values())
+        return f'{len(self.signals)} signals, {literals} literals'
+
+    def _match(self, group: str, text: str, lower: Optional[str]) -> Tuple[List[Signal], Optional[str]]:
+        """Signals of `group` present in `text`, in table order, and the lower-cased text if made."""
+        counts = {}
+        for (literal, case_sensitive), needed in self.needed[group].items():
+            if not case_sensitive and lower is None:
+                lower = text.lower()
+            counts[(literal, case_sensitive)] = _find_count(text if case_sensitive else lower, literal, needed)
+        return [signal for signal in self.groups[group] if signal.hit(text, counts)], lower
+
+    def stream(self, max_bytes: int, stop_on_shopify: bool = False) -> 'StreamScan':
+        """A scanner deciding when a streamed homepage has been read far enough."""
+        return StreamScan(self, max_bytes, stop_on_shopify)
+
+    def match(self, text: str) -> List[str]:
+        """Names of every signal present in `text`, in table order."""
+        shopify, lower = self._match('shopify', text, None)
+        plus, _ = self._match('plus', text, lower)
+        hits = {signal.name for signal in shopify + plus}
+        return [signal.name for signal in self.signals if signal.name in hits]
+
+    def evaluate(self, text: str, lower: Optional[str] = None, assume_shopify: bool = False) -> Dict[str, Any]:
+        """
+        Shopify and Plus verdict for a page.
+
+        Plus signals are only scanned for on Shopify pages, or on any page
+        with `assume_shopify` (Shopify already established, e.g. by DNS). Pass
+        `lower` (the page lower-cased) to reuse an existing copy.
+        """
+        result = {'is_shopify': False, 'is_plus': False, 'plus_signals': []}
+
+        shopify, lower = self._match('shopify', text, lower)
+        if not shopify and not assume_shopify:
+            return result
+
+        plus, _ = self._match('plus', text, lower)
+        names = {signal.name for signal in plus}
+        plus = [signal for signal in plus if signal.unless not in names]
+
+        result['is_shopify'] = True
+        if shopify:
+            result['detection_method'] = shopify[0].name
+        result['plus_signals'] = [signal.name for signal in plus]
+        result['is_plus'] = (any(signal.decisive for signal in plus) or
+                             len(plus) >= self.plus_threshold)
+        return result
+
+
+class StreamScan:
+    """
+    Decide, chunk by chunk, when enough of a streamed page has been read.
+
+    Feed each decoded chunk with the bytes read so far; `feed` returns True
+    to stop reading. Reading stops on a decisive negative (another
+    platform's marker, once the whole <head> has been read without a
+    Shopify signal), on a Shopify signal if `stop_on_shopify`, or at
+    `max_bytes` while still undecided. A marker inside the head alone (a
+    Wix image preconnect, an embedded blog's theme CSS) doesn't stop the
+    read before the head has had its chance to show Shopify. Once a
+    Shopify signal is seen without `stop_on_shopify`, the rest of the page
+    is read so the Plus verdict and the scraper see all of it.
+
+    Chunks are scanned with a small overlap so literals split across chunk
+    boundaries are still found. The verdict itself always comes from
+    `SignalEngine.evaluate` over everything that was read.
+    """
+
+    def __init__(self, engine: SignalEngine, max_bytes: int, stop_on_shopify: bool = False):
+        self.engine = engine
+        self.max_bytes = max_bytes
+        self.stop_on_shopify = stop_on_shopify
+        self.shopify: Optional[str] = None
+        self.other: Optional[str] = None
+        self.past_head = False
+        self._tail = ''
+        self._overlap = max([len(literal) for group in ('shopify', 'other')
+                             for literal, _ in engine.needed[group]] or [1]) - 1
+
+    def feed(self, text: str, size: int) -> bool:
+        window = self._tail + text
+        self._tail = window[-self._overlap:] if self._overlap else ''
+
+        if self.shopify is None:
+            shopify, lower = self.engine._match('shopify', window, None)
+            if shopify:
+                self.shopify = shopify[0].name
+            else:
+                if self.other is None:
+                    other, _ = self.engine._match('other', window, lower)
+                    if other:
+                        self.other = other[0].name
+                if not self.past_head:
+                    self.past_head = HEAD_END.search(window) is not None
+
+        if self.shopify is not None:
+            return self.stop_on_shopify
+        return (self.other is not None and self.past_head) or size >= self.max_bytes
+
+
+def _find_count(haystack: str, needle: str, limit: int) -> int:
+    """Non-overlapping occurrences of `needle`, stopping at `limit`."""
+    count = 0
+    position = haystack.find(needle)
+    while position != -1:
+        count += 1
+        if count >= limit:
+            break
+        position = haystack.find(needle, position + len(needle))
+    return count
+
+
+_default_engine: Optional[SignalEngine] = None
+
+
+def default_engine() -> SignalEngine:
+    """The engine for detectors/signals.json, compiled once per process."""
+    global _default_engine
+    if _default_engine is None:
+        _default_engine = SignalEngine.load()
+    return _default_engine
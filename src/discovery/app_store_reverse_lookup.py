@@ -17,6 +17,12 @@ from bs4 import BeautifulSoup
 import re
 import time
 from typing import Set, Dict
+import os
+import sys
+
+# Add parent directory to path for imports
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from utils.html_parser import make_soup
 
 
 class AppStoreReverseLookup:
@@ -78,7 +84,7 @@ class AppStoreReverseLookup:
                 response = requests.get(app_url, headers=self.headers, timeout=15)
 
                 if response.status_code == 200:
-                    soup = BeautifulSoup(response.content, 'html.parser')
+                    soup = make_soup(response.content)
 
                     # Extract stores from app page
                     stores = self._extract_stores_from_app_page(soup, app_url)
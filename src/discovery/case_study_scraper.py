@@ -5,13 +5,18 @@ This is a more targeted approach than trying to scrape partner directories.
 """
 
 import requests
-from bs4 import BeautifulSoup
 import re
 import time
 import json
 from typing import Set, Dict, List
 from urllib.parse import urlparse
 import logging
+import os
+import sys
+
+# Add parent directory to path for imports
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from utils.html_parser import make_soup
 
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 logger = logging.getLogger(__name__)
@@ -84,7 +89,7 @@ class CaseStudyScraper:
                     continue
 
                 response.raise_for_status()
-                soup = BeautifulSoup(response.text, 'html.parser')
+                soup = make_soup(response.text)
 
                 # Find article links
                 article_links = []
@@ -105,7 +110,7 @@ class CaseStudyScraper:
                         response.raise_for_status()
 
                         text = response.text
-                        soup = BeautifulSoup(text, 'html.parser')
+                        soup = make_soup(text)
 
                         # Extract domains from article
                         domains = self.extract_all_domains(soup.get_text(), text)
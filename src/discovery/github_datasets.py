@@ -1,7 +1,7 @@
 """Discover Shopify stores from public GitHub datasets."""
 
 import requests
-from typing import List, Set, Dict
+from typing import List, Set, Dict, Iterator
 import re
 
 
@@ -88,9 +88,15 @@ class SeedListDiscovery:
 
         Returns list of dicts with domain and metadata.
         """
-        import csv
+        return list(self.iter_seeds_from_csv(csv_path))
+
+    def iter_seeds_from_csv(self, csv_path: str) -> Iterator[Dict]:
+        """
+        Lazily yield store data from a CSV file, one row at a time.
 
-        stores = []
+        Yields dicts with domain and metadata (same shape as add_seeds_from_csv).
+        """
+        import csv
 
         try:
             with open(csv_path, 'r') as f:
@@ -116,7 +122,7 @@ class SeedListDiscovery:
                                 continue
 
                             # Create store entry with metadata from CSV
-                            store_data = {
+                            yield {
                                 'domain': subdomain.lower(),
                                 'company_name': row.get('Company', '').strip(),
                                 'city': row.get('City', '').strip() or None,
@@ -130,12 +136,25 @@ class SeedListDiscovery:
                                 'employees_estimate': self._parse_employees(row.get('Employees', '')),
                             }
 
-                            stores.append(store_data)
-
         except Exception as e:
             print(f"Error reading CSV: {e}")
 
-        return stores
+    def iter_seeds_from_txt(self, txt_path: str) -> Iterator[Dict]:
+        """
+        Lazily yield store data from a text file with one domain per line.
+
+        Lines are stripped, lower-cased and trailing slashes dropped; blank
+        lines and # comments are skipped.
+        """
+        try:
+            with open(txt_path, 'r') as f:
+                for line in f:
+                    domain = line.strip().lower().rstrip('/')
+                    if domain and not domain.startswith('#'):
+                        yield {'domain': domain}
+
+        except Exception as e:
+            print(f"Error reading text file: {e}")
 
     def _parse_emails(self, email_str: str) -> str:
         """Extract first email from semicolon-separated list."""
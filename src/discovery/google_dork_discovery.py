@@ -5,11 +5,16 @@ Uses DuckDuckGo (no API key needed) and Google HTML scraping.
 """
 
 import requests
-from bs4 import BeautifulSoup
 import re
 import time
 from typing import Set
 from urllib.parse import quote_plus, urlparse
+import os
+import sys
+
+# Add parent directory to path for imports
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from utils.html_parser import make_soup
 
 
 class GoogleDorkDiscovery:
@@ -104,7 +109,7 @@ class GoogleDorkDiscovery:
             response = requests.get(url, headers=self.headers, timeout=15)
 
             if response.status_code == 200:
-                soup = BeautifulSoup(response.content, 'html.parser')
+                soup = make_soup(response.content)
 
                 # Extract result links
                 results = soup.find_all('a', class_='result__a')
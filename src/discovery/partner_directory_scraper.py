@@ -8,13 +8,18 @@ Sources:
 """
 
 import requests
-from bs4 import BeautifulSoup
 import re
 import time
 import json
 from typing import Set, Dict, List
 from urllib.parse import urlparse, urljoin
 import logging
+import os
+import sys
+
+# Add parent directory to path for imports
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from utils.html_parser import make_soup
 
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 logger = logging.getLogger(__name__)
@@ -110,7 +115,7 @@ class PartnerDirectoryScraper:
             # Get the main experts page
             response = self.session.get(f"{base_url}/", timeout=30)
             response.raise_for_status()
-            soup = BeautifulSoup(response.text, 'html.parser')
+            soup = make_soup(response.text)
 
             # Find all expert/agency profile links
             expert_links = set()
@@ -128,7 +133,7 @@ class PartnerDirectoryScraper:
                     logger.info(f"Scraping expert page {i+1}/{min(len(expert_links), max_pages)}: {expert_url}")
                     response = self.session.get(expert_url, timeout=30)
                     response.raise_for_status()
-                    soup = BeautifulSoup(response.text, 'html.parser')
+                    soup = make_soup(response.text)
 
                     # Look for store URLs in portfolio sections
                     for link in soup.find_all('a', href=True):
@@ -175,7 +180,7 @@ class PartnerDirectoryScraper:
                     logger.info(f"Scraping category: {category}")
                     response = self.session.get(f"{base_url}{category}", timeout=30)
                     response.raise_for_status()
-                    soup = BeautifulSoup(response.text, 'html.parser')
+                    soup = make_soup(response.text)
 
                     # Find app links
                     for link in soup.find_all('a', href=True):
@@ -199,7 +204,7 @@ class PartnerDirectoryScraper:
                     logger.info(f"Scraping app page {i+1}/{min(len(app_links), max_apps)}: {app_url}")
                     response = self.session.get(app_url, timeout=30)
                     response.raise_for_status()
-                    soup = BeautifulSoup(response.text, 'html.parser')
+                    soup = make_soup(response.text)
 
                     # Look for customer testimonials, case studies, "powered by" sections
                     # Check for common patterns
@@ -239,7 +244,7 @@ class PartnerDirectoryScraper:
             # Get popular themes
             response = self.session.get(f"{base_url}/themes?sort_by=popularity", timeout=30)
             response.raise_for_status()
-            soup = BeautifulSoup(response.text, 'html.parser')
+            soup = make_soup(response.text)
 
             theme_links = set()
             for link in soup.find_all('a', href=True):
@@ -256,7 +261,7 @@ class PartnerDirectoryScraper:
                     logger.info(f"Scraping theme page {i+1}/{min(len(theme_links), 50)}: {theme_url}")
                     response = self.session.get(theme_url, timeout=30)
                     response.raise_for_status()
-                    soup = BeautifulSoup(response.text, 'html.parser')
+                    soup = make_soup(response.text)
 
                     # Look for demo stores and example stores
                     for link in soup.find_all('a', href=True):
@@ -314,7 +319,7 @@ class PartnerDirectoryScraper:
                         continue
 
                     response.raise_for_status()
-                    soup = BeautifulSoup(response.text, 'html.parser')
+                    soup = make_soup(response.text)
 
                     # Look for customer links and case studies
                     for link in soup.find_all('a', href=True):
@@ -366,7 +371,7 @@ class PartnerDirectoryScraper:
                         continue
 
                     response.raise_for_status()
-                    soup = BeautifulSoup(response.text, 'html.parser')
+                    soup = make_soup(response.text)
 
                     # Find all links
                     for link in soup.find_all('a', href=True):
@@ -417,7 +422,7 @@ class PartnerDirectoryScraper:
                         continue
 
                     response.raise_for_status()
-                    soup = BeautifulSoup(response.text, 'html.parser')
+                    soup = make_soup(response.text)
 
                     # Find store links in portfolios
                     for link in soup.find_all('a', href=True):
@@ -20,6 +20,7 @@ sys.path.insert(0, str(Path(__file__).parent.parent))
 from database.models import Base, ShopifyStore
 from detectors.async_shopify_detector import AsyncShopifyDetector
 from scrapers.async_store_scraper import AsyncStoreScraper
+from pipeline.response_cache import ResponseCache
 
 
 class SocialMediaLeadProcessor:
@@ -32,8 +33,10 @@ class SocialMediaLeadProcessor:
         Session = sessionmaker(bind=self.engine)
         self.session = Session()
 
-        self.detector = AsyncShopifyDetector()
-        self.scraper = AsyncStoreScraper()
+        # Set RESPONSE_CACHE=<dir> to reuse pages fetched by earlier runs
+        self.cache = ResponseCache.from_env()
+        self.detector = AsyncShopifyDetector(cache=self.cache)
+        self.scraper = AsyncStoreScraper(cache=self.cache)
 
         self.stats = {
             'total_domains': 0,
@@ -201,8 +204,12 @@ class SocialMediaLeadProcessor:
             print(f"   USA store rate: {usa_rate:.1f}%")
 
     def close(self):
-        """Close database session"""
+        """Close database session and response cache"""
         self.session.close()
+        if self.cache:
+            # Stores what the writer thread still has queued, so the counts are final
+            self.cache.close()
+            print(f"🗄️  Response cache: {self.cache.summary()}")
 
 
 async def main():
@@ -15,10 +15,20 @@ We can use multiple approaches:
 
 import requests
 import time
-import socket
-from typing import Set, List
+from typing import Dict, Iterable, List, Optional, Set, Tuple
 from urllib.parse import quote
 import re
+import os
+import sys
+
+# Add parent directory to path for imports
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from utils.html_parser import make_soup
+from utils.cidr_index import load_shopify_index
+from pipeline.resolver import blocking_resolver, first_ipv4
+
+# Order to check IPs in, by owner of the block they fall in (unknown last)
+OWNER_PRIORITY = {'shopify': 0, 'fastly': 1}
 
 
 class ReverseIPLookup:
@@ -60,8 +70,8 @@ class ReverseIPLookup:
         # Step 2: Reverse lookup on each IP
         print(f"🔎 Checking up to {min(len(shopify_ips), max_ips)} IPs...\\n")
 
-        for i, ip in enumerate(list(shopify_ips)[:max_ips]):
-            print(f"[{i+1}/{min(len(shopify_ips), max_ips)}] IP: {ip}")
+        for i, (ip, block) in enumerate(self.prioritize_ips(shopify_ips)[:max_ips]):
+            print(f"[{i+1}/{min(len(shopify_ips), max_ips)}] IP: {ip} ({describe_block(block)})")
 
             try:
                 domains = self._reverse_ip_lookup(ip)
@@ -88,22 +98,22 @@ class ReverseIPLookup:
 
         return all_domains
 
+    def prioritize_ips(self, ips: Iterable[str]) -> List[Tuple[str, Optional[Dict]]]:
+        """
+        Unique IPs with the Shopify/Fastly block each falls in (None if unknown).
+
+        Shopify's own space comes first, then Fastly, then everything else, so
+        a --max-ips budget is spent where stores are most likely.
+        """
+        index = load_shopify_index()
+        labelled = [(ip, index.lookup(ip)) for ip in dict.fromkeys(ips)]
+        return sorted(labelled, key=lambda item: OWNER_PRIORITY.get(item[1]['owner'], 2) if item[1] else 3)
+
     def _get_shopify_ips(self) -> Set[str]:
         """Get Shopify's infrastructure IP addresses."""
         ips = set()
 
-        # Method 1: Resolve known Shopify domains
-        for domain in self.seed_shopify_domains:
-            try:
-                # Get IP for domain
-                ip = socket.gethostbyname(domain)
-                ips.add(ip)
-                print(f"  🌐 {domain} → {ip}")
-            except Exception as e:
-                print(f"  ⚠️  {domain}: {e}")
-
-        # Method 2: Check common Shopify subdomains
-        print(f"\\n🔎 Checking common Shopify subdomains...")
+        # Seed domains and common subdomains resolve concurrently through the shared DNS cache
         common_subdomains = [
             'checkout.shopify.com',
             'payments.shopify.com',
@@ -112,16 +122,27 @@ class ReverseIPLookup:
             'cdn2.shopify.com',
             'cdn3.shopify.com',
         ]
+        resolver = blocking_resolver()
+        answers = resolver.resolve_many(self.seed_shopify_domains + common_subdomains)
+
+        # Method 1: Resolve known Shopify domains
+        for domain in self.seed_shopify_domains:
+            ip = first_ipv4(answers[domain])
+            if ip:
+                ips.add(ip)
+                print(f"  🌐 {domain} → {ip}")
+            else:
+                print(f"  ⚠️  {domain}: {answers[domain]['error'] or 'no IPv4 address'}")
 
+        # Method 2: Check common Shopify subdomains
+        print(f"\\n🔎 Checking common Shopify subdomains...")
         for subdomain in common_subdomains:
-            try:
-                ip = socket.gethostbyname(subdomain)
-                if ip not in ips:
-                    ips.add(ip)
-                    print(f"  🌐 {subdomain} → {ip}")
-            except:
-                pass
+            ip = first_ipv4(answers[subdomain])
+            if ip and ip not in ips:
+                ips.add(ip)
+                print(f"  🌐 {subdomain} → {ip}")
 
+        resolver.save()
         return ips
 
     def _reverse_ip_lookup(self, ip: str) -> Set[str]:
@@ -179,8 +200,7 @@ class ReverseIPLookup:
         response = requests.get(url, headers=self.headers, timeout=15)
 
         if response.status_code == 200:
-            from bs4 import BeautifulSoup
-            soup = BeautifulSoup(response.content, 'html.parser')
+            soup = make_soup(response.content)
 
             # Find domain table
             table = soup.find('table', id='table')
@@ -233,8 +253,7 @@ class ReverseIPLookup:
         response = requests.get(url, headers=self.headers, timeout=10)
 
         if response.status_code == 200:
-            from bs4 import BeautifulSoup
-            soup = BeautifulSoup(response.content, 'html.parser')
+            soup = make_soup(response.content)
 
             # Find domains in table
             table = soup.find('table')
@@ -288,6 +307,10 @@ class ReverseIPLookup:
         print(f"💾 Saved to data/reverse_ip/domains.txt")
 
 
+def describe_block(block: Optional[Dict]) -> str:
+    return f"{block['network']} {block['asn']}" if block else 'outside known Shopify blocks'
+
+
 if __name__ == '__main__':
     import argparse
 
@@ -310,8 +333,8 @@ if __name__ == '__main__':
         all_domains = set()
         print(f"🔎 Checking {min(len(file_ips), args.max_ips)} IPs...\n")
 
-        for i, ip in enumerate(file_ips[:args.max_ips]):
-            print(f"[{i+1}/{min(len(file_ips), args.max_ips)}] IP: {ip}")
+        for i, (ip, block) in enumerate(lookup.prioritize_ips(file_ips)[:args.max_ips]):
+            print(f"[{i+1}/{min(len(file_ips), args.max_ips)}] IP: {ip} ({describe_block(block)})")
 
             try:
                 domains = lookup._reverse_ip_lookup(ip)
@@ -9,11 +9,17 @@ Strategy:
 5. Discover thousands more stores
 """
 
-import socket
 import requests
 import ipaddress
 from typing import Set, List
 import time
+import os
+import sys
+
+# Add parent directory to path for imports
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from utils.cidr_index import load_shopify_index, sample_hosts
+from pipeline.resolver import blocking_resolver, first_ipv4
 
 
 class ShopifyIPDiscovery:
@@ -76,14 +82,6 @@ class ShopifyIPDiscovery:
         """Resolve known Shopify domains to IPs."""
         ips = set()
 
-        for domain in self.known_shopify_domains:
-            try:
-                ip = socket.gethostbyname(domain)
-                ips.add(ip)
-                print(f"  🌐 {domain} → {ip}")
-            except Exception as e:
-                print(f"  ⚠️  {domain}: {e}")
-
         # Also check common subdomains
         subdomains = [
             'checkout.shopify.com',
@@ -94,15 +92,25 @@ class ShopifyIPDiscovery:
             'api.shopify.com',
         ]
 
+        # All names resolve concurrently through the shared DNS cache
+        resolver = blocking_resolver()
+        answers = resolver.resolve_many(self.known_shopify_domains + subdomains)
+
+        for domain in self.known_shopify_domains:
+            ip = first_ipv4(answers[domain])
+            if ip:
+                ips.add(ip)
+                print(f"  🌐 {domain} → {ip}")
+            else:
+                print(f"  ⚠️  {domain}: {answers[domain]['error'] or 'no IPv4 address'}")
+
         for subdomain in subdomains:
-            try:
-                ip = socket.gethostbyname(subdomain)
-                if ip not in ips:
-                    ips.add(ip)
-                    print(f"  🌐 {subdomain} → {ip}")
-            except:
-                pass
+            ip = first_ipv4(answers[subdomain])
+            if ip and ip not in ips:
+                ips.add(ip)
+                print(f"  🌐 {subdomain} → {ip}")
 
+        resolver.save()
         return ips
 
     def _get_asn_ips(self) -> Set[str]:
@@ -154,29 +162,36 @@ class ShopifyIPDiscovery:
 
         return ips
 
-    def _expand_ip_ranges(self, seed_ips: List[str], nearby: int = 5) -> Set[str]:
+    def _expand_ip_ranges(self, seed_ips: List[str], per_block: int = 26) -> Set[str]:
         """
-        Expand IP ranges by checking nearby IPs.
+        Expand IP ranges by sampling the block around each known IP.
 
-        For each known IP like 23.227.38.33, check:
-        - 23.227.38.32, 23.227.38.34, etc. (same /24)
-        - 23.227.39.33, 23.227.37.33, etc. (nearby /24s)
+        For a seed in a known Shopify/Fastly block (e.g. 23.227.38.33 in
+        23.227.32.0/19), sample `per_block` IPs spread across that block;
+        otherwise sample its /24 (every 10th IP). Each block is sampled once,
+        however many seeds fall in it.
         """
+        index = load_shopify_index()
         expanded = set()
+        sampled_blocks = set()
 
         for ip_str in seed_ips:
             try:
-                ip = ipaddress.IPv4Address(ip_str)
+                block = index.lookup(ip_str)
+                if block:
+                    network = ipaddress.ip_network(block['network'])
+                else:
+                    network = ipaddress.IPv4Network(f"{ipaddress.IPv4Address(ip_str)}/24", strict=False)
 
-                # Get /24 network (e.g., 23.227.38.0/24)
-                network = ipaddress.IPv4Network(f"{ip}/24", strict=False)
+                if network in sampled_blocks:
+                    continue
+                sampled_blocks.add(network)
 
-                # Sample IPs from this /24 (every 10th IP to avoid too many)
-                for i in range(0, 256, 10):
-                    sample_ip = str(network.network_address + i)
-                    expanded.add(sample_ip)
+                every = max(10, network.num_addresses // per_block)
+                expanded.update(sample_hosts(network, every=every, limit=per_block))
 
-                print(f"  🔄 Expanded {ip_str} → {len(expanded)} IPs in /24 range")
+                source = f"{block['asn']} block" if block else "/24 range"
+                print(f"  🔄 Expanded {ip_str} → {len(expanded)} IPs ({network}, {source})")
 
             except Exception as e:
                 print(f"  ⚠️  Error expanding {ip_str}: {e}")
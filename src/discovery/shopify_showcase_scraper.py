@@ -12,6 +12,12 @@ from bs4 import BeautifulSoup
 import re
 from typing import Set, Dict
 import time
+import os
+import sys
+
+# Add parent directory to path for imports
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from utils.html_parser import make_soup
 
 
 class ShopifyShowcaseScraper:
@@ -46,7 +52,7 @@ class ShopifyShowcaseScraper:
                 response = requests.get(url, headers=self.headers, timeout=15)
 
                 if response.status_code == 200:
-                    soup = BeautifulSoup(response.content, 'html.parser')
+                    soup = make_soup(response.content)
 
                     # Extract store mentions
                     stores = self._extract_stores(soup, url)
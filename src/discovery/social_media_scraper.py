@@ -6,12 +6,17 @@ Mines Reddit, Product Hunt, Hacker News, and other platforms for Shopify store m
 
 import re
 import requests
-from bs4 import BeautifulSoup
 from typing import List, Set, Dict, Tuple
 import time
 from urllib.parse import urlparse, urljoin
 import json
 from pathlib import Path
+import os
+import sys
+
+# Add parent directory to path for imports
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from utils.html_parser import make_soup
 
 
 class SocialMediaScraper:
@@ -96,7 +101,7 @@ class SocialMediaScraper:
         try:
             response = requests.get(url, headers=self.headers, timeout=10)
             response.raise_for_status()
-            soup = BeautifulSoup(response.content, 'html.parser')
+            soup = make_soup(response.content)
 
             # Find all links in post content and comments
             all_links = soup.find_all('a')
@@ -134,7 +139,7 @@ class SocialMediaScraper:
 
                 response = requests.get(url, headers=self.headers, timeout=10)
                 response.raise_for_status()
-                soup = BeautifulSoup(response.content, 'html.parser')
+                soup = make_soup(response.content)
 
                 # Extract all links and text
                 all_links = soup.find_all('a')
@@ -210,7 +215,7 @@ class SocialMediaScraper:
                 url = f"https://www.google.com/search?q={query.replace(' ', '+')}"
 
                 response = requests.get(url, headers=self.headers, timeout=10)
-                soup = BeautifulSoup(response.content, 'html.parser')
+                soup = make_soup(response.content)
 
                 # Extract domains from search results
                 text_content = soup.get_text()
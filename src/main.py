@@ -1,15 +1,19 @@
 """Main CLI for Shopify Merchant Intelligence."""
 
 import argparse
+import itertools
 import sys
 from datetime import datetime
 from tqdm import tqdm
 
 from database.models import init_db, get_session, ShopifyStore
+from database.writer import StoreWriter
 from discovery.github_datasets import GitHubDatasetDiscovery, SeedListDiscovery
 from detectors.shopify_detector import ShopifyDetector
 from scrapers.store_scraper import StoreScraper
 from apis.uber_direct import UberDirectClient
+from utils.html_parser import PARSER_BACKENDS, set_parser
+from pipeline.response_cache import ResponseCache, add_cache_arguments
 
 
 def discover_stores(args):
@@ -24,28 +28,30 @@ def discover_stores(args):
     stores_data = []
 
     if args.csv:
-        print(f"📁 Loading from CSV: {args.csv}")
+        print(f"📁 Streaming from CSV: {args.csv}")
         seed_discovery = SeedListDiscovery()
-        csv_stores = seed_discovery.add_seeds_from_csv(args.csv)
-        stores_data.extend(csv_stores)
-        print(f"✅ Found {len(csv_stores)} stores from CSV")
+        stores_data = seed_discovery.iter_seeds_from_csv(args.csv)
 
     if args.github and not args.csv:
         print("🐙 Searching GitHub datasets...")
         github_discovery = GitHubDatasetDiscovery()
         github_domains = github_discovery.discover(limit=args.limit)
         # Convert domains to store data format
-        stores_data.extend([{'domain': d} for d in github_domains])
+        stores_data = [{'domain': d} for d in github_domains]
 
-    # Limit
-    stores_data = stores_data[:args.limit]
-    print(f"📊 Processing {len(stores_data)} stores...")
+    # Limit (lazily, so the CSV is only read as far as needed)
+    stores_data = itertools.islice(stores_data, args.limit)
+    print(f"📊 Processing up to {args.limit} stores...")
 
     # Process each store
     detector = ShopifyDetector()
-    scraper = StoreScraper()
+    cache = ResponseCache.from_args(args)
+    if cache:
+        print(f"🗄️  Response cache: {cache.describe()}")
+    scraper = StoreScraper(cache=cache)
+    writer = StoreWriter().start()
 
-    for store_data in tqdm(stores_data, desc="Processing stores"):
+    for store_data in tqdm(stores_data, desc="Processing stores", total=args.limit):
         domain = store_data['domain']
 
         # Check if already in database
@@ -60,31 +66,15 @@ def discover_stores(args):
             # Scrape additional data (addresses if not in CSV)
             scraped_data = scraper.scrape(domain)
 
-            # Merge CSV data with scraped data (CSV takes precedence for address)
-            merged_data = {**scraped_data, **store_data}
-
-            # Create database entry
-            store = ShopifyStore(
-                domain=domain,
-                company_name=merged_data.get('company_name'),
-                email=merged_data.get('email'),
-                phone=merged_data.get('phone'),
-                street_address=merged_data.get('street_address'),
-                city=merged_data.get('city'),
-                state=merged_data.get('state'),
-                zip_code=merged_data.get('zip_code'),
-                country=merged_data.get('country'),
-                vertical=merged_data.get('vertical'),
-                revenue_estimate=merged_data.get('revenue_estimate'),
-                employees_estimate=merged_data.get('employees_estimate'),
-                is_shopify=True,
-                is_shopify_plus=is_plus,
-                scraped_at=datetime.utcnow(),
-            )
-
-            session.add(store)
-            session.commit()
+            # Bulk-written from a background thread (CSV data takes precedence over scraped)
+            writer.put({'domain': domain, 'is_shopify': True, 'is_plus': is_plus,
+                        'scraped_data': scraped_data, 'store_data': store_data})
 
+    writer.close()
+    print(f"💾 Wrote {writer.summary()}")
+    if cache:
+        print(f"🗄️  Response cache: {cache.summary()}")
+        cache.close()
     print(f"✅ Discovery complete!")
 
 
@@ -188,6 +178,8 @@ def main():
     discover_parser.add_argument('--limit', type=int, default=500, help='Max stores to discover')
     discover_parser.add_argument('--csv', type=str, help='CSV file with seed domains')
     discover_parser.add_argument('--github', action='store_true', help='Search GitHub datasets')
+    discover_parser.add_argument('--parser', choices=['auto'] + PARSER_BACKENDS, default='auto', help='HTML parser backend (default: auto = lxml if installed, else html.parser)')
+    add_cache_arguments(discover_parser)
 
     # Serviceability command
     service_parser = subparsers.add_parser('check-uber', help='Check Uber Direct serviceability')
@@ -204,6 +196,10 @@ def main():
     args = parser.parse_args()
 
     if args.command == 'discover':
+        try:
+            set_parser(args.parser)
+        except ValueError as e:
+            parser.error(str(e))
         discover_stores(args)
     elif args.command == 'check-uber':
         check_serviceability(args)
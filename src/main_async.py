@@ -2,15 +2,34 @@
 
 import argparse
 import asyncio
-import aiohttp
-from datetime import datetime
+import itertools
+import multiprocessing
+import signal
+import sys
+import threading
+import time
 from tqdm.asyncio import tqdm as async_tqdm
 
-from database.models import init_db, get_session, ShopifyStore
+from database.models import init_db, get_session, QuarantinedDomain
 from discovery.github_datasets import SeedListDiscovery
 from discovery.github_shopify_datasets import GitHubShopifyDatasets
-from detectors.async_shopify_detector import AsyncShopifyDetector
+from detectors.async_shopify_detector import AsyncShopifyDetector, DETECTION_MODES
 from scrapers.async_store_scraper import AsyncStoreScraper
+from database.writer import StoreWriter
+from pipeline.streaming import StreamingPipeline, SlowLane, with_shop_name
+from pipeline.journal import RunJournal
+from pipeline.sharding import ShardDispatcher, ShardResultCollector, ShardResultSink, iter_shard_input
+from pipeline.page_context import PageContext
+from pipeline.dedup import DomainDeduplicator
+from pipeline.http_pool import ConnectionPoolConfig, create_session, add_pool_arguments
+from pipeline.concurrency import add_concurrency_arguments, limiter_from_args
+from pipeline.offload import ParseOffloader, LoopLagMonitor, PARSE_POOLS
+from pipeline.prescreen import DnsPrescreen
+from pipeline.reextract import Reextractor, open_pages
+from pipeline.response_cache import ResponseCache, add_cache_arguments
+from pipeline.warc import WarcWriter, add_warc_arguments
+from pipeline.resolver import AsyncResolver, add_resolver_arguments, check_resolver_arguments
+from utils.html_parser import PARSER_BACKENDS, set_parser
 
 
 async def discover_stores_async(args):
@@ -21,128 +40,491 @@ async def discover_stores_async(args):
     init_db()
     session = get_session()
 
-    # Discover stores
-    stores_data = []
+    new_stores, dedup, journal = _prepare_input(args, session)
+
+    if not args.stream:
+        # Batch mode slices its input, so it needs the (limited) list up front
+        new_stores = list(new_stores)
+        dedup.print_summary()
+
+        if not new_stores:
+            print("✅ No new stores to process!")
+            return
+
+        print(f"📊 Processing {len(new_stores)} new stores...")
+
+    # One connection pool for the whole run, shared by detector and scraper
+    pool_config = ConnectionPoolConfig.from_args(args)
+    print(f"🔌 Connection pool: {pool_config.describe()}")
+
+    # One DNS cache for the run, shared by the pre-screen and every HTTP request
+    resolver = AsyncResolver.from_args(args)
+    print(f"🧭 DNS resolver: {resolver.describe()}")
+
+    # Adaptive limiter shared by detector and scraper (None = fixed --concurrent)
+    limiter = limiter_from_args(args)
+    trace_configs = [limiter.trace_config()] if limiter else None
+    if limiter:
+        print(f"🎚️  Adaptive concurrency: start {limiter.limit}, range {limiter.min_limit}-{limiter.max_limit}")
+
+    # Results are written from a background thread in bulk transactions
+    writer = StoreWriter(batch_size=args.write_batch, negative_ttl_scale=args.negative_ttl_scale,
+                         journal=journal).start()
+
+    # HTML parsing and extraction run off the event loop
+    offloader = ParseOffloader.from_args(args)
+    print(f"🧩 Parsing: {offloader.describe()}")
+    lag_monitor = LoopLagMonitor().start()
+
+    # SIGTERM/SIGINT: finish in-flight domains and flush; a second signal aborts
+    stop_event = asyncio.Event()
+    _install_stop_handlers(stop_event)
+
+    try:
+        async with create_session(pool_config, trace_configs=trace_configs, resolver=resolver) as http_session:
+            if args.stream:
+                stats = await _run_streaming(args, http_session, new_stores, writer, stop_event,
+                                             limiter, _load_quarantined(args, session),
+                                             offloader=offloader, lag_monitor=lag_monitor,
+                                             resolver=resolver)
+                total_processed = stats['saved']
+                dedup.print_summary()
+            else:
+                total_processed = await _run_batches(args, http_session, new_stores, writer,
+                                                     stop_event, limiter, offloader)
+    finally:
+        # Runs on errors and aborts too, so nothing already handed over is lost
+        await writer.close_async()
+        print(f"💾 Wrote {writer.summary()}")
+        _close_journal(journal)
+        await lag_monitor.stop()
+        offloader.close()
+        await resolver.close()
+        resolver.save()
+
+    if limiter:
+        print(f"🎚️  Adaptive concurrency {limiter.summary()}")
+    print(f"⏱️  Event loop lag {lag_monitor.summary()}")
+    print(f"🧭 DNS {resolver.summary()}")
+
+    if stop_event.is_set():
+        print(f"\n🛑 Stopped early after {total_processed} Shopify stores; rerun with --resume to continue")
+        return
 
-    if args.csv:
-        print(f"📁 Loading from CSV: {args.csv}")
-        seed_discovery = SeedListDiscovery()
-        csv_stores = seed_discovery.add_seeds_from_csv(args.csv)
-        stores_data.extend(csv_stores)
-        print(f"✅ Found {len(csv_stores)} stores from CSV")
+    print(f"\n🎉 Discovery complete! Processed {total_processed} Shopify stores")
 
-    if args.github:
-        print("🐙 Searching GitHub datasets...")
-        github_discovery = GitHubShopifyDatasets()
-        github_domains = github_discovery.discover(limit=args.limit)
 
-        # Convert to store data format
-        for domain in github_domains:
-            stores_data.append({'domain': domain})
+def discover_stores_sharded(args):
+    """Discover with --workers processes, each with its own event loop and connection pool."""
+    print(f"🚀 Sharded async discovery - {args.workers} worker processes, "
+          f"up to {args.concurrent} stores concurrently each...")
 
-        print(f"✅ Found {len(github_domains)} stores from GitHub")
+    init_db()
+    session = get_session()
+    new_stores, dedup, journal = _prepare_input(args, session)
+    quarantined = _load_quarantined(args, session)
+
+    # Spawn (not fork): children must not inherit the parent's DB connections or threads
+    mp = multiprocessing.get_context('spawn')
+    input_queues = [mp.Queue(maxsize=4) for _ in range(args.workers)]
+    result_queue = mp.Queue(maxsize=args.workers * 8)
+    processes = [
+        mp.Process(target=_shard_worker, args=(i, args, input_queues[i], result_queue, quarantined),
+                   name=f'discover-{i}')
+        for i in range(args.workers)
+    ]
+    for process in processes:
+        process.start()
+
+    # One writer (and journal) in the parent for every worker's results
+    writer = StoreWriter(batch_size=args.write_batch, negative_ttl_scale=args.negative_ttl_scale,
+                         journal=journal).start()
+    collector = ShardResultCollector(result_queue, writer, processes).start()
+
+    # SIGTERM: stop dispatching and pass it on, so each worker shuts down gracefully
+    # (SIGINT from a terminal already reaches the whole process group)
+    stopping = threading.Event()
+
+    def on_signal(signum, frame):
+        if not stopping.is_set():
+            print("\n🛑 Stopping: workers finish in-flight domains and flush writes (signal again to abort)")
+        stopping.set()
+        if signum == signal.SIGTERM:
+            for process in processes:
+                if process.is_alive():
+                    process.terminate()
+
+    signal.signal(signal.SIGTERM, on_signal)
+    signal.signal(signal.SIGINT, on_signal)
+
+    dispatcher = ShardDispatcher(input_queues, stopped=stopping.is_set)
+    try:
+        for store_data in new_stores:
+            if stopping.is_set():
+                break
+            dispatcher.add(store_data)
+        dispatcher.close()
+    finally:
+        if stopping.is_set():
+            # Workers may never read what's left; don't block exit flushing it
+            for input_queue in input_queues:
+                input_queue.cancel_join_thread()
+
+        collector.join()
+        for process in processes:
+            process.join()
+
+        writer.close()
+        print(f"💾 Wrote {writer.summary()}")
+        _close_journal(journal)
+
+    dedup.print_summary()
+
+    totals = collector.totals()
+    elapsed = time.time() - collector.started_at
+    print(f"⚡ {args.workers} workers: {collector.results} domains in {elapsed:.1f}s "
+          f"({collector.rate:.1f} domains/s), {totals.get('shopify', 0)} Shopify, "
+          f"{totals.get('errors', 0)} errors")
+
+    if stopping.is_set():
+        print(f"\n🛑 Stopped early after {collector.stores} Shopify stores; rerun with --resume to continue")
+        return
 
-    if args.txtfile:
-        print(f"📄 Loading domains from text file: {args.txtfile}")
-        try:
-            with open(args.txtfile, 'r') as f:
-                txt_domains = [line.strip() for line in f if line.strip()]
+    print(f"\n🎉 Discovery complete! Processed {collector.stores} Shopify stores")
 
-            for domain in txt_domains:
-                stores_data.append({'domain': domain})
 
-            print(f"✅ Found {len(txt_domains)} stores from text file")
-        except Exception as e:
-            print(f"⚠️  Error loading text file: {e}")
+def _shard_worker(worker_id, args, input_queue, result_queue, quarantined):
+    """Worker process entry point: run one shard through its own streaming pipeline."""
+    try:
+        asyncio.run(_run_shard(worker_id, args, input_queue, result_queue, quarantined))
+    except asyncio.CancelledError:
+        pass
 
-    # Filter out already-processed stores (deduplication)
-    existing_domains = set([s.domain for s in session.query(ShopifyStore.domain).all()])
-    new_stores = [s for s in stores_data if s['domain'] not in existing_domains]
 
-    if len(new_stores) < len(stores_data):
-        skipped = len(stores_data) - len(new_stores)
-        print(f"⏭️  Skipped {skipped} already-processed stores")
+async def _run_shard(worker_id, args, input_queue, result_queue, quarantined):
+    set_parser(args.parser)
+    sink = ShardResultSink(result_queue, worker_id)
+    stats = {}
 
-    stores_data = new_stores[:args.limit]
+    # Each worker has its own pool and limiter; --concurrent etc. apply per worker
+    limiter = limiter_from_args(args)
+    trace_configs = [limiter.trace_config()] if limiter else None
 
-    if not stores_data:
-        print("✅ No new stores to process!")
-        return
+    offloader = ParseOffloader.from_args(args)
+    lag_monitor = LoopLagMonitor().start()
+    # Workers share the warm cache file; each merges its answers back on exit
+    resolver = AsyncResolver.from_args(args)
+
+    stop_event = asyncio.Event()
+    _install_stop_handlers(stop_event)
+
+    try:
+        async with create_session(ConnectionPoolConfig.from_args(args), trace_configs=trace_configs,
+                                  resolver=resolver) as http_session:
+            stats = await _run_streaming(args, http_session, iter_shard_input(input_queue, stop_event), sink,
+                                         stop_event, limiter, quarantined, progress_every=10 ** 9,
+                                         offloader=offloader, lag_monitor=lag_monitor, resolver=resolver)
+    finally:
+        sink.done(stats)
+        await lag_monitor.stop()
+        offloader.close()
+        await resolver.close()
+        resolver.save()
+        print(f"  ⏱️  Worker {worker_id} event loop lag {lag_monitor.summary()}")
+
+
+def _prepare_input(args, session):
+    """Lazy input -> journal skip -> dedup -> limit chain shared by every run mode."""
+    # Discover stores (lazily: sources are read as the pipeline consumes them)
+    stores_data = _iter_input(args)
+
+    # Checkpoint journal: with --resume, skip domains an earlier run already finished
+    journal = None
+    if args.journal:
+        journal = RunJournal(args.journal, resume=args.resume)
+        if args.resume:
+            print(f"📓 Resuming from journal {args.journal} ({len(journal.done)} domains already done)")
+        else:
+            print(f"📓 Journal: {args.journal}")
+        stores_data = journal.skip_done(stores_data)
+
+    # Deduplicate lazily against the database (chunked indexed lookups, no full-table load)
+    dedup = DomainDeduplicator(session, skip_negatives=not args.recheck_negatives)
+    new_stores = itertools.islice(dedup.filter(stores_data), args.limit)
+
+    return new_stores, dedup, journal
+
+
+def _close_journal(journal):
+    if journal:
+        journal.close()
+        if journal.skipped:
+            print(f"⏭️  Skipped {journal.skipped} domains finished by an earlier run")
+
+
+def _load_quarantined(args, session):
+    """Domains quarantined by earlier runs (only needed when the slow lane is on)."""
+    if not args.domain_budget:
+        return set()
+    return set(domain for (domain,) in session.query(QuarantinedDomain.domain))
+
+
+def _install_stop_handlers(stop_event):
+    """First SIGTERM/SIGINT requests a graceful stop, the second cancels the run."""
+    loop = asyncio.get_running_loop()
+    main_task = asyncio.current_task()
 
-    print(f"📊 Processing {len(stores_data)} new stores...")
+    def on_signal():
+        if stop_event.is_set():
+            print("\n🛑 Aborting in-flight work, flushing pending writes...")
+            main_task.cancel()
+            return
+        print("\n🛑 Stopping: finishing in-flight domains and flushing writes (signal again to abort)")
+        stop_event.set()
 
+    for sig in (signal.SIGTERM, signal.SIGINT):
+        loop.add_signal_handler(sig, on_signal)
+
+
+def _iter_input(args):
+    """Yield store dicts from every configured source, reading files lazily."""
+    seed_discovery = SeedListDiscovery()
+
+    if args.csv:
+        print(f"📁 Streaming from CSV: {args.csv}")
+        yield from seed_discovery.iter_seeds_from_csv(args.csv)
+
+    if args.github:
+        print("🐙 Searching GitHub datasets...")
+        github_discovery = GitHubShopifyDatasets()
+        github_domains = github_discovery.discover(limit=args.limit)
+        print(f"✅ Found {len(github_domains)} stores from GitHub")
+
+        for domain in github_domains:
+            yield {'domain': domain}
+
+    if args.txtfile:
+        print(f"📄 Streaming domains from text file: {args.txtfile}")
+        yield from seed_discovery.iter_seeds_from_txt(args.txtfile)
+
+
+async def _run_batches(args, http_session, stores_data, writer, stop_event, limiter=None, offloader=None):
+    """Process stores in fixed-size batches (legacy mode)."""
     # Extract domains for batch processing
     domains = [s['domain'] for s in stores_data]
 
     # Create async detector and scraper
-    detector = AsyncShopifyDetector(max_concurrent=args.concurrent)
-    scraper = AsyncStoreScraper(max_concurrent=args.concurrent)
+    cache = _open_cache(args)
+    archive = _open_archive(args)
+    detector = AsyncShopifyDetector(max_concurrent=args.concurrent, limiter=limiter,
+                                    max_bytes=args.detect_max_kb * 1024, mode=args.detect_mode, cache=cache,
+                                    archive=archive)
+    scraper = AsyncStoreScraper(max_concurrent=args.concurrent, limiter=limiter,
+                                probe_budget=args.probe_budget, offloader=offloader, cache=cache,
+                                archive=archive)
 
     # Process in batches
     batch_size = args.concurrent * 5  # Process in larger batches
     total_processed = 0
 
     for i in range(0, len(domains), batch_size):
+        if stop_event.is_set():
+            break
+
         batch_domains = domains[i:i + batch_size]
         batch_stores = stores_data[i:i + batch_size]
 
         print(f"\nProcessing batch {i//batch_size + 1}/{(len(domains)-1)//batch_size + 1}...")
 
-        async with aiohttp.ClientSession() as http_session:
-            # Detect Shopify + Plus concurrently
-            detection_tasks = []
-            for domain in batch_domains:
-                task = detector.detect(http_session, domain)
-                detection_tasks.append(task)
-
-            detection_results = await asyncio.gather(*detection_tasks, return_exceptions=True)
-
-            # Scrape data for Shopify stores concurrently
-            scrape_tasks = []
-            shopify_domains = []
-
-            for domain, result in zip(batch_domains, detection_results):
-                if isinstance(result, tuple):
-                    is_shopify, is_plus, metadata = result
-                    if is_shopify:
-                        shopify_domains.append((domain, is_plus))
-                        task = scraper.scrape(http_session, domain)
-                        scrape_tasks.append(task)
-
-            if scrape_tasks:
-                scrape_results = await asyncio.gather(*scrape_tasks, return_exceptions=True)
-
-                # Save to database
-                for (domain, is_plus), scraped_data, store_data in zip(shopify_domains, scrape_results, batch_stores):
-                    if isinstance(scraped_data, dict):
-                        # Merge CSV data with scraped data
-                        merged_data = {**scraped_data, **store_data}
-
-                        store = ShopifyStore(
-                            domain=domain,
-                            company_name=merged_data.get('company_name'),
-                            email=merged_data.get('email'),
-                            phone=merged_data.get('phone'),
-                            street_address=merged_data.get('street_address'),
-                            city=merged_data.get('city'),
-                            state=merged_data.get('state'),
-                            zip_code=merged_data.get('zip_code'),
-                            country=merged_data.get('country'),
-                            vertical=merged_data.get('vertical'),
-                            revenue_estimate=merged_data.get('revenue_estimate'),
-                            employees_estimate=merged_data.get('employees_estimate'),
-                            is_shopify=True,
-                            is_shopify_plus=is_plus,
-                            scraped_at=datetime.utcnow(),
-                        )
-
-                        session.add(store)
-
-                session.commit()
-                total_processed += len(shopify_domains)
-                print(f"  ✅ Saved {len(shopify_domains)} Shopify stores")
+        # One page context per store so detection and scraping share fetched pages
+        contexts = [PageContext(http_session, domain, cache=cache, archive=archive) for domain in batch_domains]
+
+        # Detect Shopify + Plus concurrently
+        detection_tasks = []
+        for domain, context in zip(batch_domains, contexts):
+            task = detector.detect(http_session, domain, context)
+            detection_tasks.append(task)
+
+        detection_results = await asyncio.gather(*detection_tasks, return_exceptions=True)
+
+        # Scrape data for Shopify stores concurrently
+        scrape_tasks = []
+        shopify_stores = []
+
+        for store_data, context, result in zip(batch_stores, contexts, detection_results):
+            if isinstance(result, tuple):
+                is_shopify, is_plus, metadata = result
+                if is_shopify:
+                    shopify_stores.append((with_shop_name(store_data, metadata), is_plus))
+                    task = scraper.scrape(http_session, store_data['domain'], context)
+                    scrape_tasks.append(task)
+                else:
+                    await writer.put_async({'domain': store_data['domain'], 'is_shopify': False,
+                                            'metadata': metadata})
+
+        if scrape_tasks:
+            scrape_results = await asyncio.gather(*scrape_tasks, return_exceptions=True)
+
+            # Hand over to the database writer
+            for (store_data, is_plus), scraped_data in zip(shopify_stores, scrape_results):
+                if isinstance(scraped_data, dict):
+                    await writer.put_async({'domain': store_data['domain'], 'is_shopify': True,
+                                            'is_plus': is_plus, 'scraped_data': scraped_data,
+                                            'store_data': store_data})
+
+            total_processed += len(shopify_stores)
+            print(f"  ✅ Queued {len(shopify_stores)} Shopify stores for writing")
+
+    _close_cache(cache)
+    _close_archive(archive)
+    return total_processed
+
+
+async def _run_streaming(args, http_session, stores_data, writer, stop_event, limiter=None, quarantined=None,
+                         progress_every=500, offloader=None, lag_monitor=None, resolver=None):
+    """Process stores through the streaming detect/scrape/persist pipeline."""
+    # With --adaptive the limiter is the real gate, so give it room to grow
+    default_workers = args.max_concurrent if limiter else args.concurrent
+    detect_workers = args.detect_workers or default_workers
+    scrape_workers = args.scrape_workers or default_workers
+    print(f"🌊 Streaming mode: {detect_workers} detect / {scrape_workers} scrape workers, "
+          f"queue size {args.queue_size}")
+
+    cache = _open_cache(args)
+    archive = _open_archive(args)
+    detector = AsyncShopifyDetector(max_concurrent=detect_workers, limiter=limiter,
+                                    max_bytes=args.detect_max_kb * 1024, mode=args.detect_mode, cache=cache,
+                                    archive=archive)
+    scraper = AsyncStoreScraper(max_concurrent=scrape_workers, limiter=limiter,
+                                probe_budget=args.probe_budget, offloader=offloader, cache=cache,
+                                archive=archive)
+
+    slow_lane = None
+    if args.domain_budget:
+        slow_lane = _build_slow_lane(args, writer, quarantined or set(), offloader, cache, archive)
+
+    prescreen = None
+    if args.dns_prescreen:
+        prescreen = DnsPrescreen(resolver=resolver)
+        print(f"🧭 DNS pre-screen: {args.dns_workers} workers, {prescreen.describe()}")
+
+    pipeline = StreamingPipeline(
+        detector, scraper, writer.put_many_async,
+        detect_workers=detect_workers,
+        scrape_workers=scrape_workers,
+        queue_size=args.queue_size,
+        progress_every=progress_every,
+        budget=args.domain_budget or None,
+        slow_lane=slow_lane,
+        lag_monitor=lag_monitor,
+        prescreen=prescreen,
+        prescreen_workers=args.dns_workers,
+    )
+
+    async def stop_on_signal():
+        await stop_event.wait()
+        pipeline.stop()
+
+    watcher = asyncio.create_task(stop_on_signal())
+    try:
+        stats = await pipeline.run(http_session, stores_data)
+    finally:
+        watcher.cancel()
+        _close_cache(cache)
+        _close_archive(archive)
+
+    if prescreen:
+        print(f"  🧭 DNS pre-screen: {prescreen.summary()}")
+    if stats['abandoned']:
+        print(f"  ⏸️  {stats['abandoned']} queued domains left for the next run")
+
+    return stats
+
+
+def _open_cache(args):
+    """The run's response cache (None without --response-cache)."""
+    cache = ResponseCache.from_args(args)
+    if cache:
+        print(f"🗄️  Response cache: {cache.describe()}")
+    return cache
+
+
+def _close_cache(cache):
+    if cache:
+        cache.close()
+        print(f"  🗄️  Response cache: {cache.summary()}")
+
+
+def _open_archive(args):
+    """The run's WARC writer (None without --warc-dir)."""
+    archive = WarcWriter.from_args(args)
+    if archive:
+        print(f"📼 WARC archive: {archive.describe()}")
+    return archive
+
+
+def _close_archive(archive):
+    if archive:
+        archive.close()
+        print(f"  📼 WARC archive: {archive.summary()}")
+
+
+def _build_slow_lane(args, writer, quarantined, offloader=None, cache=None, archive=None):
+    """Slow lane for domains over --domain-budget, seeded with earlier quarantines."""
+    def on_quarantine(domain, reason):
+        writer.put({'domain': domain, 'quarantine': reason})
+
+    print(f"🐢 Per-domain budget {args.domain_budget:.0f}s; slow lane: {args.slow_workers} workers, "
+          f"{args.slow_timeout}s timeouts, {len(quarantined)} domains already quarantined")
+
+    return SlowLane(
+        AsyncShopifyDetector(timeout=args.slow_timeout, max_concurrent=args.slow_workers,
+                             max_bytes=args.detect_max_kb * 1024, mode=args.detect_mode, cache=cache,
+                             archive=archive),
+        AsyncStoreScraper(timeout=args.slow_timeout, max_concurrent=args.slow_workers, offloader=offloader,
+                          cache=cache, archive=archive),
+        workers=args.slow_workers,
+        budget=args.slow_budget,
+        quarantined=quarantined,
+        on_quarantine=on_quarantine,
+    )
+
+
+def reextract_stores(args):
+    """Rerun detection and extraction over stored pages and update what changed (no network)."""
+    source = ('warc', args.warc) if args.warc else ('cache', args.response_cache)
+    # Opened once here so missing WARC indexes are built before the workers start
+    pages = open_pages(source)
+    print(f"♻️  Re-extracting from {pages.describe()}")
+    if isinstance(pages, ResponseCache):
+        pages.close()
 
-    print(f"\n🎉 Discovery complete! Processed {total_processed} Shopify stores")
+    init_db()
+    session = get_session()
+    reextractor = Reextractor(session, source, workers=args.workers, chunk_size=args.chunk_size,
+                              mode=args.detect_mode, dry_run=args.dry_run)
+    print(f"⚙️  {reextractor.workers} worker processes, {args.chunk_size} stores per chunk"
+          + (" (dry run)" if args.dry_run else ""))
+
+    started = time.monotonic()
+
+    def progress(stats):
+        elapsed = time.monotonic() - started
+        print(f"  📈 {stats['checked']} checked, {stats['updated']} changed, {stats['missing']} not stored "
+              f"({stats['checked'] / elapsed if elapsed else 0:.0f} stores/s)")
+
+    try:
+        stats = reextractor.run(limit=args.limit, progress=progress)
+    finally:
+        session.close()
+
+    print(f"\n✅ Re-extraction complete in {time.monotonic() - started:.1f}s: {reextractor.summary()}")
+    if stats['missing']:
+        print(f"  ⏭️  {stats['missing']} stores have no stored homepage")
+    if stats['not_detected']:
+        print(f"  ⚠️  {stats['not_detected']} stores no longer detect as Shopify (left as Shopify)")
+    if stats['errors']:
+        print(f"  ⚠️  {stats['errors']} stores hit extraction errors")
 
 
 def main():
@@ -157,11 +539,73 @@ def main():
     discover_parser.add_argument('--github', action='store_true', help='Search GitHub datasets')
     discover_parser.add_argument('--txtfile', type=str, help='Text file with domains (one per line)')
     discover_parser.add_argument('--concurrent', type=int, default=20, help='Concurrent requests (default: 20)')
+    discover_parser.add_argument('--stream', action='store_true', help='Use the streaming pipeline instead of fixed batches')
+    discover_parser.add_argument('--detect-workers', type=int, default=None, help='Detect stage workers in --stream mode (default: --concurrent)')
+    discover_parser.add_argument('--scrape-workers', type=int, default=None, help='Scrape stage workers in --stream mode (default: --concurrent)')
+    discover_parser.add_argument('--queue-size', type=int, default=100, help='Bounded queue size between stages in --stream mode (default: 100)')
+    discover_parser.add_argument('--recheck-negatives', action='store_true', help='Re-fetch domains with an unexpired negative result')
+    discover_parser.add_argument('--negative-ttl-scale', type=float, default=1.0, help='Multiplier for negative-result TTLs (default: 1.0)')
+    discover_parser.add_argument('--domain-budget', type=float, default=30.0, help='Wall-clock seconds per domain across detect+scrape in --stream mode before it moves to the slow lane (default: 30, 0 = off)')
+    discover_parser.add_argument('--slow-workers', type=int, default=4, help='Slow lane concurrency (default: 4)')
+    discover_parser.add_argument('--slow-timeout', type=int, default=30, help='Per-request timeout in the slow lane (default: 30)')
+    discover_parser.add_argument('--slow-budget', type=float, default=180.0, help='Wall-clock seconds per domain in the slow lane (default: 180)')
+    discover_parser.add_argument('--detect-max-kb', type=int, default=0, help='Stream the homepage during detection and stop reading after this many KB if no Shopify signal was seen, or once the <head> has been read and shows another platform\'s marker (default: 0 = read whole page)')
+    discover_parser.add_argument('--detect-mode', choices=DETECTION_MODES, default='html', help='html: look for signals in the homepage; json: confirm Shopify from /meta.json, /products.json and /cart.js first, fetching the homepage only for the Plus check or when they are inconclusive (default: html)')
+    discover_parser.add_argument('--dns-prescreen', action='store_true', help='Resolve domains before HTTP detection in --stream mode: drop NXDOMAIN/parked domains and fast-track ones pointing at Shopify')
+    discover_parser.add_argument('--dns-workers', type=int, default=200, help='Concurrent DNS lookups, and --dns-prescreen workers (default: 200)')
+    discover_parser.add_argument('--probe-budget', type=float, default=None, help='Seconds to wait for a hit when probing contact/about/shipping URLs (default: request timeout)')
+    discover_parser.add_argument('--write-batch', type=int, default=500, help='Results per database transaction (default: 500)')
+    discover_parser.add_argument('--workers', type=int, default=1, help='Worker processes, each running a hash-sharded slice of the input through its own --stream pipeline (default: 1)')
+    discover_parser.add_argument('--journal', type=str, default=None, help='Checkpoint journal (JSONL) recording every finished domain')
+    discover_parser.add_argument('--resume', action='store_true', help='Continue from --journal, skipping domains it already records')
+    add_pool_arguments(discover_parser)
+    add_resolver_arguments(discover_parser)
+    add_cache_arguments(discover_parser)
+    add_warc_arguments(discover_parser)
+    discover_parser.add_argument('--parse-pool', choices=PARSE_POOLS, default=None, help='Where HTML parsing and extraction run (default: process, or inline with --workers > 1)')
+    discover_parser.add_argument('--parser', choices=['auto'] + PARSER_BACKENDS, default='auto', help='HTML parser backend (default: auto = lxml if installed, else html.parser)')
+    discover_parser.add_argument('--parse-workers', type=int, default=None, help='Parse pool size (default: CPU count)')
+    add_concurrency_arguments(discover_parser)
+
+    # Offline re-extraction command
+    reextract_parser = subparsers.add_parser('reextract', help='Rerun detection and extraction over stored pages (no network)')
+    source_group = reextract_parser.add_mutually_exclusive_group(required=True)
+    source_group.add_argument('--response-cache', type=str, help='Response cache directory to read pages from')
+    source_group.add_argument('--warc', type=str, nargs='+', help='WARC archives (or directories of them) to read pages from')
+    reextract_parser.add_argument('--limit', type=int, default=None, help='Max stores to re-extract (default: all)')
+    reextract_parser.add_argument('--workers', type=int, default=None, help='Worker processes (default: CPU count)')
+    reextract_parser.add_argument('--chunk-size', type=int, default=200, help='Stores per worker task and per bulk update (default: 200)')
+    reextract_parser.add_argument('--detect-mode', choices=DETECTION_MODES, default='html', help='Detection mode to replay (default: html)')
+    reextract_parser.add_argument('--parser', choices=['auto'] + PARSER_BACKENDS, default='auto', help='HTML parser backend (default: auto = lxml if installed, else html.parser)')
+    reextract_parser.add_argument('--dry-run', action='store_true', help='Report what would change without writing')
 
     args = parser.parse_args()
 
     if args.command == 'discover':
-        asyncio.run(discover_stores_async(args))
+        if args.resume and not args.journal:
+            parser.error('--resume requires --journal')
+        try:
+            set_parser(args.parser)
+            check_resolver_arguments(args)
+        except ValueError as e:
+            parser.error(str(e))
+        if args.parse_pool is None:
+            # Sharded runs already use every core for their event loops
+            args.parse_pool = 'process' if args.workers == 1 else 'inline'
+        try:
+            if args.workers > 1:
+                discover_stores_sharded(args)
+            else:
+                asyncio.run(discover_stores_async(args))
+        except asyncio.CancelledError:
+            print("🛑 Aborted; rerun with --resume to continue")
+            sys.exit(1)
+    elif args.command == 'reextract':
+        try:
+            set_parser(args.parser)
+            reextract_stores(args)
+        except ValueError as e:
+            parser.error(str(e))
     else:
         parser.print_help()
 
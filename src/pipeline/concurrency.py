@@ -0,0 +1,215 @@
+"""Adaptive (AIMD) concurrency limiter for async detection and scraping."""
+
+import asyncio
+import statistics
+import time
+from collections import deque
+from typing import List, Optional
+
+import aiohttp
+
+
+# Outcomes that count against the error budget
+TIMEOUT = 'timeout'
+RATE_LIMITED = 'rate_limited'
+CONNECTION_RESET = 'reset'
+ERROR = 'error'
+
+
+class AdaptiveLimiter:
+    """
+    Semaphore-like limiter whose limit follows network health (AIMD).
+
+    Every `window` completed requests the limiter looks at p95 latency and
+    the share of timeouts, 429s and connection resets. While both stay under
+    target and the limiter is saturated it adds `increase` slots; when
+    either goes over it multiplies the limit by `backoff`.
+
+    Use it anywhere an `asyncio.Semaphore` was used (`async with limiter:`)
+    and attach `trace_config()` to the ClientSession so it sees every request.
+    """
+
+    def __init__(self, initial: int = 20, min_limit: int = 4, max_limit: int = 200,
+                 window: int = 50, target_p95: float = 5.0, max_error_rate: float = 0.05,
+                 increase: int = 2, backoff: float = 0.7):
+        self.min_limit = min_limit
+        self.max_limit = max_limit
+        self.limit = max(min_limit, min(initial, max_limit))
+        self.window = window
+        self.target_p95 = target_p95
+        self.max_error_rate = max_error_rate
+        self.increase = increase
+        self.backoff = backoff
+
+        self._in_flight = 0
+        self._peak_in_flight = 0
+        self._waiters = deque()
+        self._latencies = []
+        self._errors = 0
+
+        self.history: List[int] = [self.limit]
+        self.stats = {
+            'requests': 0,
+            TIMEOUT: 0,
+            RATE_LIMITED: 0,
+            CONNECTION_RESET: 0,
+            ERROR: 0,
+            'increases': 0,
+            'backoffs': 0,
+        }
+
+    async def acquire(self):
+        """Wait for a free slot."""
+        while self._in_flight >= self.limit:
+            waiter = asyncio.get_running_loop().create_future()
+            self._waiters.append(waiter)
+            try:
+                await waiter
+            except asyncio.CancelledError:
+                if waiter in self._waiters:
+                    self._waiters.remove(waiter)
+                raise
+
+        self._in_flight += 1
+        self._peak_in_flight = max(self._peak_in_flight, self._in_flight)
+
+    def release(self):
+        """Free a slot and wake as many waiters as the limit allows."""
+        self._in_flight -= 1
+        self._wake_waiters()
+
+    async def __aenter__(self):
+        await self.acquire()
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        self.release()
+
+    def observe(self, latency: float, outcome: Optional[str] = None):
+        """
+        Record one finished request.
+
+        Args:
+            latency: Request latency in seconds
+            outcome: None for a healthy response, else TIMEOUT, RATE_LIMITED,
+                CONNECTION_RESET or ERROR
+        """
+        self.stats['requests'] += 1
+        self._latencies.append(latency)
+
+        if outcome:
+            self.stats[outcome] += 1
+            if outcome in (TIMEOUT, RATE_LIMITED, CONNECTION_RESET):
+                self._errors += 1
+
+        if len(self._latencies) >= self.window:
+            self._adjust()
+
+    def _adjust(self):
+        """Apply one AIMD step from the current window."""
+        p95 = _percentile(self._latencies, 95)
+        error_rate = self._errors / len(self._latencies)
+        saturated = self._peak_in_flight >= self.limit * 0.8
+
+        if error_rate > self.max_error_rate or p95 > self.target_p95:
+            new_limit = max(self.min_limit, int(self.limit * self.backoff))
+            if new_limit < self.limit:
+                self.stats['backoffs'] += 1
+                print(f"  🔻 Concurrency {self.limit} → {new_limit} "
+                      f"(p95 {p95:.2f}s, errors {error_rate:.0%})")
+            self.limit = new_limit
+        elif saturated and self.limit < self.max_limit:
+            self.limit = min(self.max_limit, self.limit + self.increase)
+            self.stats['increases'] += 1
+            self._wake_waiters()
+
+        self.history.append(self.limit)
+        self._latencies = []
+        self._errors = 0
+        self._peak_in_flight = self._in_flight
+
+    def _wake_waiters(self):
+        free = self.limit - self._in_flight
+        while free > 0 and self._waiters:
+            waiter = self._waiters.popleft()
+            if not waiter.done():
+                waiter.set_result(None)
+                free -= 1
+
+    def settled_limit(self) -> int:
+        """Median limit over the last ten windows (what the run settled on)."""
+        return int(statistics.median(self.history[-10:]))
+
+    def summary(self) -> str:
+        """One-line summary for the end-of-run log."""
+        return (f"settled at {self.settled_limit()} concurrent "
+                f"(range {min(self.history)}-{max(self.history)}, "
+                f"{self.stats['increases']} increases, {self.stats['backoffs']} backoffs, "
+                f"{self.stats['requests']} requests, {self.stats[TIMEOUT]} timeouts, "
+                f"{self.stats[RATE_LIMITED]} 429s, {self.stats[CONNECTION_RESET]} resets)")
+
+    def trace_config(self) -> aiohttp.TraceConfig:
+        """TraceConfig that feeds every request on a session into `observe`."""
+        trace_config = aiohttp.TraceConfig()
+
+        async def on_request_start(session, ctx, params):
+            ctx.started_at = time.monotonic()
+
+        async def on_request_end(session, ctx, params):
+            outcome = RATE_LIMITED if params.response.status == 429 else None
+            self.observe(time.monotonic() - ctx.started_at, outcome)
+
+        async def on_request_exception(session, ctx, params):
+            self.observe(time.monotonic() - ctx.started_at, classify_exception(params.exception))
+
+        trace_config.on_request_start.append(on_request_start)
+        trace_config.on_request_end.append(on_request_end)
+        trace_config.on_request_exception.append(on_request_exception)
+        return trace_config
+
+
+def classify_exception(exc: BaseException) -> str:
+    """Map a request exception to a limiter outcome."""
+    if isinstance(exc, (asyncio.TimeoutError, aiohttp.ServerTimeoutError)):
+        return TIMEOUT
+    if isinstance(exc, aiohttp.ClientConnectorError):
+        # DNS failures and refused connections say the domain is dead, not that we're congested
+        return ERROR
+    if isinstance(exc, (aiohttp.ServerDisconnectedError, aiohttp.ClientOSError,
+                        ConnectionResetError)):
+        return CONNECTION_RESET
+    return ERROR
+
+
+def _percentile(values: List[float], pct: float) -> float:
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))
+    return ordered[index]
+
+
+def add_concurrency_arguments(parser):
+    """Add adaptive concurrency options to an argparse parser."""
+    parser.add_argument('--adaptive', action='store_true',
+                        help='Adapt concurrency to latency/error rate (AIMD), starting at --concurrent')
+    parser.add_argument('--min-concurrent', type=int, default=4,
+                        help='Lowest concurrency --adaptive may back off to (default: 4)')
+    parser.add_argument('--max-concurrent', type=int, default=200,
+                        help='Highest concurrency --adaptive may grow to (default: 200)')
+    parser.add_argument('--target-p95', type=float, default=5.0,
+                        help='p95 request latency (s) above which --adaptive backs off (default: 5.0)')
+    parser.add_argument('--max-error-rate', type=float, default=0.05,
+                        help='Timeout/429/reset share above which --adaptive backs off (default: 0.05)')
+
+
+def limiter_from_args(args) -> Optional[AdaptiveLimiter]:
+    """Build the run's AdaptiveLimiter, or None when --adaptive is off."""
+    if not args.adaptive:
+        return None
+
+    return AdaptiveLimiter(
+        initial=args.concurrent,
+        min_limit=args.min_concurrent,
+        max_limit=args.max_concurrent,
+        target_p95=args.target_p95,
+        max_error_rate=args.max_error_rate,
+    )
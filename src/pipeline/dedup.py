@@ -0,0 +1,79 @@
+"""Memory-bounded deduplication of input domains against the database."""
+
+from typing import Any, Dict, Iterable, Iterator, List
+
+from database.models import ShopifyStore
+from database.negative_cache import find_negative_domains
+from utils.bloom import ScalableBloomFilter
+
+
+class DomainDeduplicator:
+    """
+    Lazily drop domains that don't need processing.
+
+    Input is consumed in chunks; each chunk is checked against the stores
+    table (and unexpired negative results) with one indexed IN-query, so
+    nothing is loaded wholesale from the database. Repeats within the input
+    are caught by a scalable Bloom filter, which costs a few bytes per
+    domain instead of a Python set entry.
+    """
+
+    def __init__(self, session, chunk_size: int = 500, skip_negatives: bool = True):
+        self.session = session
+        self.chunk_size = chunk_size
+        self.skip_negatives = skip_negatives
+        self.seen = ScalableBloomFilter()
+
+        self.stats = {
+            'read': 0,
+            'existing': 0,
+            'negative': 0,
+            'duplicate': 0,
+            'new': 0,
+        }
+
+    def filter(self, stores: Iterable[Dict[str, Any]]) -> Iterator[Dict[str, Any]]:
+        """Yield only stores that are new, not known-negative and not repeated."""
+        chunk = []
+        for store_data in stores:
+            chunk.append(store_data)
+            if len(chunk) >= self.chunk_size:
+                yield from self._filter_chunk(chunk)
+                chunk = []
+
+        if chunk:
+            yield from self._filter_chunk(chunk)
+
+    def _filter_chunk(self, chunk: List[Dict[str, Any]]) -> Iterator[Dict[str, Any]]:
+        self.stats['read'] += len(chunk)
+        domains = list(set(s['domain'] for s in chunk))
+
+        existing = set(
+            domain for (domain,) in
+            self.session.query(ShopifyStore.domain).filter(ShopifyStore.domain.in_(domains))
+        )
+        negative = find_negative_domains(self.session, domains) if self.skip_negatives else set()
+
+        for store_data in chunk:
+            domain = store_data['domain']
+
+            if domain in existing:
+                self.stats['existing'] += 1
+            elif domain in negative:
+                self.stats['negative'] += 1
+            elif domain in self.seen:
+                self.stats['duplicate'] += 1
+            else:
+                self.seen.add(domain)
+                self.stats['new'] += 1
+                yield store_data
+
+    def print_summary(self):
+        """Print what was read, what was skipped and why."""
+        print(f"📥 Read {self.stats['read']} input domains, {self.stats['new']} new")
+        if self.stats['existing']:
+            print(f"⏭️  Skipped {self.stats['existing']} already-processed stores")
+        if self.stats['negative']:
+            print(f"⏭️  Skipped {self.stats['negative']} known non-Shopify/unreachable domains")
+        if self.stats['duplicate']:
+            print(f"⏭️  Skipped {self.stats['duplicate']} duplicate domains in input")
@@ -0,0 +1,114 @@
+"""Long-lived, tuned HTTP connection pool shared by the async detector and scraper."""
+
+import ssl
+from typing import Dict, List, Optional
+
+import aiohttp
+
+from pipeline.resolver import AiohttpResolver, AsyncResolver
+
+DEFAULT_HEADERS = {
+    'User-Agent': 'Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36'
+}
+
+
+class ConnectionPoolConfig:
+    """
+    Connector settings for one discovery run.
+
+    A run makes up to ~13 requests per store against the same host, so the
+    pool is sized to keep those connections (and their TLS state) alive
+    instead of re-resolving and re-handshaking for every request.
+    """
+
+    def __init__(self, limit: int = 100, limit_per_host: int = 8,
+                 dns_cache_ttl: int = 300, keepalive_timeout: float = 30.0,
+                 tls_reuse: bool = True):
+        self.limit = limit
+        self.limit_per_host = limit_per_host
+        self.dns_cache_ttl = dns_cache_ttl
+        self.keepalive_timeout = keepalive_timeout
+        self.tls_reuse = tls_reuse
+
+    @classmethod
+    def from_args(cls, args) -> 'ConnectionPoolConfig':
+        """Build config from parsed CLI args (see `add_pool_arguments`)."""
+        peak_concurrency = args.max_concurrent if args.adaptive else args.concurrent
+        limit = args.pool_limit or max(100, peak_concurrency * 2)
+        return cls(
+            limit=limit,
+            limit_per_host=args.pool_limit_per_host,
+            dns_cache_ttl=args.dns_cache_ttl,
+            keepalive_timeout=args.keepalive_timeout,
+            tls_reuse=not args.no_tls_reuse,
+        )
+
+    def describe(self) -> str:
+        """One-line summary for run logs."""
+        return (f"limit={self.limit}, per_host={self.limit_per_host}, "
+                f"dns_ttl={self.dns_cache_ttl}s, keepalive={self.keepalive_timeout}s, "
+                f"tls_reuse={'on' if self.tls_reuse else 'off'}")
+
+
+def create_connector(config: ConnectionPoolConfig,
+                     resolver: Optional[AsyncResolver] = None) -> aiohttp.TCPConnector:
+    """
+    Create a TCP connector from config.
+
+    With TLS reuse on, every connection shares one SSL context and idle
+    connections are kept alive, so repeat requests to a store skip both the
+    TCP and the TLS handshake. With it off, connections are closed after each
+    request (useful when debugging misbehaving servers).
+
+    With a shared `resolver` (pipeline.resolver.AsyncResolver), lookups go
+    through it and its TTL-aware cache instead of aiohttp's threaded
+    resolver and fixed-TTL cache.
+    """
+    if resolver is not None:
+        dns = {'resolver': AiohttpResolver(resolver), 'use_dns_cache': False}
+    else:
+        dns = {'use_dns_cache': True, 'ttl_dns_cache': config.dns_cache_ttl}
+
+    if config.tls_reuse:
+        return aiohttp.TCPConnector(
+            limit=config.limit,
+            limit_per_host=config.limit_per_host,
+            keepalive_timeout=config.keepalive_timeout,
+            ssl=ssl.create_default_context(),
+            **dns,
+        )
+
+    return aiohttp.TCPConnector(
+        limit=config.limit,
+        limit_per_host=config.limit_per_host,
+        force_close=True,
+        **dns,
+    )
+
+
+def create_session(config: Optional[ConnectionPoolConfig] = None,
+                   headers: Optional[Dict[str, str]] = None,
+                   trace_configs: Optional[List[aiohttp.TraceConfig]] = None,
+                   resolver: Optional[AsyncResolver] = None) -> aiohttp.ClientSession:
+    """Create the run-wide ClientSession backed by a tuned connector."""
+    config = config or ConnectionPoolConfig()
+
+    return aiohttp.ClientSession(
+        connector=create_connector(config, resolver),
+        headers=headers or DEFAULT_HEADERS,
+        trace_configs=trace_configs,
+    )
+
+
+def add_pool_arguments(parser):
+    """Add connection pool options to an argparse parser."""
+    parser.add_argument('--pool-limit', type=int, default=None,
+                        help='Max open connections in total (default: max(100, 2x peak concurrency))')
+    parser.add_argument('--pool-limit-per-host', type=int, default=8,
+                        help='Max open connections per host (default: 8)')
+    parser.add_argument('--dns-cache-ttl', type=int, default=300,
+                        help='Seconds to cache DNS answers that carry no TTL (default: 300)')
+    parser.add_argument('--keepalive-timeout', type=float, default=30.0,
+                        help='Seconds to keep idle connections open (default: 30)')
+    parser.add_argument('--no-tls-reuse', action='store_true',
+                        help='Close connections after each request instead of reusing them')
@@ -0,0 +1,95 @@
+"""Per-run checkpoint journal so long discovery runs can be resumed."""
+
+import json
+import os
+import time
+from typing import Any, Dict, Iterable, Iterator, List, Set
+
+
+class RunJournal:
+    """
+    Append-only JSONL record of every domain that reached a terminal state.
+
+    The StoreWriter appends a line per domain only after the transaction
+    holding its result has committed, and fsyncs once per transaction, so
+    the journal never claims more than the database holds. A crash can at
+    worst cut the last line short; `load` ignores it.
+
+    With `resume=True` the existing journal is read and extended (after
+    cutting off any partial last line, so new entries start on a line of
+    their own); otherwise it is started over.
+    """
+
+    def __init__(self, path: str, resume: bool = False):
+        self.path = path
+        if resume:
+            self._drop_partial_line(path)
+        self.done: Set[str] = self.load(path) if resume else set()
+        self.skipped = 0
+
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._file = open(path, 'a' if resume else 'w', encoding='utf-8')
+
+    @staticmethod
+    def _drop_partial_line(path: str, chunk_size: int = 65536):
+        """Truncate the journal after its last newline (a killed run may have cut a line short)."""
+        if not os.path.exists(path):
+            return
+
+        with open(path, 'rb+') as f:
+            end = f.seek(0, os.SEEK_END)
+            position = end
+            while position > 0:
+                start = max(position - chunk_size, 0)
+                f.seek(start)
+                newline = f.read(position - start).rfind(b'\n')
+                if newline != -1:
+                    position = start + newline + 1
+                    break
+                position = start
+
+            if position != end:
+                f.truncate(position)
+
+    @staticmethod
+    def load(path: str) -> Set[str]:
+        """Domains already recorded in the journal at `path` (empty if missing)."""
+        done = set()
+        if not os.path.exists(path):
+            return done
+
+        with open(path, encoding='utf-8') as f:
+            for line in f:
+                try:
+                    done.add(json.loads(line)['domain'])
+                except (ValueError, KeyError):
+                    continue  # Partial line from an interrupted write
+
+        return done
+
+    def skip_done(self, stores: Iterable[Dict[str, Any]]) -> Iterator[Dict[str, Any]]:
+        """Yield only stores the journal hasn't seen finish."""
+        for store_data in stores:
+            if store_data['domain'] in self.done:
+                self.skipped += 1
+                continue
+            yield store_data
+
+    def record(self, entries: List[Dict[str, str]]):
+        """Append terminal states (`domain`, `state`) and force them to disk."""
+        if not entries:
+            return
+
+        now = round(time.time(), 3)
+        for entry in entries:
+            self._file.write(json.dumps({**entry, 't': now}) + '\n')
+            self.done.add(entry['domain'])
+
+        self._file.flush()
+        os.fsync(self._file.fileno())
+
+    def close(self):
+        if not self._file.closed:
+            self._file.close()
@@ -0,0 +1,119 @@
+"""Run CPU-bound parsing off the event loop, and measure how late the loop runs."""
+
+import asyncio
+import collections
+import multiprocessing
+import os
+import time
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Any, Callable, Optional
+
+from utils.html_parser import get_parser, set_parser
+
+# Supported --parse-pool modes
+PARSE_POOLS = ('process', 'thread', 'inline')
+
+
+class ParseOffloader:
+    """
+    Run extraction functions in a process pool, a thread pool, or inline.
+
+    The async side only awaits results, so sockets keep being served while a
+    large page is parsed. Functions must be module-level and take and return
+    picklable values (see scrapers.extractors).
+
+    `extract(page, fn)` also memoizes the result on the page, so the
+    detector and scraper share one parse of the same page.
+    """
+
+    def __init__(self, mode: str = 'process', workers: Optional[int] = None):
+        if mode not in PARSE_POOLS:
+            raise ValueError(f"Unknown parse pool {mode!r} (expected one of {', '.join(PARSE_POOLS)})")
+
+        self.mode = mode
+        self.workers = workers or os.cpu_count() or 1
+        self._executor: Optional[Executor] = None
+
+        if mode == 'process':
+            # Spawn: workers must not inherit the parent's sockets, DB connections or threads.
+            # They start fresh, so hand them this process's HTML parser choice.
+            self._executor = ProcessPoolExecutor(max_workers=self.workers,
+                                                 mp_context=multiprocessing.get_context('spawn'),
+                                                 initializer=set_parser, initargs=(get_parser(),))
+        elif mode == 'thread':
+            self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix='parse')
+
+    @classmethod
+    def from_args(cls, args) -> 'ParseOffloader':
+        return cls(args.parse_pool, args.parse_workers)
+
+    def describe(self) -> str:
+        if self.mode == 'inline':
+            return f'inline (on the event loop), {get_parser()}'
+        return f'{self.mode} pool, {self.workers} workers, {get_parser()}'
+
+    async def run(self, fn: Callable, *args) -> Any:
+        """Call `fn(*args)` in the pool and await the result."""
+        if self._executor is None:
+            return fn(*args)
+        return await asyncio.get_running_loop().run_in_executor(self._executor, fn, *args)
+
+    async def extract(self, page, fn: Callable[[str], Any]) -> Any:
+        """`fn(page.text)`, computed once per page and function."""
+        task = page.derived.get(fn)
+        if task is None or task.cancelled():
+            task = asyncio.ensure_future(self.run(fn, page.text))
+            page.derived[fn] = task
+        return await task
+
+    def close(self):
+        if self._executor is not None:
+            self._executor.shutdown(wait=True, cancel_futures=True)
+            self._executor = None
+
+
+# Shared default: callers that don't pass an offloader parse inline
+INLINE = ParseOffloader('inline')
+
+
+class LoopLagMonitor:
+    """
+    Measure event-loop lag: how late a periodic timer fires.
+
+    Lag is time the loop spent on something else (parsing, blocking calls)
+    while ready sockets and timers waited.
+    """
+
+    def __init__(self, interval: float = 0.1, window: int = 1000):
+        self.interval = interval
+        self.samples = collections.deque(maxlen=window)
+        self.max_lag = 0.0
+        self._task = None
+
+    def start(self) -> 'LoopLagMonitor':
+        self._task = asyncio.ensure_future(self._run())
+        return self
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+
+    async def _run(self):
+        while True:
+            started = time.perf_counter()
+            await asyncio.sleep(self.interval)
+            lag = max(time.perf_counter() - started - self.interval, 0.0)
+            self.samples.append(lag)
+            self.max_lag = max(self.max_lag, lag)
+
+    def percentile(self, q: float) -> float:
+        if not self.samples:
+            return 0.0
+        ordered = sorted(self.samples)
+        return ordered[min(int(len(ordered) * q), len(ordered) - 1)]
+
+    def summary(self) -> str:
+        return (f"p50 {self.percentile(0.5) * 1000:.1f}ms, p95 {self.percentile(0.95) * 1000:.1f}ms, "
+                f"max {self.max_lag * 1000:.1f}ms")
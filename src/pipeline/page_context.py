@@ -0,0 +1,254 @@
+"""Per-domain page context: fetch each URL once and share it across detection and scraping."""
+
+import asyncio
+import codecs
+import inspect
+from typing import Any, Callable, Dict, List, Optional
+
+import aiohttp
+from bs4 import BeautifulSoup
+
+from pipeline.response_cache import ResponseCache
+from utils.html_parser import make_soup
+
+# Bytes per read when streaming a body (see PageContext.peek)
+STREAM_CHUNK = 16 * 1024
+
+
+class PageNotStored(aiohttp.ClientError):
+    """An offline context was asked for a page its store never fetched."""
+
+
+class Page:
+    """One fetched page. The parsed tree is built on first use and then shared."""
+
+    def __init__(self, url: str, status: int, body: bytes, text: str, headers=None, truncated: bool = False):
+        self.url = url
+        self.status = status
+        self.body = body
+        self.text = text
+        self.headers = headers or {}
+        # Only a prefix of the body was read (see PageContext.peek)
+        self.truncated = truncated
+        self._soup = None
+        self._lower = None
+        # Results derived from this page (see ParseOffloader.extract)
+        self.derived: Dict[Any, Any] = {}
+
+    @property
+    def ok(self) -> bool:
+        return self.status == 200
+
+    @property
+    def soup(self) -> BeautifulSoup:
+        """Parsed HTML (parsed once, shared by every extraction step)."""
+        if self._soup is None:
+            self._soup = make_soup(self.text)
+        return self._soup
+
+    @property
+    def lower_text(self) -> str:
+        """Lower-cased HTML, computed once."""
+        if self._lower is None:
+            self._lower = self.text.lower()
+        return self._lower
+
+
+class PageContext:
+    """
+    Fetch cache for a single store.
+
+    The detector and every scraper step ask the context for pages instead of
+    calling the session directly, so the homepage is downloaded and parsed
+    once per store rather than once per step. Failed fetches are cached too:
+    asking again re-raises the original error without another request.
+
+    With a `cache` (pipeline.response_cache.ResponseCache), fresh cached
+    responses are served without a request, and every complete response is
+    queued for its writer thread (`put_async`), off the event loop.
+
+    With an `archive` (pipeline.warc.WarcWriter), every downloaded page is
+    also archived as WARC records.
+
+    Without a session the context is offline (see pipeline.reextract): every
+    page comes from `cache` (stale or not, or a pipeline.warc.WarcPages), and
+    a page that was never stored fails with PageNotStored.
+    """
+
+    def __init__(self, session: Optional[aiohttp.ClientSession], domain: str, timeout: int = 10,
+                 cache: Optional[ResponseCache] = None, archive=None):
+        if not domain.startswith('http'):
+            domain = f'https://{domain}'
+
+        self.session = session
+        self.base_url = domain.rstrip('/')
+        self.timeout = aiohttp.ClientTimeout(total=timeout)
+        self.cache = cache
+        self.archive = archive
+        self._fetches: Dict[str, asyncio.Task] = {}
+
+        self.stats = {'requests': 0, 'reused': 0, 'cached': 0}
+
+    def url(self, path: str = '') -> str:
+        """Absolute URL for a path on this store."""
+        return f'{self.base_url}{path}' if path else self.base_url
+
+    async def fetch(self, url: str, timeout: Optional[aiohttp.ClientTimeout] = None) -> Page:
+        """
+        Fetch a URL (at most once per context).
+
+        Raises the fetch error (timeout, connection error, ...) if it failed.
+        """
+        task = self._fetches.get(url)
+        if task is None or task.cancelled():
+            # A cancelled fetch (lost probe, blown time budget) is retried
+            task = asyncio.ensure_future(self._fetch(url, timeout or self.timeout))
+            self._fetches[url] = task
+        else:
+            self.stats['reused'] += 1
+
+        return await task
+
+    async def peek(self, url: str, scan: Callable[[str, int], bool],
+                   timeout: Optional[aiohttp.ClientTimeout] = None) -> Page:
+        """
+        Fetch a URL, streaming the body and stopping as soon as `scan` says so.
+
+        `scan(text, size)` is called with each decoded chunk and the bytes read
+        so far, and returns True to stop reading. A page read to the end is
+        cached exactly as `fetch` would cache it. A page cut short has
+        `truncated` set and is not cached, so a later `fetch` downloads it
+        in full. An already fetched page is returned as is.
+        """
+        task = self._fetches.get(url)
+        if task is not None and not task.cancelled():
+            self.stats['reused'] += 1
+            return await task
+
+        task = asyncio.ensure_future(self._fetch(url, timeout or self.timeout, scan))
+        self._fetches[url] = task
+        page = await task
+        if page.truncated and self._fetches.get(url) is task:
+            del self._fetches[url]
+        return page
+
+    async def homepage(self, timeout: Optional[aiohttp.ClientTimeout] = None) -> Page:
+        """Fetch the store homepage."""
+        return await self.fetch(self.base_url, timeout)
+
+    async def first_hit(self, urls: List[str], accept: Callable[[Page], Any],
+                        timeout: Optional[aiohttp.ClientTimeout] = None,
+                        budget: Optional[float] = None) -> Any:
+        """
+        Probe candidate URLs concurrently and return the first useful result.
+
+        `accept(page)` returns a truthy value for a useful page (it may be a
+        coroutine function, e.g. one awaiting an offloaded parse). As soon as one
+        page is accepted the remaining requests are cancelled, so latency is
+        bounded by the fastest useful page rather than the sum of the misses.
+
+        Args:
+            urls: Candidate URLs (earlier ones win ties)
+            accept: Called with each fetched page; return a truthy result to stop
+            timeout: Per-request timeout
+            budget: Seconds to wait for a hit across all candidates
+
+        Returns:
+            The first truthy `accept` result, or None
+        """
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + budget if budget else None
+
+        order = {url: i for i, url in enumerate(urls)}
+        tasks = {asyncio.ensure_future(self.fetch(url, timeout)): url for url in urls}
+        pending = set(tasks)
+
+        try:
+            while pending:
+                remaining = deadline - loop.time() if deadline else None
+                if remaining is not None and remaining <= 0:
+                    return None
+
+                done, pending = await asyncio.wait(pending, timeout=remaining,
+                                                   return_when=asyncio.FIRST_COMPLETED)
+
+                for task in sorted(done, key=lambda t: order[tasks[t]]):
+                    if task.cancelled() or task.exception() is not None:
+                        continue
+                    result = accept(task.result())
+                    if inspect.isawaitable(result):
+                        result = await result
+                    if result:
+                        return result
+
+            return None
+
+        finally:
+            for task in pending:
+                task.cancel()
+            if pending:
+                await asyncio.gather(*pending, return_exceptions=True)
+            # Failures that finished alongside the hit were never looked at
+            for task in tasks:
+                if not task.cancelled():
+                    task.exception()
+
+            # Forget cancelled fetches so a later fetch of the same URL retries
+            for url in urls:
+                fetch = self._fetches.get(url)
+                if fetch is not None and fetch.cancelled():
+                    del self._fetches[url]
+
+    async def _fetch(self, url: str, timeout: aiohttp.ClientTimeout,
+                     scan: Optional[Callable[[str, int], bool]] = None) -> Page:
+        if self.cache is not None:
+            cached = self.cache.get(url, stale=self.session is None)
+            if cached is not None:
+                self.stats['cached'] += 1
+                return Page(url, cached.status, cached.body, cached.text, cached.headers)
+
+        if self.session is None:
+            raise PageNotStored(url)
+
+        self.stats['requests'] += 1
+        page = await self._download(url, timeout, scan)
+        if self.cache is not None and not page.truncated:
+            await self.cache.put_async(url, page.status, page.headers, page.body)
+        if self.archive is not None:
+            await self.archive.write_async(url, page.status, page.headers, page.body, self.session.headers,
+                                           page.truncated)
+        return page
+
+    async def _download(self, url: str, timeout: aiohttp.ClientTimeout,
+                        scan: Optional[Callable[[str, int], bool]] = None) -> Page:
+        async with self.session.get(url, timeout=timeout, allow_redirects=True) as response:
+            if scan is None:
+                body = await response.read()
+                text = await response.text(errors='replace')
+                return Page(url, response.status, body, text, dict(response.headers))
+
+            encoding = _stream_encoding(response)
+            decoder = codecs.getincrementaldecoder(encoding)(errors='replace')
+            chunks, texts, size = [], [], 0
+            truncated = False
+
+            async for chunk in response.content.iter_chunked(STREAM_CHUNK):
+                chunks.append(chunk)
+                size += len(chunk)
+                texts.append(decoder.decode(chunk))
+                if scan(texts[-1], size):
+                    truncated = not response.content.at_eof()
+                    break
+
+            # Leaving the block early drops the connection instead of reading the rest
+            body = b''.join(chunks)
+            text = ''.join(texts) if truncated else body.decode(encoding, errors='replace')
+            return Page(url, response.status, body, text, dict(response.headers), truncated=truncated)
+
+
+def _stream_encoding(response: aiohttp.ClientResponse) -> str:
+    """The response charset, or UTF-8 when the headers don't say (no body to sniff yet)."""
+    try:
+        return response.get_encoding()
+    except RuntimeError:
+        return 'utf-8'
@@ -0,0 +1,107 @@
+"""DNS pre-screen: resolve candidate domains before any HTTP request is made."""
+
+import re
+from typing import Any, Dict, Optional
+
+from pipeline.resolver import AsyncResolver, NXDOMAIN as LOOKUP_NXDOMAIN
+from utils.cidr_index import CidrIndex, load_shopify_index
+
+# Canonical names that only Shopify storefronts point at
+SHOPIFY_CNAME_SUFFIXES = ('myshopify.com',)
+
+# Canonical names of domain parking / for-sale services
+PARKING_CNAME_SUFFIXES = (
+    'sedoparking.com',
+    'parkingcrew.net',
+    'bodis.com',
+    'above.com',
+    'parklogic.com',
+    'dan.com',
+    'afternic.com',
+    'hugedomains.com',
+    'undeveloped.com',
+)
+
+# Verdicts
+NXDOMAIN = 'nxdomain'      # no such domain: drop
+PARKED = 'parked'          # points at a parking service: drop
+SHOPIFY = 'shopify'        # points at Shopify: high confidence before any HTTP
+RESOLVED = 'resolved'      # resolves somewhere else: needs HTML detection
+UNRESOLVED = 'unresolved'  # temporary failure or timeout: let HTML detection try
+
+
+def _hostname(domain: str) -> str:
+    """Bare host name from a domain or URL."""
+    host = re.sub(r'^https?://', '', domain.strip().lower())
+    return host.split('/', 1)[0].split(':', 1)[0].rstrip('.')
+
+
+def _has_suffix(name: str, suffixes) -> bool:
+    return any(name == suffix or name.endswith('.' + suffix) for suffix in suffixes)
+
+
+class DnsPrescreen:
+    """
+    Resolve domains in bulk and sort them before HTTP detection.
+
+    Lookups go through the run's shared pipeline.resolver.AsyncResolver, so
+    each name is resolved once for the pre-screen and the HTTP requests
+    after it. NXDOMAIN and parked domains can be dropped straight away.
+    Domains whose canonical name is a myshopify.com host, or that resolve
+    into Shopify's own address space, are high-confidence Shopify stores, so
+    detection only has to settle Plus. Everything else goes through HTML
+    detection.
+
+    Addresses are matched against a utils.cidr_index.CidrIndex (the prebuilt
+    Shopify/Fastly index by default). Only blocks labelled owner='shopify'
+    count as evidence: Fastly (AS54113) is shared with other customers, so
+    its block is only reported as 'network'.
+    """
+
+    def __init__(self, resolver: Optional[AsyncResolver] = None, index: Optional[CidrIndex] = None):
+        self.resolver = resolver if resolver is not None else AsyncResolver()
+        self.index = index if index is not None else load_shopify_index()
+
+        self.stats = {NXDOMAIN: 0, PARKED: 0, SHOPIFY: 0, RESOLVED: 0, UNRESOLVED: 0}
+
+    def describe(self) -> str:
+        return f'IP index {self.index.describe()}'
+
+    async def screen(self, domain: str) -> Dict[str, Any]:
+        """
+        Resolve a domain and classify it.
+
+        Returns:
+            dict with 'verdict', 'canonical', 'addresses', the indexed block
+            of the first known address as 'network' (if any) and, for
+            Shopify, 'evidence' ('cname:<name>' or 'ip:<address>')
+        """
+        host = _hostname(domain)
+        entry = await self.resolver.resolve(host)
+        result = {'verdict': UNRESOLVED, 'canonical': entry['canonical'], 'addresses': entry['addresses']}
+
+        if entry['error'] == LOOKUP_NXDOMAIN:
+            result['verdict'] = NXDOMAIN
+        elif not entry['error']:
+            result['verdict'] = RESOLVED
+            canonical = entry['canonical']
+            if canonical and _has_suffix(canonical, PARKING_CNAME_SUFFIXES):
+                result['verdict'] = PARKED
+            elif canonical and canonical != host and _has_suffix(canonical, SHOPIFY_CNAME_SUFFIXES):
+                result.update(verdict=SHOPIFY, evidence=f'cname:{canonical}')
+
+            for address in entry['addresses']:
+                block = self.index.lookup(address)
+                if block is None:
+                    continue
+                network = f"{block['network']} ({block['asn']})"
+                result.setdefault('network', network)
+                if block.get('owner') == 'shopify' and result['verdict'] == RESOLVED:
+                    result.update(verdict=SHOPIFY, evidence=f'ip:{address}', network=network)
+                    break
+
+        self.stats[result['verdict']] += 1
+        return result
+
+    def summary(self) -> str:
+        return ', '.join(f'{count} {verdict}' for verdict, count in self.stats.items())
@@ -0,0 +1,210 @@
+"""
+Offline re-extraction: rerun detection and scraping over stored pages.
+
+Pages come from a response cache directory (pipeline.response_cache) or WARC
+archives (pipeline.warc), never the network: each store gets an offline
+PageContext, so the detector and scraper run unchanged and a page that was
+never stored simply counts as a failed fetch. Stores are handed to a process
+pool in chunks, each worker replaying its chunk on its own event loop, and
+only the columns whose extracted value changed are written back, with one
+bulk UPDATE per chunk.
+"""
+
+import asyncio
+import multiprocessing
+import os
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from datetime import datetime
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+from database.models import ShopifyStore
+from detectors.async_shopify_detector import AsyncShopifyDetector
+from pipeline.page_context import PageContext, PageNotStored
+from pipeline.response_cache import ResponseCache
+from pipeline.warc import WarcPages
+from scrapers.async_store_scraper import AsyncStoreScraper
+from utils.html_parser import get_parser, set_parser
+
+# Scraped columns, updated when re-extraction finds a (different) value
+CONTACT_COLUMNS = ['email', 'phone', 'street_address', 'city', 'state', 'zip_code', 'country']
+
+# Every column re-extraction may write
+REEXTRACT_COLUMNS = ['company_name', *CONTACT_COLUMNS, 'is_shopify_plus', 'plus_signals']
+
+# Page source of the current worker process (see _init_worker)
+_pages = None
+
+
+def open_pages(source: Tuple[str, Any]):
+    """Stored pages for ('cache', directory) or ('warc', [paths])."""
+    kind, location = source
+    if kind == 'warc':
+        return WarcPages(location)
+    if not os.path.exists(os.path.join(location, 'index.sqlite')):
+        raise ValueError(f'No response cache in {location}')
+    return ResponseCache(location, touch=False)
+
+
+async def reextract_domains(pages, domains: List[str], mode: str = 'html') -> List[Dict[str, Any]]:
+    """
+    Detection and scrape results for each domain, from stored pages only.
+
+    A result is {'domain', 'missing': True} when the homepage was never
+    stored, else {'domain', 'is_shopify', 'is_plus', 'metadata', 'scraped_data'}.
+    """
+    detector = AsyncShopifyDetector(mode=mode, cache=pages)
+    scraper = AsyncStoreScraper(cache=pages)
+
+    async def reextract(domain: str) -> Dict[str, Any]:
+        context = PageContext(None, domain, cache=pages)
+        try:
+            await context.homepage()
+        except PageNotStored:
+            return {'domain': domain, 'missing': True}
+
+        is_shopify, is_plus, metadata = await detector.detect(None, domain, context=context)
+        scraped_data = await scraper.scrape(None, domain, context=context)
+        return {'domain': domain, 'is_shopify': is_shopify, 'is_plus': is_plus,
+                'metadata': metadata, 'scraped_data': scraped_data}
+
+    return await asyncio.gather(*(reextract(domain) for domain in domains))
+
+
+def _init_worker(parser: str, source: Tuple[str, Any]):
+    global _pages
+    set_parser(parser)
+    _pages = open_pages(source)
+
+
+def _reextract_chunk(domains: List[str], mode: str) -> List[Dict[str, Any]]:
+    return asyncio.run(reextract_domains(_pages, domains, mode))
+
+
+def changed_columns(row: Dict[str, Any], result: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Column updates for a stored row from its re-extraction result.
+
+    Only values that changed are returned. Scraped fields are replaced
+    when a new non-empty value differs (a page that no longer yields a value
+    never blanks a stored one), the company name is only filled in when
+    missing, and the Plus flags follow detection, which never downgrades
+    a store from Shopify.
+    """
+    if result.get('missing'):
+        return {}
+
+    changes = {}
+    scraped_data = result['scraped_data']
+    for column in CONTACT_COLUMNS:
+        value = scraped_data.get(column)
+        if value and value != row[column]:
+            changes[column] = value
+
+    company_name = scraped_data.get('company_name') or result['metadata'].get('shop_name')
+    if company_name and not row['company_name']:
+        changes['company_name'] = company_name
+
+    if result['is_shopify']:
+        if bool(row['is_shopify_plus']) != result['is_plus']:
+            changes['is_shopify_plus'] = result['is_plus']
+        # Discovery doesn't store the signals (NULL): nothing to compare against
+        plus_signals = ','.join(result['metadata'].get('plus_signals', []))
+        if row['plus_signals'] is not None and row['plus_signals'] != plus_signals:
+            changes['plus_signals'] = plus_signals
+
+    return changes
+
+
+class Reextractor:
+    """
+    Re-extract every stored store and bulk-update the columns that changed.
+
+    Stores are read from the database in id order, `chunk_size` at a time,
+    and at most two chunks per worker are in flight, so memory stays flat
+    however large the table is.
+    """
+
+    def __init__(self, session, source: Tuple[str, Any], workers: Optional[int] = None,
+                 chunk_size: int = 200, mode: str = 'html', dry_run: bool = False):
+        self.session = session
+        self.source = source
+        self.workers = workers or os.cpu_count() or 1
+        self.chunk_size = chunk_size
+        self.mode = mode
+        self.dry_run = dry_run
+
+        self.stats = {'checked': 0, 'missing': 0, 'not_detected': 0, 'errors': 0, 'updated': 0}
+        self.changed = {column: 0 for column in REEXTRACT_COLUMNS}
+
+    def run(self, limit: Optional[int] = None, progress=None) -> Dict[str, int]:
+        """Re-extract up to `limit` stores; `progress(stats)` is called after each chunk."""
+        # Spawn, as in ParseOffloader; each worker opens its own view of the pages
+        with ProcessPoolExecutor(max_workers=self.workers,
+                                 mp_context=multiprocessing.get_context('spawn'),
+                                 initializer=_init_worker, initargs=(get_parser(), self.source)) as pool:
+            pending = {}
+            for rows in self._chunks(limit):
+                domains = [row['domain'] for row in rows]
+                pending[pool.submit(_reextract_chunk, domains, self.mode)] = rows
+                if len(pending) >= self.workers * 2:
+                    done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                    for future in done:
+                        self._apply(pending.pop(future), future.result())
+                        if progress:
+                            progress(self.stats)
+
+            for future in list(pending):
+                self._apply(pending.pop(future), future.result())
+                if progress:
+                    progress(self.stats)
+
+        return self.stats
+
+    def _chunks(self, limit: Optional[int]) -> Iterator[List[Dict[str, Any]]]:
+        """Stored rows in id order, keyset-paginated so each chunk is one indexed query."""
+        columns = [ShopifyStore.id, ShopifyStore.domain] + [getattr(ShopifyStore, c) for c in REEXTRACT_COLUMNS]
+        last_id = 0
+        remaining = limit
+        while remaining is None or remaining > 0:
+            size = self.chunk_size if remaining is None else min(self.chunk_size, remaining)
+            rows = (self.session.query(*columns)
+                    .filter(ShopifyStore.id > last_id)
+                    .order_by(ShopifyStore.id)
+                    .limit(size)
+                    .all())
+            if not rows:
+                return
+            last_id = rows[-1].id
+            if remaining is not None:
+                remaining -= len(rows)
+            yield [row._asdict() for row in rows]
+
+    def _apply(self, rows: List[Dict[str, Any]], results: List[Dict[str, Any]]):
+        updates = []
+        now = datetime.utcnow()
+        for row, result in zip(rows, results):
+            self.stats['checked'] += 1
+            if result.get('missing'):
+                self.stats['missing'] += 1
+                continue
+            if result['metadata'].get('error') or result['scraped_data'].get('scrape_error'):
+                self.stats['errors'] += 1
+            if not result['is_shopify']:
+                self.stats['not_detected'] += 1
+
+            changes = changed_columns(row, result)
+            if changes:
+                for column in changes:
+                    self.changed[column] += 1
+                updates.append({'id': row['id'], **changes, 'last_updated': now})
+
+        self.stats['updated'] += len(updates)
+        if updates and not self.dry_run:
+            self.session.bulk_update_mappings(ShopifyStore, updates)
+            self.session.commit()
+
+    def summary(self) -> str:
+        changed = ', '.join(f'{column} {count}' for column, count in self.changed.items() if count)
+        return (f"{self.stats['checked']} stores checked, {self.stats['updated']} "
+                f"{'would change' if self.dry_run else 'updated'}"
+                + (f" ({changed})" if changed else ""))
@@ -0,0 +1,412 @@
+"""
+Shared DNS resolver for detection, the pre-screen and discovery tooling.
+
+At 100+ concurrent domains DNS is a large share of per-domain latency:
+aiohttp's default resolver runs getaddrinfo in a thread pool, the pre-screen
+resolved every name a second time, and the reverse-IP tooling blocked on
+socket.gethostbyname. One AsyncResolver per run now answers all of them:
+
+- answers are cached for their record TTL, clamped to [min_ttl, max_ttl];
+  NXDOMAIN is cached for `negative_ttl`, other failures for `failure_ttl`
+- concurrent lookups of the same name share one query
+- with aiodns installed, queries go straight to c-ares (optionally against
+  `nameservers`) and report real TTLs; otherwise loop.getaddrinfo is used,
+  with `default_ttl` since the system resolver does not expose TTLs
+- `cache_file` warms the cache from earlier runs; `save()` writes it back
+
+`AiohttpResolver` plugs it into a TCPConnector (see pipeline.http_pool) and
+`BlockingResolver` serves synchronous code from a private event loop thread.
+"""
+
+import asyncio
+import ipaddress
+import json
+import os
+import socket
+import threading
+import time
+from typing import Any, Dict, Iterable, List, Optional
+
+from aiohttp.abc import AbstractResolver
+
+try:
+    import aiodns
+except ImportError:
+    aiodns = None
+
+DEFAULT_CACHE_FILE = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))), 'data', 'dns_cache.json'
+)
+
+# Preferred first: `auto` picks the first one that is installed
+RESOLVER_BACKENDS = ['aiodns', 'system']
+
+# Lookup errors
+NXDOMAIN = 'nxdomain'  # the name (or any address for it) does not exist
+FAILED = 'failed'      # timeout, SERVFAIL, refused: worth retrying soon
+
+CACHE_FORMAT_VERSION = 1
+
+# getaddrinfo / c-ares errors meaning the name does not exist (vs. a temporary failure)
+_NO_NAME_ERRORS = {socket.EAI_NONAME, getattr(socket, 'EAI_NODATA', socket.EAI_NONAME)}
+_ARES_NO_NAME_ERRORS = (
+    {aiodns.error.ARES_ENOTFOUND, aiodns.error.ARES_ENODATA, aiodns.error.ARES_ENONAME} if aiodns else set()
+)
+
+
+class _NotFound(Exception):
+    pass
+
+
+def available_backends() -> List[str]:
+    return [name for name in RESOLVER_BACKENDS if name != 'aiodns' or aiodns is not None]
+
+
+def select_backend(name: str = 'auto', nameservers: Optional[List[str]] = None) -> str:
+    """
+    Resolve a backend choice against what is installed.
+
+    Args:
+        name: 'aiodns', 'system' or 'auto' (aiodns if installed)
+        nameservers: upstream servers, which only aiodns can query
+
+    Returns:
+        The backend to use
+    """
+    available = available_backends()
+    if name == 'auto':
+        name = available[0]
+    elif name not in available:
+        raise ValueError(f"DNS backend {name!r} is not available (installed: {', '.join(available)})")
+    if nameservers and name != 'aiodns':
+        raise ValueError('Custom DNS servers need the aiodns backend (pip install aiodns)')
+    return name
+
+
+def _parse_servers(value: Optional[str]) -> List[str]:
+    return [server.strip() for server in value.split(',') if server.strip()] if value else []
+
+
+def _is_address(host: str) -> bool:
+    try:
+        ipaddress.ip_address(host)
+    except ValueError:
+        return False
+    return True
+
+
+class AsyncResolver:
+    """
+    Caching DNS resolver shared by every stage of a run.
+
+    `resolve(host)` returns a cache entry: {'addresses': [...] (IPv4
+    first), 'canonical': end of the CNAME chain or None, 'error': None,
+    NXDOMAIN or FAILED, 'expires': epoch seconds}. It never raises for a
+    lookup failure; callers read 'error'.
+    """
+
+    def __init__(self, nameservers: Optional[List[str]] = None, backend: str = 'auto',
+                 timeout: float = 5.0, concurrency: int = 200, default_ttl: int = 300,
+                 min_ttl: int = 30, max_ttl: int = 3600, negative_ttl: int = 3600,
+                 failure_ttl: int = 30, cache_file: Optional[str] = None):
+        self.backend = select_backend(backend, nameservers)
+        self.nameservers = list(nameservers or [])
+        self.timeout = timeout
+        self.concurrency = concurrency
+        self.default_ttl = default_ttl
+        self.min_ttl = min_ttl
+        self.max_ttl = max_ttl
+        self.negative_ttl = negative_ttl
+        self.failure_ttl = failure_ttl
+        self.cache_file = cache_file
+
+        self._cache: Dict[str, Dict[str, Any]] = {}
+        self._pending: Dict[str, asyncio.Future] = {}
+        # Bound to the running loop on first use
+        self._semaphore: Optional[asyncio.Semaphore] = None
+        self._channel = None
+
+        self.stats = {'hits': 0, 'shared': 0, 'lookups': 0, NXDOMAIN: 0, FAILED: 0, 'warm': 0}
+
+        if cache_file:
+            self.stats['warm'] = self.load(cache_file)
+
+    @classmethod
+    def from_args(cls, args) -> 'AsyncResolver':
+        """Build the run's resolver from parsed CLI args (see `add_resolver_arguments`)."""
+        return cls(
+            nameservers=_parse_servers(args.dns_servers),
+            backend=args.dns_backend,
+            timeout=args.dns_timeout,
+            concurrency=args.dns_workers,
+            default_ttl=args.dns_cache_ttl,
+            negative_ttl=args.dns_negative_ttl,
+            cache_file=args.dns_cache_file or None,
+        )
+
+    def describe(self) -> str:
+        servers = ', '.join(self.nameservers) if self.nameservers else 'system servers'
+        warm = f", {self.stats['warm']} warm entries" if self.cache_file else ''
+        return (f"{self.backend} ({servers}), {self.timeout:g}s timeout, "
+                f"negative TTL {self.negative_ttl}s{warm}")
+
+    def summary(self) -> str:
+        answered = self.stats['hits'] + self.stats['shared'] + self.stats['lookups']
+        rate = (self.stats['hits'] + self.stats['shared']) / answered if answered else 0.0
+        return (f"{answered} resolutions, {self.stats['lookups']} queries ({rate:.0%} from cache), "
+                f"{self.stats[NXDOMAIN]} nxdomain, {self.stats[FAILED]} failed")
+
+    async def resolve(self, host: str) -> Dict[str, Any]:
+        """Cached answer for `host` (looked up on a miss)."""
+        host = host.lower().rstrip('.')
+        if _is_address(host):
+            return {'addresses': [host], 'canonical': None, 'error': None, 'expires': float('inf')}
+
+        entry = self._cache.get(host)
+        if entry is not None and entry['expires'] > time.time():
+            self.stats['hits'] += 1
+            return entry
+
+        pending = self._pending.get(host)
+        if pending is None:
+            pending = asyncio.ensure_future(self._lookup(host))
+            self._pending[host] = pending
+            pending.add_done_callback(lambda _: self._pending.pop(host, None))
+        else:
+            self.stats['shared'] += 1
+        # A cancelled caller must not cancel the lookup other callers wait on
+        return await asyncio.shield(pending)
+
+    async def _lookup(self, host: str) -> Dict[str, Any]:
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self.concurrency)
+        self.stats['lookups'] += 1
+
+        entry = {'addresses': [], 'canonical': None, 'error': None}
+        try:
+            async with self._semaphore:
+                query = self._query_aiodns(host) if self.backend == 'aiodns' else self._query_system(host)
+                addresses, canonical, ttl = await asyncio.wait_for(query, self.timeout)
+            if not addresses:
+                raise _NotFound(host)
+            entry.update(addresses=addresses, canonical=canonical)
+            ttl = min(max(ttl, self.min_ttl), self.max_ttl)
+        except _NotFound:
+            entry['error'] = NXDOMAIN
+            ttl = self.negative_ttl
+        except (asyncio.TimeoutError, OSError, UnicodeError):
+            entry['error'] = FAILED
+            ttl = self.failure_ttl
+
+        if entry['error']:
+            self.stats[entry['error']] += 1
+        entry['expires'] = time.time() + ttl
+        self._cache[host] = entry
+        return entry
+
+    async def _query_system(self, host: str):
+        """(addresses, canonical name, TTL) from the OS resolver."""
+        try:
+            infos = await asyncio.get_running_loop().getaddrinfo(
+                host, None, type=socket.SOCK_STREAM, flags=socket.AI_CANONNAME)
+        except socket.gaierror as e:
+            if e.errno in _NO_NAME_ERRORS:
+                raise _NotFound(host)
+            raise
+
+        # Only the first entry carries the canonical name (the end of the CNAME chain)
+        canonical = (infos[0][3] if infos else '').lower().rstrip('.')
+        addresses = _ordered(info[4][0] for info in infos)
+        return addresses, (canonical if canonical and canonical != host else None), self.default_ttl
+
+    async def _query_aiodns(self, host: str):
+        """(addresses, canonical name, lowest record TTL) straight from c-ares."""
+        if self._channel is None:
+            self._channel = aiodns.DNSResolver(nameservers=self.nameservers or None)
+        try:
+            result = await self._channel.getaddrinfo(host, type=socket.SOCK_STREAM)
+        except aiodns.error.DNSError as e:
+            if e.args and e.args[0] in _ARES_NO_NAME_ERRORS:
+                raise _NotFound(host)
+            raise OSError(*e.args)
+
+        addresses = _ordered(
+            node.addr[0].decode() if isinstance(node.addr[0], bytes) else node.addr[0]
+            for node in result.nodes
+        )
+        canonical = result.cnames[-1].name.lower().rstrip('.') if result.cnames else None
+        ttls = [record.ttl for record in list(result.nodes) + list(result.cnames) if record.ttl]
+        return addresses, canonical, min(ttls) if ttls else self.default_ttl
+
+    # Warm cache
+
+    def load(self, path: str) -> int:
+        """Merge unexpired entries from a cache file; returns how many were loaded."""
+        try:
+            with open(path) as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return 0
+        if data.get('version') != CACHE_FORMAT_VERSION:
+            return 0
+
+        now = time.time()
+        loaded = 0
+        for host, entry in data.get('entries', {}).items():
+            if entry.get('expires', 0) > now and host not in self._cache:
+                self._cache[host] = entry
+                loaded += 1
+        return loaded
+
+    def save(self, path: Optional[str] = None) -> int:
+        """
+        Write unexpired answers to the cache file; returns how many were written.
+
+        Entries already in the file (e.g. from another worker process) are
+        kept unless this resolver has a newer answer. Temporary failures are
+        not persisted.
+        """
+        path = path or self.cache_file
+        if not path:
+            return 0
+
+        now = time.time()
+        entries = {}
+        try:
+            with open(path) as f:
+                data = json.load(f)
+            if data.get('version') == CACHE_FORMAT_VERSION:
+                entries = {host: entry for host, entry in data.get('entries', {}).items()
+                           if entry.get('expires', 0) > now}
+        except (OSError, ValueError):
+            pass
+
+        entries.update((host, entry) for host, entry in self._cache.items()
+                       if entry['expires'] > now and entry['error'] != FAILED)
+
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        tmp_path = f'{path}.{os.getpid()}.tmp'
+        with open(tmp_path, 'w') as f:
+            json.dump({'version': CACHE_FORMAT_VERSION, 'entries': entries}, f, separators=(',', ':'))
+        os.replace(tmp_path, path)
+        return len(entries)
+
+    async def close(self):
+        if self._channel is not None:
+            close = getattr(self._channel, 'close', None)
+            if close is not None:
+                result = close()
+                if asyncio.iscoroutine(result):
+                    await result
+            self._channel = None
+
+
+def _ordered(addresses: Iterable[str]) -> List[str]:
+    """Unique addresses, IPv4 first, otherwise in resolver order."""
+    unique = list(dict.fromkeys(addresses))
+    return [a for a in unique if ':' not in a] + [a for a in unique if ':' in a]
+
+
+class AiohttpResolver(AbstractResolver):
+    """aiohttp resolver backed by a shared AsyncResolver."""
+
+    def __init__(self, resolver: AsyncResolver):
+        self.resolver = resolver
+
+    async def resolve(self, host: str, port: int = 0, family: int = socket.AF_INET) -> List[Dict[str, Any]]:
+        entry = await self.resolver.resolve(host)
+        if entry['error'] == NXDOMAIN:
+            raise socket.gaierror(socket.EAI_NONAME, f'{host}: name does not resolve')
+        if entry['error']:
+            raise socket.gaierror(socket.EAI_AGAIN, f'{host}: temporary failure in name resolution')
+
+        results = []
+        for address in entry['addresses']:
+            address_family = socket.AF_INET6 if ':' in address else socket.AF_INET
+            if family in (socket.AF_UNSPEC, address_family):
+                results.append({'hostname': host, 'host': address, 'port': port, 'family': address_family,
+                                'proto': 0, 'flags': socket.AI_NUMERICHOST | socket.AI_NUMERICSERV})
+        if not results:
+            raise socket.gaierror(socket.EAI_NONAME, f'{host}: no address in the requested family')
+        return results
+
+    async def close(self):
+        # The AsyncResolver outlives any one session; its owner closes it
+        pass
+
+
+class BlockingResolver:
+    """
+    AsyncResolver for synchronous code (discovery scripts).
+
+    Lookups run on a private event loop in a daemon thread, so several names
+    resolve concurrently (`resolve_many`) and share the run's warm cache.
+    """
+
+    def __init__(self, resolver: Optional[AsyncResolver] = None):
+        self.resolver = resolver or AsyncResolver(cache_file=DEFAULT_CACHE_FILE)
+        self._loop = asyncio.new_event_loop()
+        self._thread = threading.Thread(target=self._loop.run_forever, name='dns-resolver', daemon=True)
+        self._thread.start()
+
+    def _run(self, coroutine):
+        return asyncio.run_coroutine_threadsafe(coroutine, self._loop).result()
+
+    def resolve(self, host: str) -> Dict[str, Any]:
+        return self._run(self.resolver.resolve(host))
+
+    def resolve_many(self, hosts: Iterable[str]) -> Dict[str, Dict[str, Any]]:
+        """Resolve hosts concurrently; {host: entry} in input order."""
+        hosts = list(dict.fromkeys(hosts))
+
+        async def resolve_all():
+            return await asyncio.gather(*(self.resolver.resolve(host) for host in hosts))
+
+        return dict(zip(hosts, self._run(resolve_all())))
+
+    def gethostbyname(self, host: str) -> str:
+        """Drop-in for socket.gethostbyname: first IPv4 address, or socket.gaierror."""
+        entry = self.resolve(host)
+        address = first_ipv4(entry)
+        if address is None:
+            errno = socket.EAI_AGAIN if entry['error'] == FAILED else socket.EAI_NONAME
+            raise socket.gaierror(errno, f'{host}: no IPv4 address')
+        return address
+
+    def save(self) -> int:
+        return self.resolver.save()
+
+
+def first_ipv4(entry: Dict[str, Any]) -> Optional[str]:
+    """First IPv4 address of a resolver entry, or None."""
+    return next((address for address in entry['addresses'] if ':' not in address), None)
+
+
+_blocking_resolver: Optional[BlockingResolver] = None
+
+
+def blocking_resolver() -> BlockingResolver:
+    """The process-wide BlockingResolver, warmed from DEFAULT_CACHE_FILE."""
+    global _blocking_resolver
+    if _blocking_resolver is None:
+        _blocking_resolver = BlockingResolver()
+    return _blocking_resolver
+
+
+def check_resolver_arguments(args):
+    """Raise ValueError for resolver options this install cannot honour."""
+    select_backend(args.dns_backend, _parse_servers(args.dns_servers))
+
+
+def add_resolver_arguments(parser):
+    """Add DNS resolver options to an argparse parser."""
+    parser.add_argument('--dns-backend', choices=['auto'] + RESOLVER_BACKENDS, default='auto',
+                        help='DNS resolver (default: auto = aiodns if installed, else the system resolver)')
+    parser.add_argument('--dns-servers', type=str, default=None,
+                        help='Comma-separated upstream DNS servers, e.g. 1.1.1.1,8.8.8.8 (needs aiodns)')
+    parser.add_argument('--dns-timeout', type=float, default=5.0,
+                        help='Seconds per DNS lookup (default: 5)')
+    parser.add_argument('--dns-negative-ttl', type=int, default=3600,
+                        help='Seconds to cache NXDOMAIN answers (default: 3600)')
+    parser.add_argument('--dns-cache-file', type=str, default=DEFAULT_CACHE_FILE,
+                        help='Warm DNS cache kept between runs (default: data/dns_cache.json, empty to disable)')
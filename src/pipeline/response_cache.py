@@ -0,0 +1,331 @@
+"""
+On-disk HTTP response cache, so reruns and extraction work don't re-crawl.
+
+Layout of a cache directory:
+
+    index.sqlite           url -> status, headers, body digest, fetch/expiry/access times
+    blobs/ab/<sha256>.gz   gzip-compressed bodies, named by content hash
+
+Bodies are content-addressed: identical pages (the same 404 page, an
+unchanged policy page) are stored once. How long an entry stays fresh
+depends on the kind of URL (CACHE_TTLS): homepages change more often than
+contact and policy pages, and missing pages are retried soonest. Only
+statuses that are an answer in themselves are cached (CACHEABLE_STATUSES);
+rate limits, blocks and server errors are retried on the next fetch. When
+the blobs outgrow `max_bytes`, least recently used entries are evicted.
+
+The index runs in WAL mode with a busy timeout, so several worker processes
+can share one cache directory. Lookups are synchronous: an index row and one
+small file read, cheap enough to call from the event loop. Stores are not
+(hashing, compression, a file write and index updates), so async code hands
+them to a background thread with `put_async`.
+"""
+
+import asyncio
+import gzip
+import hashlib
+import json
+import os
+import queue
+import sqlite3
+import threading
+import time
+from typing import Dict, Iterator, Optional
+from urllib.parse import urlsplit
+
+DAY = 24 * 60 * 60
+
+# Freshness per URL class (see `url_class`), in seconds
+CACHE_TTLS = {
+    'homepage': 7 * DAY,
+    'json': 1 * DAY,
+    'page': 30 * DAY,
+    'error': 1 * DAY,
+}
+
+# A page, or a page that doesn't exist; 429, 403 and 5xx are transient and never cached
+CACHEABLE_STATUSES = {200, 404, 410}
+
+DEFAULT_MAX_BYTES = 2 * 1024 ** 3
+
+# Queue sentinel telling the writer thread to finish
+_STOP = object()
+
+# Check the size bound every this many writes, and evict down to this share of it
+EVICT_EVERY = 200
+EVICT_TO = 0.9
+
+_SCHEMA = '''
+CREATE TABLE IF NOT EXISTS responses (
+    url TEXT PRIMARY KEY,
+    status INTEGER NOT NULL,
+    headers TEXT NOT NULL,
+    digest TEXT NOT NULL,
+    fetched_at REAL NOT NULL,
+    expires_at REAL NOT NULL,
+    accessed_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS responses_accessed ON responses (accessed_at);
+CREATE INDEX IF NOT EXISTS responses_digest ON responses (digest);
+CREATE TABLE IF NOT EXISTS blobs (
+    digest TEXT PRIMARY KEY,
+    size INTEGER NOT NULL
+);
+'''
+
+
+def url_class(url: str, status: int = 200) -> str:
+    """'homepage', 'json', 'page' or 'error' (a cached 404/410, for CACHE_TTLS)."""
+    if status != 200:
+        return 'error'
+    path = urlsplit(url).path.rstrip('/')
+    if not path:
+        return 'homepage'
+    if path.endswith(('.json', '.js')):
+        return 'json'
+    return 'page'
+
+
+class CachedResponse:
+    """A response read back from the cache."""
+
+    def __init__(self, url: str, status: int, headers: Dict[str, str], body: bytes, fetched_at: float):
+        self.url = url
+        self.status = status
+        self.headers = headers
+        self.body = body
+        self.fetched_at = fetched_at
+        self._text = None
+
+    @property
+    def text(self) -> str:
+        """Body decoded with the charset from Content-Type (UTF-8 if none)."""
+        if self._text is None:
+            self._text = self.body.decode(charset(self.headers), errors='replace')
+        return self._text
+
+    # requests.Response compatibility (scrapers.store_scraper)
+
+    @property
+    def status_code(self) -> int:
+        return self.status
+
+    @property
+    def content(self) -> bytes:
+        return self.body
+
+
+def charset(headers: Dict[str, str]) -> str:
+    """Charset named in a Content-Type header, or UTF-8."""
+    content_type = next((value for name, value in headers.items() if name.lower() == 'content-type'), '')
+    for param in content_type.split(';')[1:]:
+        name, _, value = param.strip().partition('=')
+        if name.lower() == 'charset' and value:
+            value = value.strip('"\'')
+            try:
+                ''.encode(value)
+            except LookupError:
+                break
+            return value
+    return 'utf-8'
+
+
+class ResponseCache:
+    """
+    URL-keyed cache of HTTP responses with compressed, content-addressed bodies.
+
+    `get(url)` returns a fresh CachedResponse or None; `put(...)` stores a
+    response with a status in CACHEABLE_STATUSES. Expired entries are not
+    returned (unless `stale=True`, for offline reprocessing) and are
+    overwritten by the next fetch.
+    """
+
+    def __init__(self, directory: str, max_bytes: int = DEFAULT_MAX_BYTES,
+                 ttls: Optional[Dict[str, float]] = None, touch: bool = True, max_pending: int = 1000):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.ttls = {**CACHE_TTLS, **(ttls or {})}
+        # Record reads for LRU eviction (off for replay, so readers don't contend on the index)
+        self.touch = touch
+        self._blob_dir = os.path.join(directory, 'blobs')
+        os.makedirs(self._blob_dir, exist_ok=True)
+
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(os.path.join(directory, 'index.sqlite'), timeout=30,
+                                   check_same_thread=False, isolation_level=None)
+        self._db.execute('PRAGMA journal_mode=WAL')
+        self._db.execute('PRAGMA synchronous=NORMAL')
+        self._db.executescript(_SCHEMA)
+        self._puts = 0
+        # Writer thread for put_async, started on first use
+        self._queue = queue.Queue(maxsize=max_pending)
+        self._thread = None
+
+        self.stats = {'hits': 0, 'misses': 0, 'stored': 0, 'evicted': 0, 'failed': 0}
+
+    @classmethod
+    def from_args(cls, args) -> Optional['ResponseCache']:
+        """The run's cache from --response-cache/--response-cache-mb, or None when off."""
+        if not getattr(args, 'response_cache', None):
+            return None
+        return cls(args.response_cache, max_bytes=args.response_cache_mb * 1024 ** 2)
+
+    @classmethod
+    def from_env(cls) -> Optional['ResponseCache']:
+        """The cache in $RESPONSE_CACHE, for scripts without CLI options, or None."""
+        directory = os.environ.get('RESPONSE_CACHE')
+        return cls(directory) if directory else None
+
+    def describe(self) -> str:
+        with self._lock:
+            entries, size = self._db.execute(
+                'SELECT (SELECT COUNT(*) FROM responses), (SELECT COALESCE(SUM(size), 0) FROM blobs)').fetchone()
+        return (f'{self.directory} ({entries} responses, {size / 1024 ** 2:.1f}MB '
+                f'of {self.max_bytes / 1024 ** 2:.0f}MB)')
+
+    def summary(self) -> str:
+        lookups = self.stats['hits'] + self.stats['misses']
+        rate = self.stats['hits'] / lookups if lookups else 0.0
+        return (f"{self.stats['hits']} hits ({rate:.0%}), {self.stats['stored']} stored, "
+                f"{self.stats['evicted']} evicted")
+
+    def _blob_path(self, digest: str) -> str:
+        return os.path.join(self._blob_dir, digest[:2], f'{digest}.gz')
+
+    def get(self, url: str, stale: bool = False) -> Optional[CachedResponse]:
+        """The cached response for `url`, or None if missing (or expired, unless `stale`)."""
+        now = time.time()
+        with self._lock:
+            row = self._db.execute(
+                'SELECT status, headers, digest, fetched_at, expires_at FROM responses WHERE url = ?',
+                (url,)).fetchone()
+            if row is None or (row[4] <= now and not stale):
+                self.stats['misses'] += 1
+                return None
+            if self.touch:
+                self._db.execute('UPDATE responses SET accessed_at = ? WHERE url = ?', (now, url))
+
+        status, headers, digest, fetched_at, _ = row
+        try:
+            with open(self._blob_path(digest), 'rb') as f:
+                body = gzip.decompress(f.read())
+        except (OSError, EOFError):
+            # Evicted by another process in the meantime
+            with self._lock:
+                self._db.execute('DELETE FROM responses WHERE url = ?', (url,))
+                self.stats['misses'] += 1
+            return None
+
+        with self._lock:
+            self.stats['hits'] += 1
+        return CachedResponse(url, status, json.loads(headers), body, fetched_at)
+
+    def put(self, url: str, status: int, headers: Dict[str, str], body: bytes):
+        """Store a response, fresh for its URL class's TTL (other statuses are ignored)."""
+        if status not in CACHEABLE_STATUSES:
+            return
+
+        digest = hashlib.sha256(body).hexdigest()
+        path = self._blob_path(digest)
+        size = None
+        if not os.path.exists(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            data = gzip.compress(body, compresslevel=6, mtime=0)
+            tmp_path = f'{path}.{os.getpid()}.{threading.get_ident()}.tmp'
+            with open(tmp_path, 'wb') as f:
+                f.write(data)
+            os.replace(tmp_path, path)
+            size = len(data)
+
+        now = time.time()
+        expires_at = now + self.ttls[url_class(url, status)]
+        with self._lock:
+            if size is not None:
+                self._db.execute('INSERT OR REPLACE INTO blobs (digest, size) VALUES (?, ?)', (digest, size))
+            self._db.execute(
+                'INSERT OR REPLACE INTO responses (url, status, headers, digest, fetched_at, expires_at, accessed_at)'
+                ' VALUES (?, ?, ?, ?, ?, ?, ?)',
+                (url, status, json.dumps(dict(headers)), digest, now, expires_at, now))
+            self.stats['stored'] += 1
+            self._puts += 1
+            if self._puts % EVICT_EVERY == 0:
+                self._evict()
+
+    async def put_async(self, url: str, status: int, headers: Dict[str, str], body: bytes):
+        """Queue a response for `put` on the writer thread, without blocking the event loop."""
+        if status not in CACHEABLE_STATUSES:
+            return
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name='response-cache-writer', daemon=True)
+            self._thread.start()
+
+        item = (url, status, dict(headers), body)
+        try:
+            self._queue.put_nowait(item)
+        except queue.Full:
+            # Backpressure: wait in a worker thread until the writer catches up
+            await asyncio.get_running_loop().run_in_executor(None, self._queue.put, item)
+
+    def _run(self):
+        while True:
+            item = self._queue.get()
+            if item is _STOP:
+                break
+            try:
+                self.put(*item)
+            except (OSError, sqlite3.Error) as e:
+                self.stats['failed'] += 1
+                if self.stats['failed'] == 1:
+                    print(f"  ⚠️  Response cache write failed: {e}")
+
+    def _evict(self):
+        """Drop least recently used entries (expired ones first) until under EVICT_TO of max_bytes."""
+        total = self._db.execute('SELECT COALESCE(SUM(size), 0) FROM blobs').fetchone()[0]
+        if total <= self.max_bytes:
+            return
+
+        target = self.max_bytes * EVICT_TO
+        now = time.time()
+        rows = self._db.execute(
+            'SELECT url, digest FROM responses ORDER BY expires_at > ?, accessed_at', (now,)).fetchall()
+        for url, digest in rows:
+            if total <= target:
+                break
+            self._db.execute('DELETE FROM responses WHERE url = ?', (url,))
+            self.stats['evicted'] += 1
+            if self._db.execute('SELECT 1 FROM responses WHERE digest = ? LIMIT 1', (digest,)).fetchone():
+                continue
+            size = self._db.execute('SELECT size FROM blobs WHERE digest = ?', (digest,)).fetchone()
+            self._db.execute('DELETE FROM blobs WHERE digest = ?', (digest,))
+            total -= size[0] if size else 0
+            try:
+                os.remove(self._blob_path(digest))
+            except OSError:
+                pass
+
+    def urls(self, prefix: str = '') -> Iterator[str]:
+        """Every cached URL (fresh or not) starting with `prefix`, in URL order."""
+        with self._lock:
+            rows = self._db.execute(
+                'SELECT url FROM responses WHERE url >= ? ORDER BY url', (prefix,)).fetchall()
+        for (url,) in rows:
+            if not url.startswith(prefix):
+                break
+            yield url
+
+    def close(self):
+        """Store everything queued by put_async and close the index."""
+        if self._thread is not None:
+            self._queue.put(_STOP)
+            self._thread.join()
+            self._thread = None
+        with self._lock:
+            self._db.close()
+
+
+def add_cache_arguments(parser):
+    """Add response cache options to an argparse parser."""
+    parser.add_argument('--response-cache', type=str, default=None,
+                        help='Directory of an on-disk response cache to read through and fill (default: off)')
+    parser.add_argument('--response-cache-mb', type=int, default=DEFAULT_MAX_BYTES // 1024 ** 2,
+                        help=f'Size bound of --response-cache before LRU eviction (default: {DEFAULT_MAX_BYTES // 1024 ** 2})')
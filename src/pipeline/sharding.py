@@ -0,0 +1,191 @@
+"""Shard discovery across worker processes that feed one shared writer."""
+
+import asyncio
+import queue
+import threading
+import time
+import zlib
+from typing import Any, AsyncIterator, Callable, Dict, List, Optional
+
+
+# Input sentinel telling a worker there are no more domains
+SHARD_DONE = None
+
+
+def shard_for(domain: str, shards: int) -> int:
+    """Stable shard index for a domain (same answer in every process and run)."""
+    return zlib.crc32(domain.encode('utf-8')) % shards
+
+
+class ShardDispatcher:
+    """
+    Route input stores to per-worker queues by domain hash.
+
+    Stores are sent in chunks to keep pickling and queue overhead low. A
+    full worker queue blocks the dispatcher, which bounds memory; `stopped`
+    is polled while blocked so a shutdown never hangs on a worker that has
+    stopped reading. Once stopped, `close` still tries (briefly) to tell
+    every worker its input is finished.
+    """
+
+    def __init__(self, queues: List, chunk_size: int = 100, stopped: Callable[[], bool] = lambda: False):
+        self.queues = queues
+        self.chunk_size = chunk_size
+        self.stopped = stopped
+        self._pending = [[] for _ in queues]
+        self.dispatched = 0
+
+    def add(self, store_data: Dict[str, Any]):
+        shard = shard_for(store_data['domain'], len(self.queues))
+        self._pending[shard].append(store_data)
+        self.dispatched += 1
+        if len(self._pending[shard]) >= self.chunk_size:
+            self._send(shard)
+
+    def close(self):
+        """Send what's left and tell every worker the input is finished."""
+        for shard in range(len(self.queues)):
+            if self._pending[shard]:
+                self._send(shard)
+            if not self._put(shard, SHARD_DONE):
+                # Stopping: chunks may be dropped, but a worker waiting for input should still end
+                try:
+                    self.queues[shard].put(SHARD_DONE, timeout=0.5)
+                except queue.Full:
+                    pass
+
+    def _send(self, shard: int):
+        self._put(shard, self._pending[shard])
+        self._pending[shard] = []
+
+    def _put(self, shard: int, item) -> bool:
+        """Queue `item` for a worker; False if stopped before it could be."""
+        while not self.stopped():
+            try:
+                self.queues[shard].put(item, timeout=0.5)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+
+async def iter_shard_input(input_queue, stop_event: Optional[asyncio.Event] = None,
+                           poll_interval: float = 0.05) -> AsyncIterator[Dict[str, Any]]:
+    """
+    Yield stores a ShardDispatcher sent to this worker, without blocking the event loop.
+
+    Ends at SHARD_DONE, or as soon as `stop_event` is set (the dispatcher
+    may stop sending anything, the sentinel included, once it is stopping).
+    """
+    while stop_event is None or not stop_event.is_set():
+        try:
+            chunk = input_queue.get_nowait()
+        except queue.Empty:
+            await asyncio.sleep(poll_interval)
+            continue
+
+        if chunk is SHARD_DONE:
+            return
+        for store_data in chunk:
+            yield store_data
+
+
+class ShardResultSink:
+    """
+    Worker-side stand-in for StoreWriter: ships results to the parent process.
+
+    Same `put` / `put_async` / `put_many_async` interface, so the streaming
+    pipeline and slow lane don't care which one they are given.
+    """
+
+    def __init__(self, result_queue, worker_id: int, poll_interval: float = 0.05):
+        self.result_queue = result_queue
+        self.worker_id = worker_id
+        self.poll_interval = poll_interval
+
+    def put(self, result: Dict[str, Any]):
+        self.result_queue.put([result])
+
+    async def put_async(self, result: Dict[str, Any]):
+        await self.put_many_async([result])
+
+    async def put_many_async(self, results: List[Dict[str, Any]]):
+        results = list(results)
+        while True:
+            try:
+                self.result_queue.put_nowait(results)
+                return
+            except queue.Full:
+                # The parent's writer is behind: wait without blocking the loop
+                await asyncio.sleep(self.poll_interval)
+
+    def done(self, stats: Dict[str, int]):
+        """Tell the parent this worker has finished, with its pipeline stats."""
+        self.result_queue.put({'worker': self.worker_id, 'stats': stats})
+
+
+class ShardResultCollector:
+    """
+    Parent-side thread moving worker results into the shared StoreWriter.
+
+    Also keeps the aggregate throughput numbers. It exits once every worker
+    has reported done, or has died without doing so.
+    """
+
+    def __init__(self, result_queue, writer, processes: List, progress_every: int = 500):
+        self.result_queue = result_queue
+        self.writer = writer
+        self.processes = processes
+        self.progress_every = progress_every
+
+        self.worker_stats: Dict[int, Dict[str, int]] = {}
+        self.results = 0
+        self.stores = 0
+        self.started_at = time.time()
+        self._thread = None
+
+    def start(self) -> 'ShardResultCollector':
+        self._thread = threading.Thread(target=self._run, name='shard-collector', daemon=True)
+        self._thread.start()
+        return self
+
+    def join(self):
+        self._thread.join()
+
+    def _run(self):
+        while len(self.worker_stats) < len(self.processes):
+            try:
+                message = self.result_queue.get(timeout=1.0)
+            except queue.Empty:
+                if not any(p.is_alive() for p in self.processes):
+                    break
+                continue
+
+            if isinstance(message, dict):
+                self.worker_stats[message['worker']] = message['stats']
+                continue
+
+            for result in message:
+                self.writer.put(result)
+                if result.get('quarantine'):
+                    continue
+                self.results += 1
+                self.stores += 1 if result['is_shopify'] else 0
+                if self.results % self.progress_every == 0:
+                    self.print_progress()
+
+    @property
+    def rate(self) -> float:
+        return self.results / max(time.time() - self.started_at, 1e-6)
+
+    def print_progress(self):
+        print(f"  📈 {self.results} domains done, {self.stores} Shopify across "
+              f"{len(self.processes)} workers ({self.rate:.1f} domains/s)")
+
+    def totals(self) -> Dict[str, int]:
+        """Pipeline stats summed over all workers that reported."""
+        totals: Dict[str, int] = {}
+        for stats in self.worker_stats.values():
+            for key, value in stats.items():
+                totals[key] = totals.get(key, 0) + value
+        return totals
@@ -0,0 +1,445 @@
+"""Streaming [DNS pre-screen ->] detect -> scrape -> persist pipeline for async discovery."""
+
+import asyncio
+import time
+from typing import Any, Callable, Dict, Iterable, List, Optional, Set
+
+import aiohttp
+
+from pipeline.page_context import PageContext
+from pipeline.prescreen import NXDOMAIN, PARKED, SHOPIFY
+
+
+# Queue sentinel telling a stage worker there is no more work
+_DONE = object()
+
+
+async def _aiter(stores):
+    """Iterate plain and async iterables alike."""
+    if hasattr(stores, '__aiter__'):
+        async for store_data in stores:
+            yield store_data
+    else:
+        for store_data in stores:
+            yield store_data
+
+
+class SlowLane:
+    """
+    Separate low-concurrency lane for domains that blew their time budget.
+
+    It has its own detector/scraper (longer timeouts, own small semaphore),
+    so slow stores never compete with the fast lane for slots.
+    """
+
+    def __init__(self, detector, scraper, workers: int = 4, budget: float = 180.0,
+                 quarantined: Optional[Set[str]] = None,
+                 on_quarantine: Optional[Callable[[str, str], None]] = None):
+        self.detector = detector
+        self.scraper = scraper
+        self.workers = workers
+        self.budget = budget
+        self.quarantined = quarantined if quarantined is not None else set()
+        self.on_quarantine = on_quarantine
+
+
+class StreamingPipeline:
+    """
+    Run detection, scraping and persistence as independent stages.
+
+    Stages are connected by bounded queues and each runs its own pool of
+    workers, so a slow domain only holds the worker it is on instead of
+    stalling a whole batch behind it.
+
+    With a `budget`, each domain gets that many wall-clock seconds across
+    detect and scrape. Domains that run over are quarantined and finished in
+    the slow lane; domains already quarantined by earlier runs go straight
+    there.
+
+    `persist` receives chunks of result dicts: Shopify stores carry
+    `is_shopify=True` plus the scraped data; negatives carry
+    `is_shopify=False` and the detector metadata so the caller can record why.
+    Both carry `elapsed`, the seconds from the domain's first stage (slow lane
+    included) until its result was ready. It may be a plain function or a
+    coroutine function.
+
+    With a `prescreen` (pipeline.prescreen.DnsPrescreen), every domain is
+    resolved first by its own pool of workers. NXDOMAIN and parked domains
+    are persisted as negatives without an HTTP request, and domains pointing
+    at Shopify reach the detector with that evidence, so it only has to
+    settle Plus.
+
+    `stop()` shuts down gracefully: no new domains are taken in, queued
+    domains that haven't started are dropped, and in-flight ones finish and
+    are persisted before `run` returns.
+    """
+
+    def __init__(self, detector, scraper, persist: Callable[[List[Dict[str, Any]]], Any],
+                 detect_workers: int = 20, scrape_workers: int = 20,
+                 queue_size: int = 100, commit_every: int = 50,
+                 progress_every: int = 500, budget: Optional[float] = None,
+                 slow_lane: Optional[SlowLane] = None, lag_monitor=None,
+                 prescreen=None, prescreen_workers: int = 200):
+        self.detector = detector
+        self.scraper = scraper
+        self.persist = persist
+        self.detect_workers = detect_workers
+        self.scrape_workers = scrape_workers
+        self.queue_size = queue_size
+        self.commit_every = commit_every
+        self.progress_every = progress_every
+        self.budget = budget
+        self.slow_lane = slow_lane
+        # Optional pipeline.offload.LoopLagMonitor, reported in progress lines
+        self.lag_monitor = lag_monitor
+        self.prescreen = prescreen
+        self.prescreen_workers = prescreen_workers
+
+        self.stats = {
+            'queued': 0,
+            'dns_dropped': 0,
+            'dns_shopify': 0,
+            'detected': 0,
+            'shopify': 0,
+            'scraped': 0,
+            'saved': 0,
+            'negatives': 0,
+            'quarantined': 0,
+            'slow_lane': 0,
+            'errors': 0,
+            'abandoned': 0,
+        }
+        self._started_at = None
+        self._stopping = False
+        # Domain -> monotonic time its first stage picked it up (for `elapsed`)
+        self._domain_started: Dict[str, float] = {}
+
+    def stop(self):
+        """Stop taking new domains; `run` returns once in-flight work is persisted."""
+        self._stopping = True
+
+    async def run(self, session: aiohttp.ClientSession, stores: Iterable[Dict[str, Any]]) -> Dict[str, int]:
+        """
+        Push every store through the pipeline.
+
+        Args:
+            session: HTTP session shared by all stages
+            stores: Iterable or async iterable of store dicts (must contain 'domain')
+
+        Returns:
+            Pipeline stats
+        """
+        self._started_at = time.time()
+
+        detect_queue = asyncio.Queue(maxsize=self.queue_size)
+        scrape_queue = asyncio.Queue(maxsize=self.queue_size)
+        persist_queue = asyncio.Queue(maxsize=self.queue_size)
+        # Unbounded, so handing a domain to the slow lane never blocks the fast lane
+        slow_queue = asyncio.Queue()
+
+        detect_tasks = [
+            asyncio.create_task(self._detect_worker(session, detect_queue, scrape_queue, slow_queue, persist_queue))
+            for _ in range(self.detect_workers)
+        ]
+        scrape_tasks = [
+            asyncio.create_task(self._scrape_worker(session, scrape_queue, persist_queue, slow_queue))
+            for _ in range(self.scrape_workers)
+        ]
+        slow_tasks = [
+            asyncio.create_task(self._slow_worker(session, slow_queue, persist_queue))
+            for _ in range(self.slow_lane.workers if self.slow_lane else 0)
+        ]
+        persist_task = asyncio.create_task(self._persist_worker(persist_queue))
+
+        # With a pre-screen, domains are resolved before they reach the detect stage
+        dns_queue = asyncio.Queue(maxsize=self.queue_size) if self.prescreen else None
+        dns_tasks = [
+            asyncio.create_task(self._prescreen_worker(dns_queue, detect_queue, persist_queue))
+            for _ in range(self.prescreen_workers if self.prescreen else 0)
+        ]
+
+        # Feed the first stage, then shut stages down front to back
+        await self._produce(stores, dns_queue or detect_queue, slow_queue)
+        if dns_queue is not None:
+            await self._close_stage(dns_queue, dns_tasks)
+        await self._close_stage(detect_queue, detect_tasks)
+        await self._close_stage(scrape_queue, scrape_tasks)
+        await self._close_stage(slow_queue, slow_tasks)
+        await self._close_stage(persist_queue, [persist_task])
+
+        self._print_progress()
+        return self.stats
+
+    async def _produce(self, stores: Iterable[Dict[str, Any]], first_queue: asyncio.Queue,
+                       slow_queue: asyncio.Queue):
+        """Feed stores into the first stage (blocks while the queue is full)."""
+        async for store_data in _aiter(stores):
+            if self._stopping:
+                break
+            self.stats['queued'] += 1
+
+            if self.slow_lane and store_data['domain'] in self.slow_lane.quarantined:
+                # Quarantined by an earlier run: schedule in the slow lane from the start
+                self.stats['slow_lane'] += 1
+                slow_queue.put_nowait((store_data, None))
+                continue
+
+            await first_queue.put(store_data if self.prescreen else (store_data, None))
+
+    async def _close_stage(self, queue: asyncio.Queue, tasks: list):
+        """Send one sentinel per worker and wait for the stage to drain."""
+        for _ in tasks:
+            await queue.put(_DONE)
+        await asyncio.gather(*tasks)
+
+    def _remaining(self, deadline: Optional[float]) -> Optional[float]:
+        if deadline is None:
+            return None
+        return max(deadline - time.monotonic(), 0)
+
+    async def _prescreen_worker(self, dns_queue: asyncio.Queue, detect_queue: asyncio.Queue,
+                                persist_queue: asyncio.Queue):
+        """Resolve domains: drop dead and parked ones, pass the rest on with any Shopify evidence."""
+        while True:
+            store_data = await dns_queue.get()
+            if store_data is _DONE:
+                break
+            if self._stopping:
+                self.stats['abandoned'] += 1
+                continue
+
+            self._domain_started.setdefault(store_data['domain'], time.monotonic())
+            try:
+                screen = await self.prescreen.screen(store_data['domain'])
+            except Exception as e:
+                print(f"  ⚠️  DNS pre-screen failed for {store_data['domain']}: {e}")
+                screen = {'verdict': None}
+
+            if screen['verdict'] in (NXDOMAIN, PARKED):
+                self.stats['dns_dropped'] += 1
+                self.stats['detected'] += 1
+                error_kind = 'dns' if screen['verdict'] == NXDOMAIN else 'parked'
+                metadata = {'error': f"{screen['verdict']} (DNS pre-screen)", 'error_kind': error_kind}
+                await persist_queue.put(self._negative(store_data['domain'], metadata))
+                continue
+
+            evidence = None
+            if screen['verdict'] == SHOPIFY:
+                self.stats['dns_shopify'] += 1
+                evidence = screen['evidence']
+            await detect_queue.put((store_data, evidence))
+
+    async def _detect_worker(self, session, detect_queue: asyncio.Queue, scrape_queue: asyncio.Queue,
+                             slow_queue: asyncio.Queue, persist_queue: asyncio.Queue):
+        """Detect Shopify/Plus and forward Shopify stores to the scrape stage."""
+        while True:
+            item = await detect_queue.get()
+            if item is _DONE:
+                break
+            if self._stopping:
+                self.stats['abandoned'] += 1
+                continue
+
+            store_data, evidence = item
+            self._domain_started.setdefault(store_data['domain'], time.monotonic())
+
+            # The per-domain budget covers detect and scrape together
+            deadline = time.monotonic() + self.budget if self.budget and self.slow_lane else None
+
+            # One page context per store, handed on to the scrape stage
+            context = PageContext(session, store_data['domain'], cache=self.detector.cache,
+                                  archive=self.detector.archive)
+            try:
+                is_shopify, is_plus, metadata = await asyncio.wait_for(
+                    self.detector.detect(session, store_data['domain'], context, known_shopify=evidence),
+                    self._remaining(deadline),
+                )
+            except asyncio.TimeoutError:
+                self._quarantine(store_data, None, 'detect_budget', slow_queue)
+                continue
+            except Exception as e:
+                self.stats['errors'] += 1
+                is_shopify, metadata = False, {'error': str(e), 'error_kind': 'error'}
+
+            self.stats['detected'] += 1
+            if self.stats['detected'] % self.progress_every == 0:
+                self._print_progress()
+
+            if is_shopify:
+                self.stats['shopify'] += 1
+                store_data = with_shop_name(store_data, metadata)
+                await scrape_queue.put((store_data, is_plus, context, deadline))
+            else:
+                await persist_queue.put(self._negative(store_data['domain'], metadata))
+
+    async def _scrape_worker(self, session, scrape_queue: asyncio.Queue, persist_queue: asyncio.Queue,
+                             slow_queue: asyncio.Queue):
+        """Scrape contact/address data for detected Shopify stores."""
+        while True:
+            item = await scrape_queue.get()
+            if item is _DONE:
+                break
+
+            store_data, is_plus, context, deadline = item
+            try:
+                scraped_data = await asyncio.wait_for(
+                    self.scraper.scrape(session, store_data['domain'], context),
+                    self._remaining(deadline),
+                )
+            except asyncio.TimeoutError:
+                self._quarantine(store_data, is_plus, 'scrape_budget', slow_queue)
+                continue
+            except Exception as e:
+                # Detection already confirmed Shopify: keep the store (and journal it) without contact data
+                self.stats['errors'] += 1
+                scraped_data = {'scrape_error': str(e) or type(e).__name__}
+                await persist_queue.put(self._positive(store_data, is_plus, scraped_data))
+                continue
+
+            self.stats['scraped'] += 1
+            await persist_queue.put(self._positive(store_data, is_plus, scraped_data))
+
+    def _positive(self, store_data: Dict[str, Any], is_plus: bool, scraped_data: Dict[str, Any]) -> Dict[str, Any]:
+        return {
+            'domain': store_data['domain'],
+            'is_shopify': True,
+            'is_plus': is_plus,
+            'scraped_data': scraped_data,
+            'store_data': store_data,
+            'elapsed': self._elapsed(store_data['domain']),
+        }
+
+    def _negative(self, domain: str, metadata: Dict[str, Any]) -> Dict[str, Any]:
+        return {'domain': domain, 'is_shopify': False, 'metadata': metadata, 'elapsed': self._elapsed(domain)}
+
+    def _elapsed(self, domain: str) -> Optional[float]:
+        started = self._domain_started.pop(domain, None)
+        return round(time.monotonic() - started, 3) if started is not None else None
+
+    def _quarantine(self, store_data: Dict[str, Any], is_plus: Optional[bool], reason: str,
+                    slow_queue: asyncio.Queue):
+        """Move a domain that blew its budget to the slow lane and remember it."""
+        domain = store_data['domain']
+        self.stats['quarantined'] += 1
+        self.stats['slow_lane'] += 1
+
+        if domain not in self.slow_lane.quarantined:
+            self.slow_lane.quarantined.add(domain)
+            if self.slow_lane.on_quarantine:
+                try:
+                    self.slow_lane.on_quarantine(domain, reason)
+                except Exception as e:
+                    print(f"  ⚠️  Could not persist quarantine for {domain}: {e}")
+
+        slow_queue.put_nowait((store_data, is_plus))
+
+    async def _slow_worker(self, session, slow_queue: asyncio.Queue, persist_queue: asyncio.Queue):
+        """Detect (if needed) and scrape quarantined domains with long timeouts."""
+        lane = self.slow_lane
+
+        while True:
+            item = await slow_queue.get()
+            if item is _DONE:
+                break
+            if self._stopping:
+                self.stats['abandoned'] += 1
+                continue
+
+            store_data, is_plus = item
+            domain = store_data['domain']
+            self._domain_started.setdefault(domain, time.monotonic())
+
+            # Fresh context: the fast-lane one may hold requests cut off by the budget
+            context = PageContext(session, domain, cache=lane.detector.cache,
+                                  archive=lane.detector.archive)
+            # Filled in by _detect_and_scrape once the store is known to be Shopify
+            detected = {'store_data': store_data, 'is_plus': is_plus}
+            try:
+                result = await asyncio.wait_for(
+                    self._detect_and_scrape(session, store_data, context, is_plus, detected),
+                    lane.budget,
+                )
+            except asyncio.TimeoutError:
+                if detected['is_plus'] is not None:
+                    # Shopify already confirmed, only the scrape ran out: keep the store without contact data
+                    await persist_queue.put(self._positive(detected['store_data'], detected['is_plus'],
+                                                           {'scrape_error': 'timeout'}))
+                    continue
+                # Too slow even for the slow lane: don't fetch it again until the TTL runs out
+                await persist_queue.put(self._negative(domain, {'error': 'timeout', 'error_kind': 'timeout'}))
+                continue
+            except Exception:
+                self.stats['errors'] += 1
+                self._domain_started.pop(domain, None)
+                continue
+
+            await persist_queue.put(result)
+
+    async def _detect_and_scrape(self, session, store_data: Dict[str, Any], context: PageContext,
+                                 is_plus: Optional[bool], detected: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Slow-lane work for one domain. Returns a positive or negative result.
+
+        A Shopify verdict is also recorded in `detected`, so a scrape cut off
+        by the budget still keeps the store.
+        """
+        lane = self.slow_lane
+        domain = store_data['domain']
+
+        if is_plus is None:
+            is_shopify, is_plus, metadata = await lane.detector.detect(session, domain, context)
+            self.stats['detected'] += 1
+            if not is_shopify:
+                return self._negative(domain, metadata)
+            self.stats['shopify'] += 1
+            store_data = with_shop_name(store_data, metadata)
+            detected.update(store_data=store_data, is_plus=is_plus)
+
+        scraped_data = await lane.scraper.scrape(session, domain, context)
+        self.stats['scraped'] += 1
+        return self._positive(store_data, is_plus, scraped_data)
+
+    async def _persist_worker(self, persist_queue: asyncio.Queue):
+        """Collect scraped stores and hand them to `persist` in chunks."""
+        pending = []
+
+        while True:
+            item = await persist_queue.get()
+            if item is not _DONE:
+                pending.append(item)
+
+            # Flush when the chunk is full, the queue has gone idle, or we're done
+            if pending and (item is _DONE or len(pending) >= self.commit_every or persist_queue.empty()):
+                stores = sum(1 for result in pending if result['is_shopify'])
+                try:
+                    # `persist` may be a coroutine (e.g. a StoreWriter hand-off that applies backpressure)
+                    written = self.persist(pending)
+                    if asyncio.iscoroutine(written):
+                        await written
+                    self.stats['saved'] += stores
+                    self.stats['negatives'] += len(pending) - stores
+                except Exception as e:
+                    print(f"  ⚠️  Persist error: {e}")
+                    self.stats['errors'] += len(pending)
+                pending = []
+
+            if item is _DONE:
+                break
+
+    def _print_progress(self):
+        """Print a one-line progress summary."""
+        elapsed = max(time.time() - self._started_at, 1e-6)
+        rate = self.stats['detected'] / elapsed
+        slow = f", {self.stats['slow_lane']} in slow lane" if self.stats['slow_lane'] else ""
+        dns = f", {self.stats['dns_dropped']} dropped at DNS" if self.prescreen else ""
+        lag = f", loop lag p95 {self.lag_monitor.percentile(0.95) * 1000:.0f}ms" if self.lag_monitor else ""
+        print(f"  📈 {self.stats['detected']}/{self.stats['queued']} checked, "
+              f"{self.stats['shopify']} Shopify, {self.stats['saved']} saved{dns}{slow} "
+              f"({rate:.1f} domains/s{lag})")
+
+
+def with_shop_name(store_data: Dict[str, Any], metadata: Dict[str, Any]) -> Dict[str, Any]:
+    """Seed data, with the shop name from JSON detection as company name if the seed has none."""
+    if metadata.get('shop_name') and not store_data.get('company_name'):
+        return {**store_data, 'company_name': metadata['shop_name']}
+    return store_data
@@ -0,0 +1,405 @@
+"""
+WARC archives of fetched pages (.warc.gz, one gzip member per record).
+
+`WarcWriter` appends a response and a request record for every page the
+pipeline downloads. Each process writes its own archive, named
+
+    <prefix>-<UTC timestamp>-<serial>-<pid>.warc.gz
+
+and starts a new one once the current one passes `max_bytes`, so any number
+of worker processes can archive into one directory without locking, and the
+names sort oldest first.
+
+Each archive has a sidecar index, `<archive>.idx`, with one tab-separated
+line per complete response record:
+
+    <url>\t<offset>\t<length>\t<status>
+
+so a page is one seek and one gzip member away. The writer appends to it as
+it goes; archives without an index are scanned once and the index is
+written next to them.
+
+`WarcPages` serves archived responses through the same `get(url)` interface
+as pipeline.response_cache.ResponseCache, so a PageContext can replay them.
+"""
+
+import asyncio
+import base64
+import gzip
+import hashlib
+import os
+import queue
+import socket
+import threading
+import time
+import uuid
+import zlib
+from datetime import datetime, timezone
+from http import HTTPStatus
+from typing import Dict, Iterable, Iterator, List, Mapping, Optional, Tuple
+from urllib.parse import urlsplit
+
+from pipeline.response_cache import CachedResponse
+
+INDEX_SUFFIX = '.idx'
+
+DEFAULT_MAX_BYTES = 1024 ** 3
+
+# Hop-by-hop and encoding headers that no longer describe the stored (decoded) body
+_REWRITTEN_HEADERS = {'content-encoding', 'content-length', 'transfer-encoding'}
+
+_READ_CHUNK = 1024 * 1024
+
+# Queue sentinel telling the writer thread to exit
+_STOP = object()
+
+
+def iter_members(path: str) -> Iterator[Tuple[int, int, bytes]]:
+    """(offset, compressed length, decompressed bytes) for each gzip member of a file."""
+    offset = 0
+    buffer = b''
+    with open(path, 'rb') as f:
+        while True:
+            decompressor = zlib.decompressobj(zlib.MAX_WBITS | 16)
+            parts, consumed = [], 0
+            while not decompressor.eof:
+                if not buffer:
+                    buffer = f.read(_READ_CHUNK)
+                    if not buffer:
+                        # End of file, or a record cut off mid-write (the writer was killed)
+                        return
+                parts.append(decompressor.decompress(buffer))
+                consumed += len(buffer) - len(decompressor.unused_data)
+                buffer = decompressor.unused_data
+            yield offset, consumed, b''.join(parts)
+            offset += consumed
+
+
+def parse_record(data: bytes) -> Tuple[Dict[str, str], bytes]:
+    """WARC headers (lower-cased names) and content block of one record."""
+    head, _, rest = data.partition(b'\r\n\r\n')
+    lines = head.decode('utf-8', errors='replace').split('\r\n')
+    headers = {}
+    for line in lines[1:]:
+        name, _, value = line.partition(':')
+        headers[name.strip().lower()] = value.strip()
+    length = int(headers.get('content-length', len(rest)))
+    return headers, rest[:length]
+
+
+def parse_http_response(block: bytes) -> Tuple[int, Dict[str, str], bytes]:
+    """Status, headers and decoded body of an HTTP response block."""
+    head, _, body = block.partition(b'\r\n\r\n')
+    lines = head.decode('iso-8859-1').split('\r\n')
+    status = int(lines[0].split(' ', 2)[1])
+    headers = {}
+    for line in lines[1:]:
+        name, _, value = line.partition(':')
+        headers[name.strip()] = value.strip()
+
+    lowered = {name.lower(): value.lower() for name, value in headers.items()}
+    if 'chunked' in lowered.get('transfer-encoding', ''):
+        body = _dechunk(body)
+    encoding = lowered.get('content-encoding', '')
+    try:
+        if encoding in ('gzip', 'x-gzip'):
+            body = gzip.decompress(body)
+        elif encoding == 'deflate':
+            body = zlib.decompress(body)
+    except (OSError, zlib.error, EOFError):
+        pass
+    return status, headers, body
+
+
+def _dechunk(body: bytes) -> bytes:
+    parts = []
+    position = 0
+    while position < len(body):
+        line_end = body.find(b'\r\n', position)
+        if line_end == -1:
+            break
+        try:
+            size = int(body[position:line_end].split(b';', 1)[0], 16)
+        except ValueError:
+            return body
+        if size == 0:
+            break
+        start = line_end + 2
+        parts.append(body[start:start + size])
+        position = start + size + 2
+    return b''.join(parts)
+
+
+def index_path(path: str) -> str:
+    return path + INDEX_SUFFIX
+
+
+def build_index(path: str) -> int:
+    """Scan an archive and (re)write its sidecar index; returns the number of responses."""
+    lines = []
+    for offset, length, data in iter_members(path):
+        headers, block = parse_record(data)
+        if headers.get('warc-type') != 'response' or 'warc-truncated' in headers:
+            continue
+        try:
+            status = int(block.split(b' ', 2)[1])
+        except (IndexError, ValueError):
+            continue
+        lines.append(f"{headers.get('warc-target-uri', '')}\t{offset}\t{length}\t{status}\n")
+
+    tmp_path = f'{index_path(path)}.{os.getpid()}.tmp'
+    with open(tmp_path, 'w') as f:
+        f.writelines(lines)
+    os.replace(tmp_path, index_path(path))
+    return len(lines)
+
+
+def read_index(path: str) -> Iterator[Tuple[str, int, int, int]]:
+    """(url, offset, length, status) lines of an archive's sidecar index."""
+    with open(index_path(path)) as f:
+        for line in f:
+            fields = line.rstrip('\n').split('\t')
+            if len(fields) == 4:
+                yield fields[0], int(fields[1]), int(fields[2]), int(fields[3])
+
+
+def find_archives(paths: Iterable[str]) -> List[str]:
+    """Archive files from files and directories, in name order (oldest first for rotated names)."""
+    archives = []
+    for path in paths:
+        if os.path.isdir(path):
+            archives.extend(os.path.join(path, name) for name in os.listdir(path)
+                            if name.endswith(('.warc.gz', '.warc')))
+        else:
+            archives.append(path)
+    return sorted(archives)
+
+
+class WarcPages:
+    """
+    Archived responses by URL, across one or more archives.
+
+    The last record for a URL wins, so newer archives (later in name order)
+    override older ones. Missing indexes are built on first use.
+    """
+
+    def __init__(self, paths: Iterable[str]):
+        self.archives = find_archives(paths)
+        self._index: Dict[str, Tuple[int, int, int]] = {}
+        for archive_id, archive in enumerate(self.archives):
+            if not os.path.exists(index_path(archive)):
+                build_index(archive)
+            for url, offset, length, _ in read_index(archive):
+                self._index[url] = (archive_id, offset, length)
+
+    def describe(self) -> str:
+        return f'{len(self.archives)} WARC archives, {len(self._index)} pages'
+
+    def __len__(self) -> int:
+        return len(self._index)
+
+    def urls(self, prefix: str = '') -> Iterator[str]:
+        return (url for url in sorted(self._index) if url.startswith(prefix))
+
+    def get(self, url: str, stale: bool = True) -> Optional[CachedResponse]:
+        """The archived response for `url`, or None. Archives never expire."""
+        location = self._index.get(url)
+        if location is None:
+            return None
+        archive_id, offset, length = location
+        with open(self.archives[archive_id], 'rb') as f:
+            f.seek(offset)
+            data = gzip.decompress(f.read(length))
+
+        headers, block = parse_record(data)
+        status, http_headers, body = parse_http_response(block)
+        return CachedResponse(url, status, http_headers, body, 0.0)
+
+
+def _warc_date() -> str:
+    return datetime.now(timezone.utc).strftime('%Y-%m-%dT%H:%M:%SZ')
+
+
+def _record(warc_type: str, url: str, content_type: str, block: bytes,
+            extra: Optional[Dict[str, str]] = None) -> Tuple[str, bytes]:
+    record_id = f'<urn:uuid:{uuid.uuid4()}>'
+    fields = {
+        'WARC-Type': warc_type,
+        'WARC-Record-ID': record_id,
+        'WARC-Date': _warc_date(),
+    }
+    if url:
+        fields['WARC-Target-URI'] = url
+    fields.update(extra or {})
+    fields['Content-Type'] = content_type
+    fields['Content-Length'] = str(len(block))
+    head = 'WARC/1.1\r\n' + ''.join(f'{name}: {value}\r\n' for name, value in fields.items()) + '\r\n'
+    return record_id, head.encode('utf-8') + block + b'\r\n\r\n'
+
+
+def _http_response(status: int, headers: Mapping[str, str], body: bytes) -> bytes:
+    try:
+        reason = HTTPStatus(status).phrase
+    except ValueError:
+        reason = ''
+    lines = [f'HTTP/1.1 {status} {reason}']
+    lines += [f'{name}: {value}' for name, value in headers.items() if name.lower() not in _REWRITTEN_HEADERS]
+    lines.append(f'Content-Length: {len(body)}')
+    return ('\r\n'.join(lines) + '\r\n\r\n').encode('iso-8859-1', errors='replace') + body
+
+
+def _http_request(url: str, headers: Mapping[str, str]) -> bytes:
+    parts = urlsplit(url)
+    target = (parts.path or '/') + (f'?{parts.query}' if parts.query else '')
+    lines = [f'GET {target} HTTP/1.1', f'Host: {parts.netloc}']
+    lines += [f'{name}: {value}' for name, value in headers.items() if name.lower() != 'host']
+    return ('\r\n'.join(lines) + '\r\n\r\n').encode('iso-8859-1', errors='replace')
+
+
+class WarcWriter:
+    """
+    Archive every downloaded page as WARC records, from a background thread.
+
+    `write(...)` only queues the page (`write_async` from async code, which
+    never blocks the event loop); compression and file writes happen on the
+    writer thread. Bodies are stored decoded (as the
+    pipeline saw them), with Content-Encoding and Transfer-Encoding dropped
+    from the archived headers. A page that was only partly read (see
+    PageContext.peek) is archived with WARC-Truncated and left out of the
+    index, so replay never mistakes it for the whole page.
+    """
+
+    def __init__(self, directory: str, prefix: str = 'pages', max_bytes: int = DEFAULT_MAX_BYTES,
+                 max_pending: int = 1000):
+        self.directory = directory
+        self.prefix = prefix
+        self.max_bytes = max_bytes
+        os.makedirs(directory, exist_ok=True)
+
+        self._queue = queue.Queue(maxsize=max_pending)
+        self._thread = None
+        self._file = None
+        self._index = None
+        self._serial = 0
+        self.path = None
+        self.archives: List[str] = []
+
+        self.stats = {'records': 0, 'truncated': 0, 'bytes': 0, 'failed': 0}
+
+    @classmethod
+    def from_args(cls, args) -> Optional['WarcWriter']:
+        """The run's archive writer from --warc-dir/--warc-max-mb, or None when off."""
+        if not getattr(args, 'warc_dir', None):
+            return None
+        return cls(args.warc_dir, max_bytes=args.warc_max_mb * 1024 ** 2)
+
+    def describe(self) -> str:
+        return f'{self.directory} (rotating at {self.max_bytes / 1024 ** 2:.0f}MB)'
+
+    def summary(self) -> str:
+        return (f"{self.stats['records']} pages in {len(self.archives)} archives, "
+                f"{self.stats['bytes'] / 1024 ** 2:.1f}MB"
+                + (f" ({self.stats['truncated']} truncated)" if self.stats['truncated'] else "")
+                + (f" ({self.stats['failed']} failed)" if self.stats['failed'] else ""))
+
+    def write(self, url: str, status: int, headers: Mapping[str, str], body: bytes,
+              request_headers: Optional[Mapping[str, str]] = None, truncated: bool = False):
+        """Queue one request/response pair (blocks while the writer thread is behind)."""
+        self._start()
+        self._queue.put((url, status, dict(headers), body, dict(request_headers or {}), truncated))
+
+    async def write_async(self, url: str, status: int, headers: Mapping[str, str], body: bytes,
+                          request_headers: Optional[Mapping[str, str]] = None, truncated: bool = False):
+        """Queue one request/response pair from async code without blocking the event loop."""
+        self._start()
+        item = (url, status, dict(headers), body, dict(request_headers or {}), truncated)
+        try:
+            self._queue.put_nowait(item)
+        except queue.Full:
+            # Backpressure: wait in a worker thread until the writer catches up
+            await asyncio.get_running_loop().run_in_executor(None, self._queue.put, item)
+
+    def _start(self):
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name='warc-writer', daemon=True)
+            self._thread.start()
+
+    def close(self):
+        """Write everything queued and close the current archive."""
+        if self._thread is not None:
+            self._queue.put(_STOP)
+            self._thread.join()
+            self._thread = None
+        self._close_archive()
+
+    def _run(self):
+        while True:
+            item = self._queue.get()
+            if item is _STOP:
+                break
+            try:
+                self._append(*item)
+            except OSError as e:
+                self.stats['failed'] += 1
+                if self.stats['failed'] == 1:
+                    print(f"  ⚠️  WARC write failed: {e}")
+
+    def _append(self, url: str, status: int, headers: Dict[str, str], body: bytes,
+                request_headers: Dict[str, str], truncated: bool):
+        if self._file is None or self._file.tell() >= self.max_bytes:
+            self._open_archive()
+
+        digest = base64.b32encode(hashlib.sha1(body).digest()).decode('ascii')
+        extra = {'WARC-Payload-Digest': f'sha1:{digest}'}
+        if truncated:
+            extra['WARC-Truncated'] = 'length'
+        response_id, response = _record('response', url, 'application/http;msgtype=response',
+                                        _http_response(status, headers, body), extra)
+        _, request = _record('request', url, 'application/http;msgtype=request',
+                             _http_request(url, request_headers), {'WARC-Concurrent-To': response_id})
+
+        offset = self._file.tell()
+        member = gzip.compress(response, compresslevel=6, mtime=0)
+        data = member + gzip.compress(request, compresslevel=6, mtime=0)
+        self._file.write(data)
+        self._file.flush()
+        self.stats['bytes'] += len(data)
+        if truncated:
+            self.stats['truncated'] += 1
+        else:
+            self._index.write(f'{url}\t{offset}\t{len(member)}\t{status}\n')
+            self._index.flush()
+
+        self.stats['records'] += 1
+
+    def _open_archive(self):
+        self._close_archive()
+        self._serial += 1
+        stamp = time.strftime('%Y%m%d%H%M%S', time.gmtime())
+        self.path = os.path.join(self.directory,
+                                 f'{self.prefix}-{stamp}-{self._serial:05d}-{os.getpid()}.warc.gz')
+        self.archives.append(self.path)
+        self._file = open(self.path, 'ab')
+        self._index = open(index_path(self.path), 'a')
+
+        fields = (f'software: shopify-merchant-intelligence\r\n'
+                  f'format: WARC File Format 1.1\r\n'
+                  f'hostname: {socket.gethostname()}\r\n').encode('utf-8')
+        _, info = _record('warcinfo', '', 'application/warc-fields', fields,
+                          {'WARC-Filename': os.path.basename(self.path)})
+        self._file.write(gzip.compress(info, compresslevel=6, mtime=0))
+
+    def _close_archive(self):
+        if self._file is not None:
+            self._file.close()
+            self._index.close()
+            self._file = None
+            self._index = None
+
+
+def add_warc_arguments(parser):
+    """Add WARC archiving options to an argparse parser."""
+    parser.add_argument('--warc-dir', type=str, default=None,
+                        help='Archive every downloaded page into rotating .warc.gz files in this directory (default: off)')
+    parser.add_argument('--warc-max-mb', type=int, default=DEFAULT_MAX_BYTES // 1024 ** 2,
+                        help=f'Start a new archive after this many MB (default: {DEFAULT_MAX_BYTES // 1024 ** 2})')
@@ -11,16 +11,18 @@ import asyncio
 import aiohttp
 from database.models import init_db, get_session, ShopifyStore
 from scrapers.async_store_scraper import AsyncStoreScraper
+from pipeline.response_cache import ResponseCache, add_cache_arguments
 from sqlalchemy import and_
 
 
-async def rescrape_for_addresses(country='US', limit=None):
+async def rescrape_for_addresses(country='US', limit=None, cache=None):
     """
     Re-scrape stores missing street addresses with enhanced scraper.
 
     Args:
         country: Focus on specific country (default: US)
         limit: Max stores to rescrape (default: all)
+        cache: ResponseCache to read pages from (and save fetched ones to)
     """
     print(f"🔄 Re-scraping {country} stores for missing addresses...")
 
@@ -47,7 +49,7 @@ async def rescrape_for_addresses(country='US', limit=None):
         return
 
     # Re-scrape with enhanced scraper
-    scraper = AsyncStoreScraper(max_concurrent=30)
+    scraper = AsyncStoreScraper(max_concurrent=30, cache=cache)
     updated_count = 0
     found_addresses = 0
 
@@ -118,6 +120,14 @@ if __name__ == '__main__':
     parser = argparse.ArgumentParser(description='Re-scrape stores for missing addresses')
     parser.add_argument('--country', type=str, default=None, help='Country to focus on (e.g., US)')
     parser.add_argument('--limit', type=int, default=None, help='Max stores to rescrape')
+    add_cache_arguments(parser)
     args = parser.parse_args()
 
-    asyncio.run(rescrape_for_addresses(country=args.country, limit=args.limit))
+    cache = ResponseCache.from_args(args)
+    try:
+        asyncio.run(rescrape_for_addresses(country=args.country, limit=args.limit, cache=cache))
+    finally:
+        if cache:
+            # Stores what the writer thread still has queued, so the counts are final
+            cache.close()
+            print(f"🗄️  Response cache: {cache.summary()}")
@@ -0,0 +1,172 @@
+"""
+Pure HTML extraction functions.
+
+Everything here takes HTML (or an already parsed tree) and returns plain
+dicts, with no I/O and no shared state, so page-level functions can run in
+a worker process via pipeline.offload.ParseOffloader.
+"""
+
+import json
+import re
+from typing import Any, Dict, Optional
+
+from utils.html_parser import make_soup
+
+
+EMAIL_PATTERN = re.compile(r'\b[A-Za-z0-9._%+-]+@[A-Za-z0-9.-]+\.[A-Z|a-z]{2,}\b')
+PHONE_PATTERN = re.compile(r'\(?\d{3}\)?[-.\s]?\d{3}[-.\s]?\d{4}')
+MAILTO_HREF = re.compile(r'^mailto:')
+TEL_HREF = re.compile(r'^tel:')
+ADDRESS_CLASS = re.compile(r'(address|location|contact)', re.I)
+
+# Multiple US address patterns
+ADDRESS_PATTERNS = [
+    # Pattern 1: 123 Main St, New York, NY 10001
+    re.compile(r'(\d+\s+[^,\n]+),\s*([^,\n]+),\s*([A-Z]{2})\s*(\d{5}(?:-\d{4})?)'),
+    # Pattern 2: New York, NY 10001 (city, state, zip)
+    re.compile(r'([^,\n]+),\s*([A-Z]{2})\s*(\d{5}(?:-\d{4})?)'),
+    # Pattern 3: 123 Main Street\nNew York, NY 10001
+    re.compile(r'(\d+\s+[^\n]+)\n\s*([^,\n]+),\s*([A-Z]{2})\s*(\d{5}(?:-\d{4})?)'),
+]
+
+SCHEMA_BUSINESS_TYPES = ['Organization', 'LocalBusiness', 'Store']
+
+
+def extract_email(soup_or_tag) -> Optional[str]:
+    """Extract email from HTML."""
+    mailto_links = soup_or_tag.find_all('a', href=MAILTO_HREF)
+    if mailto_links:
+        return mailto_links[0]['href'].replace('mailto:', '').strip()
+
+    emails = EMAIL_PATTERN.findall(soup_or_tag.get_text())
+    return emails[0] if emails else None
+
+
+def extract_phone(soup_or_tag) -> Optional[str]:
+    """Extract phone number from HTML."""
+    tel_links = soup_or_tag.find_all('a', href=TEL_HREF)
+    if tel_links:
+        return tel_links[0]['href'].replace('tel:', '').strip()
+
+    phones = PHONE_PATTERN.findall(soup_or_tag.get_text())
+    return phones[0] if phones else None
+
+
+def extract_address(soup_or_tag) -> Dict[str, Optional[str]]:
+    """Extract address from HTML with multiple pattern matching."""
+    address_data = {
+        'street_address': None,
+        'city': None,
+        'state': None,
+        'zip_code': None,
+        'country': None,
+    }
+
+    # Try address tags first
+    address_tags = soup_or_tag.find_all(['address', 'div', 'p'], class_=ADDRESS_CLASS)
+
+    # Also search entire text if no address tags found
+    if not address_tags:
+        address_tags = [soup_or_tag]
+
+    for tag in address_tags:
+        text = tag.get_text()
+
+        for pattern in ADDRESS_PATTERNS:
+            match = pattern.search(text)
+
+            if match:
+                if len(match.groups()) == 4:
+                    # Full address with street
+                    address_data['street_address'] = match.group(1).strip()
+                    address_data['city'] = match.group(2).strip()
+                    address_data['state'] = match.group(3).strip()
+                    address_data['zip_code'] = match.group(4).strip()
+                elif len(match.groups()) == 3:
+                    # City, state, zip only
+                    address_data['city'] = match.group(1).strip()
+                    address_data['state'] = match.group(2).strip()
+                    address_data['zip_code'] = match.group(3).strip()
+
+                address_data['country'] = 'US'
+                break
+
+        if address_data['city']:  # Found something
+            break
+
+    return address_data
+
+
+def extract_contact_details(soup_or_tag) -> Dict[str, Any]:
+    """Email, phone and address found in a page or tag (only the fields found)."""
+    data = {}
+
+    email = extract_email(soup_or_tag)
+    if email:
+        data['email'] = email
+
+    phone = extract_phone(soup_or_tag)
+    if phone:
+        data['phone'] = phone
+
+    address = extract_address(soup_or_tag)
+    if address:
+        data.update(address)
+
+    return data
+
+
+def extract_schema_org(soup) -> Dict[str, Any]:
+    """Extract address and phone from Schema.org structured data (JSON-LD)."""
+    data = {}
+
+    for script in soup.find_all('script', type='application/ld+json'):
+        try:
+            schema_data = json.loads(script.string)
+
+            # Handle both single object and list
+            schemas = schema_data if isinstance(schema_data, list) else [schema_data]
+
+            for schema in schemas:
+                # Look for organization/local business schema
+                if schema.get('@type') in SCHEMA_BUSINESS_TYPES:
+                    address_obj = schema.get('address', {})
+
+                    if isinstance(address_obj, dict):
+                        if not data.get('street_address') and address_obj.get('streetAddress'):
+                            data['street_address'] = address_obj.get('streetAddress')
+                            data['city'] = address_obj.get('addressLocality')
+                            data['state'] = address_obj.get('addressRegion')
+                            data['zip_code'] = address_obj.get('postalCode')
+                            data['country'] = address_obj.get('addressCountry', 'US')
+
+                    if not data.get('phone') and schema.get('telephone'):
+                        data['phone'] = schema.get('telephone')
+
+        except (json.JSONDecodeError, TypeError, AttributeError):
+            continue
+
+    return data
+
+
+# Page-level entry points: one parse per call, picklable arguments and results
+
+def analyze_homepage(html: str) -> Dict[str, Any]:
+    """Footer contact details and Schema.org data from one parse of the homepage."""
+    soup = make_soup(html)
+    footer = soup.find('footer')
+
+    return {
+        'footer': extract_contact_details(footer) if footer else {},
+        'schema': extract_schema_org(soup),
+    }
+
+
+def parse_contact_page(html: str) -> Dict[str, Any]:
+    """Contact details from a contact page."""
+    return extract_contact_details(make_soup(html))
+
+
+def parse_about_page(html: str) -> Dict[str, Optional[str]]:
+    """Address from an about/locations page."""
+    return extract_address(make_soup(html))
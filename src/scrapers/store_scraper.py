@@ -1,21 +1,41 @@
 """Scrape data from Shopify stores."""
 
 import requests
-from bs4 import BeautifulSoup
 import re
 from typing import Dict, Optional, Any
 import json
+import os
+import sys
+
+# Add parent directory to path for imports
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from utils.html_parser import make_soup
+from pipeline.response_cache import ResponseCache
 
 
 class StoreScraper:
     """Scrape contact info and business data from Shopify stores."""
 
-    def __init__(self, timeout: int = 10):
+    def __init__(self, timeout: int = 10, cache: Optional[ResponseCache] = None):
         self.timeout = timeout
         self.session = requests.Session()
         self.session.headers.update({
             'User-Agent': 'Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36'
         })
+        # Read-through response cache (pipeline.response_cache.ResponseCache)
+        self.cache = cache
+
+    def _get(self, url: str):
+        """GET through the response cache, if any (cached responses offer the same fields)."""
+        if self.cache is not None:
+            cached = self.cache.get(url)
+            if cached is not None:
+                return cached
+
+        response = self.session.get(url, timeout=self.timeout)
+        if self.cache is not None:
+            self.cache.put(url, response.status_code, dict(response.headers), response.content)
+        return response
 
     def scrape(self, domain: str) -> Dict[str, Any]:
         """
@@ -78,9 +98,9 @@ class StoreScraper:
 
         for url in contact_urls:
             try:
-                response = self.session.get(url, timeout=self.timeout)
+                response = self._get(url)
                 if response.status_code == 200:
-                    soup = BeautifulSoup(response.text, 'html.parser')
+                    soup = make_soup(response.text)
 
                     # Extract email
                     if not data.get('email'):
@@ -112,8 +132,8 @@ class StoreScraper:
         data = {}
 
         try:
-            response = self.session.get(domain, timeout=self.timeout)
-            soup = BeautifulSoup(response.text, 'html.parser')
+            response = self._get(domain)
+            soup = make_soup(response.text)
 
             # Look in footer
             footer = soup.find('footer')
@@ -146,8 +166,8 @@ class StoreScraper:
         data = {}
 
         try:
-            response = self.session.get(domain, timeout=self.timeout)
-            soup = BeautifulSoup(response.text, 'html.parser')
+            response = self._get(domain)
+            soup = make_soup(response.text)
 
             # Find JSON-LD scripts
             scripts = soup.find_all('script', type='application/ld+json')
@@ -209,7 +229,7 @@ class StoreScraper:
 
         for url in shipping_urls:
             try:
-                response = self.session.get(url, timeout=self.timeout)
+                response = self._get(url)
                 if response.status_code == 200:
                     text = response.text.lower()
 
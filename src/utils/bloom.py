@@ -0,0 +1,71 @@
+"""Compact probabilistic set membership (scalable Bloom filter)."""
+
+import hashlib
+import math
+from typing import List
+
+
+class BloomFilter:
+    """Fixed-capacity Bloom filter over strings."""
+
+    def __init__(self, capacity: int, error_rate: float = 1e-6):
+        self.capacity = capacity
+        self.error_rate = error_rate
+        self.num_bits = max(8, int(-capacity * math.log(error_rate) / (math.log(2) ** 2)))
+        self.num_hashes = max(1, int(round(self.num_bits / capacity * math.log(2))))
+        self.bits = bytearray((self.num_bits + 7) // 8)
+        self.count = 0
+
+    def _positions(self, item: str):
+        # Double hashing: k positions from two 64-bit halves of one digest
+        digest = hashlib.blake2b(item.encode('utf-8'), digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], 'little')
+        h2 = int.from_bytes(digest[8:], 'little') | 1
+        for i in range(self.num_hashes):
+            yield (h1 + i * h2) % self.num_bits
+
+    def add(self, item: str):
+        for pos in self._positions(item):
+            self.bits[pos >> 3] |= 1 << (pos & 7)
+        self.count += 1
+
+    def __contains__(self, item: str) -> bool:
+        return all(self.bits[pos >> 3] & (1 << (pos & 7)) for pos in self._positions(item))
+
+
+class ScalableBloomFilter:
+    """
+    Bloom filter that grows as items are added.
+
+    Starts small and adds a filter twice the size (with a tighter error
+    rate) whenever the current one is full, so memory tracks the number of
+    items actually seen while the overall false-positive rate stays below
+    `error_rate`.
+    """
+
+    def __init__(self, initial_capacity: int = 100000, error_rate: float = 1e-6):
+        self.initial_capacity = initial_capacity
+        self.error_rate = error_rate
+        self.filters: List[BloomFilter] = []
+        self._grow()
+
+    def _grow(self):
+        capacity = self.initial_capacity * (2 ** len(self.filters))
+        # Geometric error split keeps the sum of all filters' errors under error_rate
+        error_rate = self.error_rate * (0.5 ** (len(self.filters) + 1))
+        self.filters.append(BloomFilter(capacity, error_rate))
+
+    def add(self, item: str):
+        if self.filters[-1].count >= self.filters[-1].capacity:
+            self._grow()
+        self.filters[-1].add(item)
+
+    def __contains__(self, item: str) -> bool:
+        return any(item in f for f in self.filters)
+
+    def __len__(self) -> int:
+        return sum(f.count for f in self.filters)
+
+    @property
+    def size_bytes(self) -> int:
+        return sum(len(f.bits) for f in self.filters)
@@ -0,0 +1,256 @@
+"""
+IP -> network block index ("is this IP in Shopify's space, and which block?").
+
+CIDR blocks are either nested or disjoint, so the index flattens them into
+sorted, non-overlapping address ranges, each labelled with its most specific
+block (longest-prefix match, like the leaves of a radix tree). A lookup is
+one C-level bisect over integer range starts: about a microsecond from an
+IPv4 string, most of it spent parsing the address.
+
+The flattened tables serialize to JSON, so the prebuilt Shopify index
+(data/shopify_ips/cidr_index.json, from scripts/build_cidr_index.py) loads
+without re-parsing the source block lists.
+"""
+
+import bisect
+import ipaddress
+import json
+import os
+import re
+import socket
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
+
+DATA_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))),
+                        'data', 'shopify_ips')
+DEFAULT_INDEX_FILE = os.path.join(DATA_DIR, 'cidr_index.json')
+
+# Block lists the Shopify index is built from, with the label for each
+SHOPIFY_SOURCES = [
+    # Shopify's own address space (AS62679 and its 23.227.32.0/19 NetRange)
+    (os.path.join(DATA_DIR, 'as62679_summary.txt'), {'asn': 'AS62679', 'owner': 'shopify'}),
+    # Fastly, Shopify's CDN (shared with other Fastly customers)
+    (os.path.join(DATA_DIR, 'as54113_cidr_blocks.txt'), {'asn': 'AS54113', 'owner': 'fastly'}),
+]
+
+_bisect_right = bisect.bisect_right
+_inet_pton = socket.inet_pton
+_int_from_bytes = int.from_bytes
+_AF_INET = socket.AF_INET
+
+CIDR_PATTERN = re.compile(r'\b\d{1,3}(?:\.\d{1,3}){3}/\d{1,2}\b')
+
+FORMAT_VERSION = 1
+
+
+def read_cidrs(path: str) -> List[str]:
+    """CIDR blocks found anywhere in a text file (one per line or embedded in notes)."""
+    with open(path) as f:
+        return CIDR_PATTERN.findall(f.read())
+
+
+def _address_key(ip) -> Tuple[int, int]:
+    """(version, integer) for an address given as a string, int or ipaddress object."""
+    if isinstance(ip, str):
+        try:
+            return 4, int.from_bytes(socket.inet_pton(socket.AF_INET, ip), 'big')
+        except OSError:
+            ip = ipaddress.ip_address(ip)
+    elif isinstance(ip, int):
+        return 4, ip
+    return ip.version, int(ip)
+
+
+class _Ranges:
+    """Sorted, non-overlapping [start, end] ranges with a label id each."""
+
+    def __init__(self, starts=None, ends=None, label_ids=None):
+        self.starts: List[int] = starts or []
+        self.ends: List[int] = ends or []
+        self.label_ids: List[int] = label_ids or []
+
+    def append(self, start: int, end: int, label_id: int):
+        if start > end:
+            return
+        # Merge with the previous range when contiguous and from the same block
+        if self.ends and self.ends[-1] + 1 == start and self.label_ids[-1] == label_id:
+            self.ends[-1] = end
+            return
+        self.starts.append(start)
+        self.ends.append(end)
+        self.label_ids.append(label_id)
+
+    def find(self, key: int) -> Optional[int]:
+        i = bisect.bisect_right(self.starts, key) - 1
+        if i >= 0 and key <= self.ends[i]:
+            return self.label_ids[i]
+        return None
+
+    def __len__(self) -> int:
+        return len(self.starts)
+
+
+class CidrIndex:
+    """
+    Longest-prefix-match lookups over a fixed set of labelled CIDR blocks.
+
+    Labels are plain dicts (e.g. {'asn': 'AS62679', 'owner': 'shopify'});
+    `lookup` returns the label of the most specific block containing the
+    address, with that block as 'network'.
+    """
+
+    def __init__(self, blocks: Iterable[Tuple[str, Dict[str, Any]]] = ()):
+        self.labels: List[Dict[str, Any]] = []
+        self._tables = {4: _Ranges(), 6: _Ranges()}
+        self._v4 = self._tables[4]
+
+        networks = {}
+        for cidr, label in blocks:
+            network = ipaddress.ip_network(cidr, strict=False)
+            # The first source to list a block labels it
+            if network not in networks:
+                networks[network] = {**label, 'network': str(network)}
+
+        for version in (4, 6):
+            entries = sorted(
+                ((int(n.network_address), int(n.broadcast_address), label)
+                 for n, label in networks.items() if n.version == version),
+                key=lambda entry: (entry[0], -entry[1]),
+            )
+            self._flatten(entries, self._tables[version])
+
+    def _flatten(self, entries, table: _Ranges):
+        """Paint nested blocks onto disjoint ranges, innermost block winning."""
+        stack: List[Tuple[int, int]] = []  # (end, label_id) of the open enclosing blocks
+        position = 0
+
+        for start, end, label in entries:
+            while stack and stack[-1][0] < start:
+                top_end, top_label = stack.pop()
+                table.append(position, top_end, top_label)
+                position = top_end + 1
+            if stack:
+                table.append(position, start - 1, stack[-1][1])
+
+            self.labels.append(label)
+            stack.append((end, len(self.labels) - 1))
+            position = start
+
+        while stack:
+            top_end, top_label = stack.pop()
+            table.append(position, top_end, top_label)
+            position = top_end + 1
+
+    @classmethod
+    def from_files(cls, sources: Iterable[Tuple[str, Dict[str, Any]]]) -> 'CidrIndex':
+        """Build from (path, label) pairs, e.g. SHOPIFY_SOURCES."""
+        return cls((cidr, label) for path, label in sources for cidr in read_cidrs(path))
+
+    def lookup(self, ip) -> Optional[Dict[str, Any]]:
+        """Label of the most specific block containing `ip`, or None."""
+        if type(ip) is str:
+            # Hot path: dotted-quad IPv4 strings, without building ipaddress objects
+            try:
+                key = _int_from_bytes(_inet_pton(_AF_INET, ip), 'big')
+            except OSError:
+                pass
+            else:
+                table = self._v4
+                i = _bisect_right(table.starts, key) - 1
+                if i >= 0 and key <= table.ends[i]:
+                    return self.labels[table.label_ids[i]]
+                return None
+        try:
+            version, key = _address_key(ip)
+        except ValueError:
+            return None
+        label_id = self._tables[version].find(key)
+        return None if label_id is None else self.labels[label_id]
+
+    def __contains__(self, ip) -> bool:
+        return self.lookup(ip) is not None
+
+    def networks(self) -> Iterator[ipaddress._BaseNetwork]:
+        """Every indexed block, most general first within each address range."""
+        for label in self.labels:
+            yield ipaddress.ip_network(label['network'])
+
+    def outermost_networks(self) -> List[ipaddress._BaseNetwork]:
+        """Indexed blocks not nested inside another indexed block, in address order."""
+        outermost = []
+        for network in self.networks():
+            last = outermost[-1] if outermost else None
+            if last is not None and last.version == network.version and network.subnet_of(last):
+                continue
+            outermost.append(network)
+        return outermost
+
+    def __len__(self) -> int:
+        return len(self.labels)
+
+    def describe(self) -> str:
+        ranges = sum(len(table) for table in self._tables.values())
+        return f'{len(self.labels)} blocks, {ranges} ranges'
+
+    # Serialization
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            'version': FORMAT_VERSION,
+            'labels': self.labels,
+            'tables': {str(v): [t.starts, t.ends, t.label_ids] for v, t in self._tables.items()},
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> 'CidrIndex':
+        if data.get('version') != FORMAT_VERSION:
+            raise ValueError(f"Unsupported CIDR index version {data.get('version')!r}")
+        index = cls()
+        index.labels = data['labels']
+        index._tables = {int(v): _Ranges(*columns) for v, columns in data['tables'].items()}
+        index._v4 = index._tables[4]
+        return index
+
+    def save(self, path: str):
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        tmp_path = f'{path}.tmp'
+        with open(tmp_path, 'w') as f:
+            json.dump(self.to_dict(), f, separators=(',', ':'))
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path: str) -> 'CidrIndex':
+        with open(path) as f:
+            return cls.from_dict(json.load(f))
+
+
+def sample_hosts(network, every: int = 10, limit: Optional[int] = None) -> List[str]:
+    """Every `every`-th host address of a block (computed, not enumerated)."""
+    network = ipaddress.ip_network(network, strict=False)
+    if network.num_addresses <= 2:
+        first, count = network.network_address, network.num_addresses
+    else:
+        first, count = network.network_address + 1, network.num_addresses - 2
+
+    total = (count + every - 1) // every
+    if limit is not None:
+        total = min(total, limit)
+    return [str(first + i * every) for i in range(total)]
+
+
+_shopify_index: Optional[CidrIndex] = None
+
+
+def load_shopify_index() -> CidrIndex:
+    """
+    The Shopify/Fastly index, loaded once per process.
+
+    Uses the prebuilt DEFAULT_INDEX_FILE when there is one, otherwise builds
+    from SHOPIFY_SOURCES (rerun scripts/build_cidr_index.py after editing them).
+    """
+    global _shopify_index
+    if _shopify_index is None:
+        if os.path.exists(DEFAULT_INDEX_FILE):
+            _shopify_index = CidrIndex.load(DEFAULT_INDEX_FILE)
+        else:
+            _shopify_index = CidrIndex.from_files(SHOPIFY_SOURCES)
+    return _shopify_index
@@ -0,0 +1,70 @@
+"""
+Pluggable HTML parser backend.
+
+Every parse goes through `make_soup`, which builds a BeautifulSoup tree with
+the selected tree builder:
+
+- `lxml`: C-backed (libxml2), several times faster on large pages
+- `html.parser`: pure-Python standard library fallback, always available
+
+The default is `lxml` when it is installed. Override it per run with
+`set_parser()` (the `--parser` CLI flag) or the `HTML_PARSER` environment
+variable. Extraction code only uses the BeautifulSoup API, so results don't
+depend on the backend; scripts/check_parser_parity.py verifies that.
+"""
+
+import os
+from typing import List
+
+from bs4 import BeautifulSoup
+
+# Preferred first: `auto` picks the first one that is installed
+PARSER_BACKENDS = ['lxml', 'html.parser']
+
+_parser = None
+
+
+def available_parsers() -> List[str]:
+    """Installed backends, fastest first."""
+    available = []
+    for name in PARSER_BACKENDS:
+        try:
+            BeautifulSoup('', name)
+        except Exception:
+            continue
+        available.append(name)
+    return available
+
+
+def set_parser(name: str = 'auto') -> str:
+    """
+    Select the backend for this process.
+
+    Args:
+        name: 'lxml', 'html.parser' or 'auto' (fastest installed)
+
+    Returns:
+        The backend in use
+    """
+    global _parser
+
+    available = available_parsers()
+    if name == 'auto':
+        name = available[0]
+    elif name not in available:
+        raise ValueError(f"HTML parser {name!r} is not available (installed: {', '.join(available)})")
+
+    _parser = name
+    return name
+
+
+def get_parser() -> str:
+    """Backend in use (resolved from HTML_PARSER on first call)."""
+    if _parser is None:
+        set_parser(os.environ.get('HTML_PARSER', 'auto'))
+    return _parser
+
+
+def make_soup(markup) -> BeautifulSoup:
+    """Parse HTML (str or bytes) with the selected backend."""
+    return BeautifulSoup(markup, get_parser())
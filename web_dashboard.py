@@ -135,23 +135,31 @@ def start_batch():
 
     # Start batch processing in background
     log_file = f'{batch_name}_log.txt'
+    # Journal per batch: restarting a stopped or crashed batch picks up where it left off
+    journal_file = os.path.join('data', 'journals', f'{batch_name}.jsonl')
     cmd = [
         'python3', '-u', 'src/main_async.py',
         'discover',
         '--txtfile', batch_path,
         '--limit', '100000',
-        '--concurrent', '100'
+        '--stream',
+        '--adaptive',
+        '--concurrent', '50',
+        '--max-concurrent', '300',
+        '--journal', journal_file,
+        '--resume'
     ]
 
     process = subprocess.Popen(
         cmd,
-        stdout=open(log_file, 'w'),
+        stdout=open(log_file, 'a'),
         stderr=subprocess.STDOUT
     )
 
     running_batches[batch_name] = {
         'pid': process.pid,
         'log_file': log_file,
+        'journal_file': journal_file,
         'started_at': datetime.now().isoformat()
     }
 